@@ -1,63 +1,150 @@
+import os
+import queue
 import serial
+import sys
 import threading
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'RELAYV2'))
+from deadline_scheduler import DeadlineScheduler, format_stats
+
 # ===== KONFIGURASI DI SINI =====
 PORT = 'COM13'  # Ganti sesuai port kamu (COM17, /dev/ttyUSB0, dll)
 BAUDRATE = 115200
 SEND_DATA = bytes([0x99, 0xA5, 0x01])  # Data yang dikirim (HEX)
-DELAY_MS = 5  # Delay kirim dalam ms
+DELAY_MS = 5  # Periode kirim dalam ms (5 = 200 Hz, 2 = 500 Hz, 1 = 1 kHz)
+SPIN_US = 300  # Busy-wait sebelum deadline supaya jitter kecil (0 = off)
+DISPLAY_INTERVAL = 0.5  # Layar di-refresh tiap N detik (tidak ikut rate kirim)
+DISPLAY_QUEUE_SIZE = 4096  # Antrian event ke display; kalau penuh, event dibuang
+VERBOSE = False  # True = tampilkan setiap paket TX/RX (seperti versi lama)
+PACKET_LOG = None  # Contoh: 'aktif_raspi.log' untuk simpan setiap paket ke file
 # ================================
 
+def format_hex(data):
+    return ' '.join([f'{b:02X}' for b in data])
+
+def format_ascii(data):
+    return ''.join([chr(b) if 32 <= b < 127 else '.' for b in data])
+
 class SimpleSerial:
     def __init__(self):
         self.ser = serial.Serial(PORT, BAUDRATE, timeout=0.1)
         self.running = True
+        self.scheduler = DeadlineScheduler(1000.0 / DELAY_MS, spin_us=SPIN_US)
+
+        # TX/RX thread hanya update counter dan push ke queue, tidak print
+        self.events = queue.Queue(maxsize=DISPLAY_QUEUE_SIZE)
+        self.per_packet = VERBOSE or PACKET_LOG is not None
+        self.tx_count = 0
+        self.rx_bytes = 0
+        self.rx_chunks = 0
+        self.events_dropped = 0
+        self.last_rx = b''
+
         print(f"Connected to {PORT} at {BAUDRATE} baud\n")
         print("=" * 60)
-        
+
+    def _push(self, kind, data):
+        """Non-blocking hand-off to the display thread"""
+        try:
+            self.events.put_nowait((time.time(), kind, data))
+        except queue.Full:
+            self.events_dropped += 1
+
     def receive_loop(self):
         """Loop untuk terima data"""
         while self.running:
             try:
                 if self.ser.in_waiting > 0:
                     data = self.ser.read(self.ser.in_waiting)
-                    hex_str = ' '.join([f'{b:02X}' for b in data])
-                    ascii_str = ''.join([chr(b) if 32 <= b < 127 else '.' for b in data])
-                    
-                    print(f"\n[RX] HEX: {hex_str}")
-                    print(f"[RX] ASCII: {ascii_str}")
-                    print("-" * 60)
-                    
+                    self.rx_bytes += len(data)
+                    self.rx_chunks += 1
+                    self.last_rx = data
+                    if self.per_packet:
+                        self._push('RX', data)
+
                 time.sleep(0.01)
             except Exception as e:
-                print(f"RX Error: {e}")
+                self._push('ERR', f"RX Error: {e}")
                 break
-    
+
     def send_loop(self):
-        """Loop untuk kirim data setiap 5ms"""
-        counter = 0
+        """Loop untuk kirim data setiap DELAY_MS (deadline absolut, tanpa drift)"""
         while self.running:
             try:
+                self.scheduler.wait()
                 self.ser.write(SEND_DATA)
-                counter += 1
-                hex_str = ' '.join([f'{b:02X}' for b in SEND_DATA])
-                print(f"[TX #{counter}] Sent: {hex_str}", end='\r')
-                time.sleep(DELAY_MS / 1000.0)
+                self.tx_count += 1
+                if self.per_packet:
+                    self._push('TX', self.tx_count)
             except Exception as e:
-                print(f"\nTX Error: {e}")
+                self._push('ERR', f"TX Error: {e}")
                 break
-    
+
+    def _print_event(self, log, t, kind, data):
+        """One line per packet (VERBOSE / PACKET_LOG)"""
+        stamp = time.strftime('%H:%M:%S', time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+        if kind == 'TX':
+            line = f"{stamp} [TX #{data}] Sent: {format_hex(SEND_DATA)}"
+        elif kind == 'RX':
+            line = f"{stamp} [RX] HEX: {format_hex(data)} | ASCII: {format_ascii(data)}"
+        else:
+            line = f"{stamp} {data}"
+        if VERBOSE or kind == 'ERR':
+            print(line)
+        if log is not None:
+            log.write(line + '\n')
+
+    def display_loop(self):
+        """Satu-satunya thread yang menulis ke console"""
+        log = open(PACKET_LOG, 'a') if PACKET_LOG else None
+        last_tx = last_rx = 0
+        last_time = time.monotonic()
+        try:
+            while self.running:
+                deadline = time.monotonic() + DISPLAY_INTERVAL
+                # Kuras queue sampai waktu redraw berikut
+                while True:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        event = self.events.get(timeout=timeout)
+                    except queue.Empty:
+                        break
+                    self._print_event(log, *event)
+
+                now = time.monotonic()
+                elapsed = now - last_time
+                tx_rate = (self.tx_count - last_tx) / elapsed
+                rx_rate = (self.rx_bytes - last_rx) / elapsed
+                last_tx, last_rx, last_time = self.tx_count, self.rx_bytes, now
+
+                if not VERBOSE:
+                    print(f"[TX] {self.tx_count:,} paket ({tx_rate:.1f} Hz) | "
+                          f"[RX] {self.rx_bytes:,} byte ({rx_rate:.0f} B/s) last: {format_hex(self.last_rx[-6:]):<17} | "
+                          f"drop {self.events_dropped}", end='\r')
+        finally:
+            # Sisa event saat berhenti tetap ditulis
+            while not self.events.empty():
+                self._print_event(log, *self.events.get_nowait())
+            if log is not None:
+                log.close()
+
     def run(self):
-        """Jalankan kedua thread"""
+        """Jalankan thread TX, RX dan display"""
         # Thread untuk receive
         rx_thread = threading.Thread(target=self.receive_loop, daemon=True)
         rx_thread.start()
-        
+
         # Thread untuk send
         tx_thread = threading.Thread(target=self.send_loop, daemon=True)
         tx_thread.start()
-        
+
+        # Thread untuk tampilan (rate rendah, agregat)
+        display_thread = threading.Thread(target=self.display_loop, daemon=True)
+        display_thread.start()
+
         try:
             # Keep program running
             while True:
@@ -65,7 +152,12 @@ class SimpleSerial:
         except KeyboardInterrupt:
             print("\n\nStopping...")
             self.running = False
+            display_thread.join(timeout=2 * DISPLAY_INTERVAL)
             self.ser.close()
+            print(f"TX packets: {self.tx_count:,}  RX bytes: {self.rx_bytes:,} ({self.rx_chunks:,} reads)")
+            if self.events_dropped:
+                print(f"Display events dropped (queue full): {self.events_dropped:,}")
+            print(format_stats(self.scheduler.stats()))
 
 if __name__ == "__main__":
     try:
@@ -76,4 +168,4 @@ if __name__ == "__main__":
         print("\nPastikan:")
         print(f"1. Port {PORT} benar dan tersedia")
         print("2. Tidak ada aplikasi lain yang pakai port ini")
-        print("3. Sudah install: pip install pyserial")
\ No newline at end of file
+        print("3. Sudah install: pip install pyserial")
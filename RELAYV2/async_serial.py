@@ -0,0 +1,300 @@
+"""
+Async Serial Transport
+======================
+Transport asyncio untuk port serial, pengganti loop
+`if ser.in_waiting > 0 ... time.sleep(0.001)`.
+
+- Linux / macOS: file descriptor tty dipasang non-blocking dan didaftarkan
+  ke event loop (loop.add_reader), jadi tidak ada polling sama sekali.
+  Data dibaca begitu kernel bilang ada, timestamp diambil saat itu juga.
+- Windows: fd tidak bisa di-select, jadi satu thread reader per port
+  melakukan blocking read lalu menyerahkan data ke event loop. TX
+  (ser.write blocking) dijalankan di executor, satu write per port
+  sekaligus supaya urutan byte tetap, jadi event loop tidak ikut stall.
+
+Satu event loop bisa menjalankan TX dan RX di banyak port sekaligus.
+close() membangunkan task yang sedang menunggu read_chunk(); iterasi
+`async for` berhenti dengan StopAsyncIteration.
+
+Contoh:
+    async def main():
+        port = await open_serial('/dev/ttyUSB0', 115200)
+        port.write(b'\\x99\\xA5\\x01')
+        t_ns, data = await port.read_chunk()
+        port.close()
+
+    asyncio.run(main())
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import serial
+
+READ_SIZE = 4096  # bytes per os.read()
+QUEUE_SIZE = 1024  # chunks buffered before the oldest is dropped
+
+
+class AsyncSerialPort:
+    """Serial port driven by an asyncio event loop"""
+
+    def __init__(self, port, baudrate=115200):
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self.loop = None
+        self._chunks = None
+        self._fd = None
+        self._thread = None
+        self._tx_pending = bytearray()
+        self._tx_idle = None
+        self._closed = False
+        self._error = None  # Error port pertama (RX atau TX)
+
+        # Statistics
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+        self.chunks_dropped = 0
+
+    async def open(self):
+        """Open and configure the port, then start receiving"""
+        self.loop = asyncio.get_running_loop()
+        self._chunks = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._tx_idle = asyncio.Event()
+        self._tx_idle.set()
+
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=0)
+
+        if os.name == 'posix':
+            self._fd = self.ser.fileno()
+            os.set_blocking(self._fd, False)
+            self.loop.add_reader(self._fd, self._on_readable)
+        else:
+            self.ser.timeout = 0.05
+            self._thread = threading.Thread(target=self._reader_thread, daemon=True)
+            self._thread.start()
+        return self
+
+    # ===== RX =====
+
+    def _put(self, item):
+        """Queue (t_ns, data | Exception | None), dropping the oldest chunk if full"""
+        if self._chunks.full():
+            # Consumer terlalu lambat: buang chunk paling lama
+            self._chunks.get_nowait()
+            self.chunks_dropped += 1
+        self._chunks.put_nowait(item)
+
+    def _push(self, t_ns, data):
+        """Queue a received chunk (event loop thread only)"""
+        if self._closed:
+            return  # Reader thread masih kirim setelah close()
+        self.bytes_rx += len(data)
+        self._put((t_ns, data))
+
+    def _on_readable(self):
+        """add_reader callback: drain everything the kernel has"""
+        t_ns = time.monotonic_ns()
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            self._fail(e)
+            return
+        if not data:
+            self._fail(serial.SerialException(f"{self.port} closed"))
+            return
+        self._push(t_ns, data)
+
+    def _reader_thread(self):
+        """Fallback reader for platforms without selectable tty fds"""
+        while not self._closed:
+            try:
+                data = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                self.loop.call_soon_threadsafe(self._fail, e)
+                return
+            if data:
+                self.loop.call_soon_threadsafe(self._push, time.monotonic_ns(), data)
+
+    def _fail(self, exc):
+        """Port error (RX or TX): release readers, writers and drain() waiters"""
+        if self._closed:
+            return  # Error karena close() sendiri, bukan port
+        if self._error is None:
+            self._error = exc
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            self.loop.remove_writer(self._fd)
+            self._fd = None
+        self._tx_pending.clear()
+        self._tx_idle.set()
+        # Error tidak boleh hilang walau queue penuh (consumer lambat)
+        self._put((time.monotonic_ns(), exc))
+
+    async def _next(self):
+        """Next (t_ns, data), or None once the port is closed"""
+        t_ns, data = await self._chunks.get()
+        if data is None:
+            self._chunks.put_nowait((t_ns, None))  # Bangunkan reader lain juga
+            return None
+        if isinstance(data, Exception):
+            raise data
+        return t_ns, data
+
+    async def read_chunk(self):
+        """
+        Wait for the next received chunk.
+
+        Returns:
+            (t_ns, data): monotonic timestamp in ns taken when the data
+            was read from the tty, and the raw bytes.
+
+        Raises:
+            serial.SerialException: port error, or the port was closed
+        """
+        chunk = await self._next()
+        if chunk is None:
+            raise serial.SerialException(f"{self.port} closed")
+        return chunk
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        chunk = await self._next()
+        if chunk is None:
+            raise StopAsyncIteration
+        return chunk
+
+    # ===== TX =====
+
+    def write(self, data):
+        """
+        Send bytes without blocking; leftovers are sent when writable.
+
+        Raises:
+            the port error if the port already failed (mis. USB dicabut)
+        """
+        if self._error is not None:
+            raise self._error
+        if self._fd is None:
+            # Fallback (Windows): ser.write blocking, jalankan di executor
+            self._tx_pending += data
+            if self._tx_idle.is_set():
+                self._tx_idle.clear()
+                self._start_blocking_write()
+            return
+
+        if not self._tx_pending:
+            try:
+                sent = os.write(self._fd, data)
+            except BlockingIOError:
+                sent = 0
+            except OSError as e:
+                self._fail(e)
+                raise
+            self.bytes_tx += sent
+            if sent == len(data):
+                return
+            data = data[sent:]
+            self._tx_idle.clear()
+            self.loop.add_writer(self._fd, self._on_writable)
+        self._tx_pending += data
+
+    def _on_writable(self):
+        try:
+            sent = os.write(self._fd, self._tx_pending)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            # EIO / ENXIO (adapter dicabut): jangan biarkan writer gagal terus tiap iterasi loop
+            self._fail(e)
+            return
+        self.bytes_tx += sent
+        del self._tx_pending[:sent]
+        if not self._tx_pending:
+            self.loop.remove_writer(self._fd)
+            self._tx_idle.set()
+
+    def _start_blocking_write(self):
+        data = bytes(self._tx_pending)
+        self._tx_pending.clear()
+        future = self.loop.run_in_executor(None, self.ser.write, data)
+        future.add_done_callback(lambda f: self._on_blocking_write_done(f, len(data)))
+
+    def _on_blocking_write_done(self, future, length):
+        exc = None if future.cancelled() else future.exception()
+        if exc is not None:
+            self._tx_pending.clear()
+            self._fail(exc)
+        elif not future.cancelled():
+            self.bytes_tx += length
+        if self._tx_pending and not self._closed:
+            self._start_blocking_write()  # Write yang masuk selama ini, urutan tetap
+        else:
+            self._tx_pending.clear()
+            self._tx_idle.set()
+
+    async def drain(self):
+        """
+        Wait until all written bytes have been handed to the kernel.
+
+        Raises:
+            the port error if the port failed before everything was sent
+        """
+        await self._tx_idle.wait()
+        if self._error is not None:
+            raise self._error
+
+    # ===== CLOSE =====
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._fd is not None:
+            self.loop.remove_reader(self._fd)
+            if self._tx_pending:
+                self.loop.remove_writer(self._fd)
+                self._tx_idle.set()
+            self._fd = None
+        if self.ser is not None and self.ser.is_open:
+            self.ser.close()
+        if self._chunks is not None:
+            # Sentinel: task yang menunggu read_chunk() / async for berhenti
+            self._put((time.monotonic_ns(), None))
+
+    @property
+    def is_open(self):
+        return not self._closed and self.ser is not None and self.ser.is_open
+
+
+async def open_serial(port, baudrate=115200):
+    """Open an AsyncSerialPort on the running event loop"""
+    return await AsyncSerialPort(port, baudrate).open()
+
+
+async def send_periodic(port, data, interval, count=None):
+    """
+    Write `data` every `interval` seconds on absolute deadlines.
+
+    Args:
+        port: AsyncSerialPort
+        data: bytes to send
+        interval: seconds between writes
+        count: stop after N writes (None = forever)
+    """
+    sent = 0
+    next_deadline = time.monotonic()
+    while count is None or sent < count:
+        port.write(data)
+        sent += 1
+        next_deadline += interval
+        delay = next_deadline - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    return sent
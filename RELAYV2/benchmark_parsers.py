@@ -0,0 +1,435 @@
+"""
+Parser Throughput Benchmark
+===========================
+Ukur frames/sec dan bytes/sec untuk semua parser host tool di RELAYV2,
+dengan stream sintetis yang bisa dirusak secara terkontrol:
+
+    drop          byte hilang di jalan (UART overrun)
+    false_header  A5 99 / 99 A5 / BB muncul di dalam payload
+    noise         byte acak menggantikan byte asli (line noise)
+
+Parser yang diukur (kode asli tool-nya di-import, bukan salinan, kecuali
+complete_legacy dan relay_uart_fixed3 sebagai pembanding lama):
+    complete_legacy   loop scan A5 99 lama (buffer = buffer[15:])
+    complete_ring     StreamFramer + FrameRing.append + snapshot()
+                      (monitor_complete.py)
+    complete_batch    StreamFramer + decode_frames() NumPy per chunk
+                      (capture_query.py / parquet_export.py)
+    discrete_events   StreamFramer + FrameRing + TransitionDetector
+                      .feed_frames() (monitor_discrete.py)
+    relay_uart_fixed3 read 3 byte tetap + klasifikasi (test_relay_uart.py)
+    status_framer     StreamFramer STATUS (99 A5 val)
+    rome_framer       StreamFramer ROME (BB ID MSB LSB)
+    diag_rome         StreamFramer uart_diagnostic.FRAME_KINDS, hanya ROME
+                      di stream (kind pertama tidak pernah muncul)
+    diag_mixed        StreamFramer uart_diagnostic.FRAME_KINDS, STATUS +
+                      ROME bercampur
+    export_status     StreamFramer parquet_export.PORT_KINDS[PORT_RASPI],
+                      hanya STATUS (port USART1)
+    export_mixed      idem, DATA + STATUS bercampur
+
+Setiap kasus dijalankan dengan read kecil (--chunk, default 64 byte) dan
+read besar (--burst, default 64 KB: replay / capture / ser.read setelah
+jeda), karena framer yang tidak linear baru terlihat di buffer besar.
+
+Headroom = bytes/sec parser dibagi bytes/sec satu UART 115200 penuh
+(11.520 byte/s). Headroom < 3 berarti satu proses tidak sanggup
+mengikuti tiga port sekaligus.
+
+Hasil disimpan sebagai JSON supaya bisa dibandingkan antar run:
+    python benchmark_parsers.py --json bench_baseline.json
+    python benchmark_parsers.py --json bench_new.json --compare bench_baseline.json
+    python benchmark_parsers.py --parser diag_rome --parser export_status --burst 262144
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from frame_codec import (
+    DATA_FRAME_LEN, STATUS_FRAME_LEN, ROME_FRAME_LEN, NUM_DEVICES,
+    make_frames, encode_frames, decode_frames, device_angles,
+)
+from stream_framer import StreamFramer, DATA, STATUS, ROME
+from frame_ring import FrameRing
+from discrete_decoder import TransitionDetector
+from capture_file import PORT_RASPI
+import monitor_complete
+import monitor_discrete
+import uart_diagnostic
+import parquet_export
+
+# ===== CONFIGURATION =====
+BAUD_RATE = 115200
+LINE_BYTES_PER_S = BAUD_RATE / 10  # 8N1
+DEFAULT_FRAMES = 50000
+DEFAULT_CHUNK = 64        # ~5 ms data di 115200 baud
+DEFAULT_BURST = 64 * 1024  # Read besar (replay record / backlog setelah jeda)
+DEFAULT_REPEAT = 3
+REGRESSION_PCT = 10.0     # --compare: lebih lambat dari ini = regression
+
+# Profil korupsi: (drop_rate, false_header_rate, noise_rate)
+PROFILES = {
+    'clean': (0.0, 0.0, 0.0),
+    'drop': (0.001, 0.0, 0.0),
+    'false_header': (0.0, 0.05, 0.0),
+    'noise': (0.0, 0.0, 0.001),
+    'mixed': (0.001, 0.05, 0.001),
+}
+
+
+# ===== SYNTHETIC STREAMS =====
+
+def _corrupt(stream, drop_rate, noise_rate, rng):
+    """Apply line noise (byte replaced) then drops (byte removed)"""
+    raw = np.frombuffer(stream, dtype=np.uint8).copy()
+    if noise_rate > 0:
+        hit = rng.random(len(raw)) < noise_rate
+        raw[hit] = rng.integers(0, 256, int(hit.sum()), dtype=np.uint8)
+    if drop_rate > 0:
+        raw = raw[rng.random(len(raw)) >= drop_rate]
+    return raw.tobytes()
+
+
+def _data_packets(frames, false_header_rate, rng):
+    """(frames, 15) A5 99 frames"""
+    devices = rng.integers(0, 65536, (frames, NUM_DEVICES), dtype=np.uint16)
+    if false_header_rate > 0:
+        # Device word = 0xA599 -> header palsu di dalam payload
+        fake = rng.random(frames) < false_header_rate
+        devices[fake, rng.integers(0, NUM_DEVICES, int(fake.sum()))] = 0xA599
+    batch = make_frames(
+        frames,
+        discrete_a=rng.integers(0, 256, frames, dtype=np.uint8),
+        discrete_b=rng.integers(0, 256, frames, dtype=np.uint8),
+        discrete_c=rng.integers(0, 256, frames, dtype=np.uint8),
+        devices=devices,
+    )
+    return np.frombuffer(encode_frames(batch), dtype=np.uint8).reshape(-1, DATA_FRAME_LEN)
+
+
+def _status_packets(frames, false_header_rate, rng):
+    """(frames, 3) 99 A5 val packets"""
+    packets = np.empty((frames, STATUS_FRAME_LEN), dtype=np.uint8)
+    packets[:, 0] = 0x99
+    packets[:, 1] = 0xA5
+    packets[:, 2] = rng.integers(0, 2, frames)
+    if false_header_rate > 0:
+        # val = 0x99 diikuti header berikut -> "99 99 A5"
+        packets[rng.random(frames) < false_header_rate, 2] = 0x99
+    return packets
+
+
+def _rome_packets(frames, false_header_rate, rng):
+    """(frames, 4) BB ID MSB LSB packets (ID 1..5 berurutan)"""
+    packets = np.empty((frames, ROME_FRAME_LEN), dtype=np.uint8)
+    packets[:, 0] = 0xBB
+    packets[:, 1] = np.arange(frames) % NUM_DEVICES + 1
+    packets[:, 2:] = rng.integers(0, 256, (frames, 2))
+    if false_header_rate > 0:
+        # MSB = 0xBB, LSB = ID valid -> terlihat seperti header ROME
+        fake = rng.random(frames) < false_header_rate
+        packets[fake, 2] = 0xBB
+        packets[fake, 3] = rng.integers(1, NUM_DEVICES + 1, int(fake.sum()))
+    return packets
+
+
+def _stream(build_packets, doc):
+    def stream(frames, drop_rate=0.0, false_header_rate=0.0, noise_rate=0.0, seed=1):
+        rng = np.random.default_rng(seed)
+        return _corrupt(build_packets(frames, false_header_rate, rng).tobytes(), drop_rate, noise_rate, rng)
+    stream.__doc__ = doc
+    return stream
+
+
+def _mixed_stream(*builders):
+    """Stream with packets of several kinds in random order (frames split evenly)"""
+    def stream(frames, drop_rate=0.0, false_header_rate=0.0, noise_rate=0.0, seed=1):
+        rng = np.random.default_rng(seed)
+        packets = [bytes(row) for build in builders
+                   for row in build(frames // len(builders), false_header_rate, rng)]
+        order = rng.permutation(len(packets))
+        return _corrupt(b''.join(packets[i] for i in order), drop_rate, noise_rate, rng)
+    return stream
+
+
+data_stream = _stream(_data_packets, "Raspy -> RELAYV2 stream of 15-byte A5 99 frames")
+status_stream = _stream(_status_packets, "RELAYV2 -> Raspy stream of 3-byte 99 A5 val packets")
+rome_stream = _stream(_rome_packets, "RELAYV2 -> ROME stream of BB ID MSB LSB packets")
+status_rome_stream = _mixed_stream(_status_packets, _rome_packets)
+data_status_stream = _mixed_stream(_data_packets, _status_packets)
+
+
+# ===== PARSERS =====
+# Setiap parser: fungsi(chunks) -> jumlah frame yang di-decode
+
+def parse_complete_legacy(chunks):
+    """Byte scan loop from the original monitor_complete.py"""
+    count = 0
+    buffer = bytearray()
+    for data in chunks:
+        buffer.extend(data)
+        while len(buffer) >= 15:
+            header_idx = -1
+            for i in range(len(buffer) - 1):
+                if buffer[i] == 0xA5 and buffer[i+1] == 0x99:
+                    header_idx = i
+                    break
+            if header_idx == -1:
+                buffer = buffer[-1:]
+                break
+            if header_idx > 0:
+                buffer = buffer[header_idx:]
+            if len(buffer) >= 15:
+                packet = buffer[:15]
+                buffer = buffer[15:]
+                for i in range(5):
+                    raw_value = (packet[5 + (i * 2)] << 8) | packet[6 + (i * 2)]
+                    angle = (raw_value * 360.0) / 65535.0
+                count += 1
+    return count
+
+
+def parse_complete_ring(chunks):
+    """monitor_complete.py: StreamFramer + FrameRing.append, snapshot() per display"""
+    framer = StreamFramer((DATA,))
+    ring = FrameRing(monitor_complete.RING_CAPACITY)
+    t_ns = 0
+    for data in chunks:
+        framer.feed(data)
+        t_ns += 1
+        for _, packet in framer.frames():
+            ring.append(packet, t_ns)
+    if ring.seq:
+        monitor_complete.snapshot(ring)
+    return ring.seq
+
+
+def parse_complete_batch(chunks):
+    """StreamFramer + one NumPy decode per chunk"""
+    count = 0
+    framer = StreamFramer((DATA,))
+    for data in chunks:
+        framer.feed(data)
+        packets = b''.join(packet for _, packet in framer.frames())
+        if packets:
+            frames = decode_frames(packets, validate=False)
+            device_angles(frames)
+            count += len(frames)
+    return count
+
+
+def parse_discrete_events(chunks):
+    """monitor_discrete.py: FrameRing.since() + TransitionDetector.feed_frames() per read"""
+    framer = StreamFramer((DATA,))
+    ring = FrameRing(monitor_discrete.RING_CAPACITY)
+    detector = TransitionDetector()
+    read_seq = 0
+    t_ns = 0
+    for data in chunks:
+        framer.feed(data)
+        t_ns += 1
+        for _, packet in framer.frames():
+            ring.append(packet, t_ns)
+        if ring.seq == read_seq:
+            continue
+        first_seq, frames, stamps = ring.since(read_seq)
+        discretes = np.column_stack([frames['discrete_a'], frames['discrete_b'], frames['discrete_c']])
+        for _ in detector.feed_frames(discretes, stamps, first_seq):
+            pass
+        read_seq = ring.seq
+    return ring.seq
+
+
+def parse_relay_uart_fixed3(chunks):
+    """Fixed 3-byte reads + classification (test_relay_uart.py)"""
+    count = 0
+    pending = bytearray()
+    for data in chunks:
+        pending += data
+        usable = len(pending) - len(pending) % 3
+        for i in range(0, usable, 3):
+            b0, b1, b2 = pending[i], pending[i + 1], pending[i + 2]
+            if b0 == 0x99 and b1 == 0xA5:
+                value = b2
+            elif 0x01 <= b0 <= 0x05:
+                raw_value = (b1 << 8) | b2
+                angle = raw_value / 10.0
+            count += 1
+        del pending[:usable]
+    return count
+
+
+def _framer_parser(kinds):
+    def parse(chunks):
+        framer = StreamFramer(kinds)
+        count = 0
+        for data in chunks:
+            framer.feed(data)
+            for _ in framer.frames():
+                count += 1
+        return count
+    parse.__doc__ = f"StreamFramer {kinds}"
+    return parse
+
+
+# name -> (parser, stream builder)
+PARSERS = {
+    'complete_legacy': (parse_complete_legacy, data_stream),
+    'complete_ring': (parse_complete_ring, data_stream),
+    'complete_batch': (parse_complete_batch, data_stream),
+    'discrete_events': (parse_discrete_events, data_stream),
+    'relay_uart_fixed3': (parse_relay_uart_fixed3, status_stream),
+    'status_framer': (_framer_parser((STATUS,)), status_stream),
+    'rome_framer': (_framer_parser((ROME,)), rome_stream),
+    'diag_rome': (_framer_parser(uart_diagnostic.FRAME_KINDS), rome_stream),
+    'diag_mixed': (_framer_parser(uart_diagnostic.FRAME_KINDS), status_rome_stream),
+    'export_status': (_framer_parser(parquet_export.PORT_KINDS[PORT_RASPI]), status_stream),
+    'export_mixed': (_framer_parser(parquet_export.PORT_KINDS[PORT_RASPI]), data_status_stream),
+}
+
+
+# ===== RUNNER =====
+
+def split_chunks(stream, chunk):
+    """Cut a stream into read()-sized pieces"""
+    return [stream[i:i + chunk] for i in range(0, len(stream), chunk)]
+
+
+def bench_one(name, profile, frames, chunk, repeat, seed=1):
+    """Best-of-`repeat` timing of one parser on one corruption profile"""
+    parser, build = PARSERS[name]
+    drop_rate, false_header_rate, noise_rate = PROFILES[profile]
+    stream = build(frames, drop_rate, false_header_rate, noise_rate, seed)
+    chunks = split_chunks(stream, chunk)
+
+    best = None
+    decoded = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        decoded = parser(chunks)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    best = max(best, 1e-9)
+    bytes_per_s = len(stream) / best
+    return {
+        'parser': name,
+        'profile': profile,
+        'chunk': chunk,
+        'frames_sent': frames,
+        'frames_decoded': decoded,
+        'bytes': len(stream),
+        'seconds': best,
+        'frames_per_s': decoded / best,
+        'bytes_per_s': bytes_per_s,
+        'line_headroom': bytes_per_s / LINE_BYTES_PER_S,
+    }
+
+
+def run_suite(parsers, profiles, frames, chunks, repeat, seed=1, progress=True):
+    results = []
+    for name in parsers:
+        for profile in profiles:
+            for chunk in chunks:
+                result = bench_one(name, profile, frames, chunk, repeat, seed)
+                results.append(result)
+                if progress:
+                    print_result(result)
+    return results
+
+
+def print_table_header():
+    print("=" * 110)
+    print(f"{'Parser':<20} {'Profile':<13} {'Chunk':>7} {'Frames':>9} {'Decoded':>9} "
+          f"{'Frames/s':>12} {'MB/s':>8} {'Headroom':>10}")
+    print("-" * 110)
+
+
+def print_result(r):
+    print(f"{r['parser']:<20} {r['profile']:<13} {r['chunk']:>7} {r['frames_sent']:>9,} {r['frames_decoded']:>9,} "
+          f"{r['frames_per_s']:>12,.0f} {r['bytes_per_s'] / 1e6:>8.2f} {r['line_headroom']:>9.0f}x")
+
+
+def compare(results, baseline_path, threshold=REGRESSION_PCT):
+    """Print per-case change vs an earlier JSON run; return regressions"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    # Baseline lama tanpa kolom chunk: semua hasilnya dari config chunk
+    default_chunk = baseline.get('config', {}).get('chunk')
+    previous = {(r['parser'], r['profile'], r.get('chunk', default_chunk)): r for r in baseline['results']}
+
+    regressions = []
+    print("\n" + "=" * 110)
+    print(f"COMPARE vs {baseline_path} ({baseline.get('timestamp', '?')})")
+    print("=" * 110)
+    for r in results:
+        old = previous.get((r['parser'], r['profile'], r['chunk']))
+        if old is None:
+            continue
+        change = 100.0 * (r['bytes_per_s'] / old['bytes_per_s'] - 1.0)
+        flag = ""
+        if change < -threshold:
+            flag = "  <-- REGRESSION"
+            regressions.append((r['parser'], r['profile'], r['chunk'], change))
+        print(f"{r['parser']:<20} {r['profile']:<13} {r['chunk']:>7} {change:>+8.1f} %{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for RELAYV2 host parsers")
+    parser.add_argument('--parser', action='append', choices=sorted(PARSERS), help="parser to run (repeatable)")
+    parser.add_argument('--profile', action='append', choices=sorted(PROFILES), help="corruption profile (repeatable)")
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES, help="frames per stream")
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help="bytes per simulated read()")
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST, help="bytes per large read (0 = skip)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="runs per case (best is kept)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help="write results to this JSON file")
+    parser.add_argument('--compare', help="earlier JSON result to compare against")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_PCT, help="regression threshold (%%)")
+    args = parser.parse_args()
+
+    parsers = args.parser or list(PARSERS)
+    profiles = args.profile or list(PROFILES)
+
+    chunks = [args.chunk] + ([args.burst] if args.burst else [])
+    print(f"Frames: {args.frames:,}  Chunk: {' / '.join(map(str, chunks))} byte  Repeat: {args.repeat}")
+    print_table_header()
+    results = run_suite(parsers, profiles, args.frames, chunks, args.repeat, args.seed)
+    print("=" * 110)
+
+    if args.json:
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'config': {
+                'frames': args.frames,
+                'chunk': args.chunk,
+                'burst': args.burst,
+                'repeat': args.repeat,
+                'seed': args.seed,
+                'profiles': {name: PROFILES[name] for name in profiles},
+            },
+            'results': results,
+        }
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.json}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) > {args.threshold:.0f} %")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,347 @@
+"""
+Capture File - Timestamped Binary Recording
+===========================================
+Format append-only untuk merekam semua byte UART apa adanya, supaya
+kasus "stuck" bisa dianalisa ulang setelah terminal ditutup.
+
+File layout (little-endian):
+    File header (16 byte):  magic 'RLYCAP01' | u32 version | u32 reserved
+    Record header (12 byte): u64 t_ns | u8 port | u8 direction | u16 length
+    Record payload:          <length> raw bytes (1 chunk hasil read/write)
+
+t_ns adalah time.monotonic_ns() saat chunk dibaca / dikirim.
+
+CaptureWriter meng-append ke file yang sudah ada, dan jam monotonic
+mulai ulang setelah reboot, jadi satu file bisa berisi beberapa session.
+Reader memecah index jadi session di titik t_ns mundur; time_slice()
+hanya dijawab per session (searchsorted butuh t_ns urut).
+
+- CaptureWriter: write() hanya memasukkan chunk ke queue, thread
+  terpisah yang melakukan buffered I/O ke disk. RX path tidak pernah
+  menunggu disk.
+- CaptureReader: file di-mmap, index record (offset, t_ns, port, dir,
+  length) disimpan di NumPy array dan di-cache ke <file>.idx.npz
+  (divalidasi ukuran + mtime file), jadi capture multi-GB bisa di-index
+  dan di-slice tanpa diload.
+
+Usage: python capture_file.py <capture.rcap>   (ringkasan isi capture)
+"""
+
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+# ===== FORMAT =====
+MAGIC = b'RLYCAP01'
+VERSION = 1
+FILE_HEADER = struct.Struct('<8sII')
+RECORD_HEADER = struct.Struct('<QBBH')
+MAX_CHUNK = 0xFFFF
+
+# Direction tag
+DIR_RX = 0
+DIR_TX = 1
+DIRECTION_NAMES = ('RX', 'TX')
+
+# Port tag (bebas, ini konvensi untuk 3 UART RELAYV2)
+PORT_RASPI = 0   # USART1 - Raspberry Pi
+PORT_ROME = 1    # USART2 - ROME devices
+PORT_NANO = 2    # USART3 - Nano
+PORT_NAMES = {PORT_RASPI: 'RASPI', PORT_ROME: 'ROME', PORT_NANO: 'NANO'}
+
+WRITE_BUFFER = 1024 * 1024  # bytes
+FLUSH_INTERVAL = 1.0        # seconds
+INDEX_CHUNK = 65536         # record header per chunk saat build index
+SESSION_BACKSTEP_NS = 1_000_000_000  # t_ns mundur lebih dari ini = session baru
+
+INDEX_DTYPE = np.dtype([
+    ('offset', '<i8'),   # offset payload di file
+    ('t_ns', '<u8'),
+    ('port', 'u1'),
+    ('direction', 'u1'),
+    ('length', '<u2'),
+])
+
+
+def _index_chunk(rows):
+    """INDEX_DTYPE array from a flat list of (offset, t_ns, port, direction, length)"""
+    values = np.array(rows, dtype=np.int64).reshape(-1, len(INDEX_DTYPE.names))
+    chunk = np.empty(len(values), dtype=INDEX_DTYPE)
+    for i, name in enumerate(INDEX_DTYPE.names):
+        chunk[name] = values[:, i]
+    return chunk
+
+
+class CaptureWriter:
+    """Append-only capture writer with a background I/O thread"""
+
+    def __init__(self, path):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab', buffering=WRITE_BUFFER)
+        if new_file:
+            self._file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._closed = False
+
+        # Statistics
+        self.records = 0
+        self.bytes_written = 0
+
+        self._thread.start()
+
+    def write(self, data, port=PORT_RASPI, direction=DIR_RX, t_ns=None):
+        """Queue one chunk for writing (never blocks on disk)"""
+        if self._closed or not data:
+            return
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        self._queue.put((t_ns, port, direction, bytes(data)))
+
+    def _writer_loop(self):
+        pack = RECORD_HEADER.pack
+        f = self._file
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = ()
+
+            if item is None:
+                break
+
+            if item:
+                t_ns, port, direction, data = item
+                # Chunk > 64 KB dipecah jadi beberapa record
+                for i in range(0, len(data), MAX_CHUNK):
+                    part = data[i:i + MAX_CHUNK]
+                    f.write(pack(t_ns, port, direction, len(part)))
+                    f.write(part)
+                    self.records += 1
+                    self.bytes_written += RECORD_HEADER.size + len(part)
+
+            now = time.monotonic()
+            if now - last_flush >= FLUSH_INTERVAL:
+                f.flush()
+                last_flush = now
+
+        f.flush()
+
+    def close(self):
+        """Write out everything still queued, then close the file"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """mmap-backed reader with a cached NumPy record index"""
+
+    def __init__(self, path, use_index_cache=True):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < FILE_HEADER.size:
+            raise ValueError(f"{path}: not a capture file (too short)")
+
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mm)
+        magic, version, _ = FILE_HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: bad magic {magic!r}")
+        if version != VERSION:
+            raise ValueError(f"{path}: unsupported version {version}")
+
+        self.index = self._load_index(use_index_cache)
+        self.sessions = self._find_sessions()
+
+    # ===== INDEX =====
+
+    def _index_path(self):
+        return self.path + '.idx.npz'
+
+    def _load_index(self, use_cache):
+        size = len(self._mm)
+        mtime_ns = os.fstat(self._file.fileno()).st_mtime_ns
+        if use_cache and os.path.exists(self._index_path()):
+            with np.load(self._index_path()) as cached:
+                if ('file_mtime_ns' in cached.files and int(cached['file_size']) == size
+                        and int(cached['file_mtime_ns']) == mtime_ns):
+                    return cached['index']
+
+        index = self._build_index()
+        if use_cache:
+            try:
+                np.savez(self._index_path(), index=index, file_size=size, file_mtime_ns=mtime_ns)
+            except OSError:
+                pass  # Read-only directory: index tetap dipakai di memori
+        return index
+
+    def _build_index(self):
+        """Scan record headers once; truncated tail record is ignored"""
+        mm = self._mm
+        size = len(mm)
+        unpack = RECORD_HEADER.unpack_from
+        hsize = RECORD_HEADER.size
+
+        # Header dikumpulkan per INDEX_CHUNK record (satu list datar) lalu
+        # langsung dikonversi ke INDEX_DTYPE, jadi memori puncak ~2x index
+        # akhir, bukan list Python per field untuk seluruh capture
+        chunks = []
+        rows = []
+        extend = rows.extend
+        chunk_values = INDEX_CHUNK * len(INDEX_DTYPE.names)
+        pos = FILE_HEADER.size
+        while pos + hsize <= size:
+            header = unpack(mm, pos)
+            payload = pos + hsize
+            if payload + header[3] > size:
+                break
+            rows.append(payload)
+            extend(header)
+            if len(rows) >= chunk_values:
+                chunks.append(_index_chunk(rows))
+                rows = []
+                extend = rows.extend
+            pos = payload + header[3]
+        chunks.append(_index_chunk(rows))
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def _find_sessions(self):
+        """
+        First record number of every session (t_ns restarts).
+
+        Mundur kecil (< SESSION_BACKSTEP_NS) bisa terjadi kalau beberapa
+        thread menulis ke CaptureWriter yang sama, itu bukan session baru.
+        """
+        stamps = self.index['t_ns'].astype(np.int64)
+        backsteps = np.nonzero(np.diff(stamps) < -SESSION_BACKSTEP_NS)[0] + 1
+        return np.concatenate([[0], backsteps]).astype(np.int64)
+
+    def session_range(self, session):
+        """(start, stop) record numbers of one session"""
+        if not 0 <= session < len(self.sessions):
+            raise IndexError(f"{self.path}: session {session} out of range ({len(self.sessions)} sessions)")
+        stop = self.sessions[session + 1] if session + 1 < len(self.sessions) else len(self.index)
+        return int(self.sessions[session]), int(stop)
+
+    # ===== ACCESS =====
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        """Return (t_ns, port, direction, memoryview payload) of record i"""
+        rec = self.index[i]
+        offset = int(rec['offset'])
+        return (int(rec['t_ns']), int(rec['port']), int(rec['direction']),
+                self._view[offset:offset + int(rec['length'])])
+
+    def select(self, port=None, direction=None, start=0, stop=None):
+        """Record numbers in [start, stop) matching port / direction"""
+        sel = self.index[start:stop]
+        mask = np.ones(len(sel), dtype=bool)
+        if port is not None:
+            mask &= sel['port'] == port
+        if direction is not None:
+            mask &= sel['direction'] == direction
+        return np.nonzero(mask)[0] + start
+
+    def records(self, port=None, direction=None, start=0, stop=None):
+        """Iterate (t_ns, port, direction, payload) over matching records"""
+        for i in self.select(port, direction, start, stop):
+            yield self[i]
+
+    def time_slice(self, t_start_ns, t_stop_ns, session=None):
+        """
+        (start, stop) record numbers covering [t_start_ns, t_stop_ns).
+
+        Args:
+            session: session number; required when the capture holds
+                more than one (timestamps of different sessions overlap)
+        """
+        if session is None:
+            if len(self.sessions) > 1:
+                raise ValueError(f"{self.path}: {len(self.sessions)} sessions (t_ns restarts), "
+                                 f"pass session= to time_slice()")
+            session = 0
+        first, last = self.session_range(session)
+        stamps = self.index['t_ns'][first:last]
+        start = int(np.searchsorted(stamps, t_start_ns, side='left'))
+        stop = int(np.searchsorted(stamps, t_stop_ns, side='left'))
+        return first + start, first + stop
+
+    def stream_bytes(self, port=None, direction=DIR_RX, start=0, stop=None):
+        """Concatenate the payloads of matching records into one bytes"""
+        return b''.join(payload for _, _, _, payload
+                        in self.records(port, direction, start, stop))
+
+    @property
+    def duration_s(self):
+        """Recorded time, summed over sessions"""
+        total = 0
+        for session in range(len(self.sessions) if len(self.index) else 0):
+            start, stop = self.session_range(session)
+            total += int(self.index['t_ns'][stop - 1]) - int(self.index['t_ns'][start])
+        return total / 1e9
+
+    def close(self):
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            pass  # Masih ada payload view yang dipegang; mmap ditutup oleh GC
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python capture_file.py <capture.rcap>")
+        return
+
+    with CaptureReader(sys.argv[1]) as reader:
+        index = reader.index
+        print("=" * 70)
+        print(f"Capture:  {reader.path}")
+        print(f"Records:  {len(reader):,}")
+        print(f"Duration: {reader.duration_s:.1f} s")
+        print(f"Sessions: {len(reader.sessions)}")
+        print("=" * 70)
+        print(f"{'Port':<8} {'Dir':<4} {'Records':>12} {'Bytes':>14}")
+        print("-" * 70)
+        for port in np.unique(index['port']):
+            for direction in (DIR_RX, DIR_TX):
+                mask = (index['port'] == port) & (index['direction'] == direction)
+                if not mask.any():
+                    continue
+                name = PORT_NAMES.get(int(port), str(port))
+                total = int(index['length'][mask].sum())
+                print(f"{name:<8} {DIRECTION_NAMES[direction]:<4} {int(mask.sum()):>12,} {total:>14,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+"""
+Capture Query - Run-Length Index over Discrete State
+====================================================
+Index dibangun sekali per capture (streaming, memori tetap), lalu query
+dijawab dari index dalam hitungan milidetik, tanpa decode ulang seluruh
+capture:
+
+    State runs   (A, B, C) di-pack jadi satu word per frame; yang
+                 disimpan hanya awal / akhir tiap run nilai yang sama
+                 (run juga diputus kalau ada gap > GAP_MS atau t_ns
+                 mundur). Flag, mode,
+                 nav dan country dievaluasi per run (vektor NumPy), jadi
+                 biaya query sebanding jumlah perubahan, bukan frame.
+    Blocks       tiap ~BLOCK_FRAMES frame: range record capture dan
+                 lompatan sudut maksimum per device (zone map). Query
+                 lompatan hanya decode ulang block yang max-nya lewat
+                 threshold.
+
+Sudut device di-decode seperti ROME_DSC1 (frame_codec.device_angles):
+raw / 10 derajat, Device 5 int16(raw) / 10 - 179.9.
+
+Capture yang di-append setelah reboot berisi beberapa session (jam
+monotonic mulai ulang): index dibangun per session, tiap run dan block
+menyimpan nomor session-nya, dan waktu dicetak relatif ke awal session
+("s1 +12.345s"). Durasi total = jumlah durasi tiap session.
+
+Index disimpan per port di <capture>.p<port>.qidx.npz (divalidasi versi,
+port, GAP_MS, BLOCK_FRAMES serta ukuran dan mtime file capture).
+
+Ekspresi --time-in / --where:
+    term   : EHSI | Mode=EHSI | Nav=TAC | Country=TNI_AU | NAV_Valid | B7
+    !term  : negasi,  a & b : AND,  a | b : OR (& lebih kuat dari |)
+Nama flag dievaluasi pakai FLAG_MAPS mode frame itu sendiri.
+
+Usage:
+    python capture_query.py soak.rcap --time-in "EHSI & !NAV_Valid"
+    python capture_query.py soak.rcap --where "Auto_Test" --list
+    python capture_query.py soak.rcap --changes Mode
+    python capture_query.py soak.rcap --jump 5:10
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from capture_file import CaptureReader, DIR_RX, PORT_RASPI
+from stream_framer import StreamFramer, DATA
+from frame_codec import decode_frames, device_angles, DATA_FRAME_LEN, MODE_NAMES, NUM_DEVICES
+from discrete_decoder import FLAG_MAPS, FIELDS, DISCRETES
+
+# ===== CONFIGURATION =====
+BLOCK_FRAMES = 8192        # Frame per block (zone map lompatan sudut)
+MAX_BLOCK_FACTOR = 4       # Potong paksa kalau framer tidak pernah kosong
+GAP_MS = 100               # Jeda antar frame lebih dari ini memutus run
+LIST_LIMIT = 50            # Interval / frame yang dicetak per query
+INDEX_VERSION = 4
+
+NS_PER_MS = 1_000_000
+NS_PER_S = 1_000_000_000
+
+
+def pack_discretes(frames):
+    """A | B << 8 | C << 16 per frame (uint32)"""
+    return (frames['discrete_a'].astype(np.uint32) | (frames['discrete_b'].astype(np.uint32) << 8)
+            | (frames['discrete_c'].astype(np.uint32) << 16))
+
+
+def angle_jump(previous, current):
+    """Absolute angle change in degrees, wrapped at 360"""
+    d = np.abs(current - previous) % 360.0
+    return np.minimum(d, 360.0 - d)
+
+
+# ===== INDEX BUILD =====
+
+class CaptureIndexBuilder:
+    """Streaming builder: feed decoded batches, memory grows with runs and blocks only"""
+
+    def __init__(self, gap_ms=GAP_MS):
+        self.gap_ns = int(gap_ms * NS_PER_MS)
+        self.frames = 0
+        self.session = 0
+        self._prev_value = None
+        self._prev_t = None
+        self._prev_angles = np.full(NUM_DEVICES, np.nan)
+
+        # Runs: list of arrays per batch (digabung di finish)
+        self._run_start, self._run_end, self._run_value, self._run_seq = [], [], [], []
+        self._run_session = []
+        # Blocks
+        self._blocks = []   # (record_start, record_stop, frame_start, frames, t_first, t_last, session)
+        self._block_jump = []
+        self._block_prev = []
+
+    def _close_run(self):
+        if self._prev_value is not None:
+            self._run_end.append(np.array([self._prev_t], dtype=np.int64))
+
+    def new_session(self, session):
+        """Capture clock restarted: close the last run, nothing carries over"""
+        self._close_run()
+        self.session = session
+        self._prev_value = None
+        self._prev_t = None
+        self._prev_angles = np.full(NUM_DEVICES, np.nan)
+
+    def add_batch(self, frames, t_ns, record_start, record_stop):
+        """
+        Args:
+            frames: FRAME_DTYPE array framed from records [record_start, record_stop)
+            t_ns: int64 array (len(frames),) record timestamp per frame
+        """
+        n = len(frames)
+        if not n:
+            return
+        values = pack_discretes(frames)
+        prev_values = np.empty_like(values)
+        prev_values[1:] = values[:-1]
+        prev_t = np.empty_like(t_ns)
+        prev_t[1:] = t_ns[:-1]
+        if self._prev_value is None:
+            prev_values[0] = values[0]
+            prev_t[0] = t_ns[0]
+        else:
+            prev_values[0] = self._prev_value
+            prev_t[0] = self._prev_t
+
+        changed = values != prev_values
+        step = t_ns - prev_t
+        gap = (step > self.gap_ns) | (step < 0)
+        breaks = changed | gap
+        if self._prev_value is None:
+            breaks[0] = True
+        starts = np.nonzero(breaks)[0]
+
+        # Tiap awal run menutup run sebelumnya: akhir = awal run baru,
+        # atau frame terakhir sebelum gap
+        ends = np.where(gap[starts], prev_t[starts], t_ns[starts])
+        if self._prev_value is None:
+            ends = ends[1:]
+        self._run_end.append(ends)
+        self._run_start.append(t_ns[starts])
+        self._run_value.append(values[starts])
+        self._run_seq.append(self.frames + starts)
+        self._run_session.append(np.full(len(starts), self.session, dtype=np.uint16))
+
+        angles = device_angles(frames)
+        previous = np.vstack([self._prev_angles, angles[:-1]])
+        jumps = np.nan_to_num(angle_jump(previous, angles), nan=0.0)
+        self._blocks.append((record_start, record_stop, self.frames, n, int(t_ns[0]), int(t_ns[-1]),
+                             self.session))
+        self._block_jump.append(jumps.max(axis=0))
+        self._block_prev.append(self._prev_angles.copy())
+
+        self.frames += n
+        self._prev_value = int(values[-1])
+        self._prev_t = int(t_ns[-1])
+        self._prev_angles = angles[-1].astype(np.float64)
+
+    def finish(self, meta):
+        """
+        Close the last run and return a CaptureIndex.
+
+        Args:
+            meta: dict of build parameters stored with the index (index_meta())
+        """
+        self._close_run()
+        self._prev_value = None
+
+        def cat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+
+        blocks = np.array(self._blocks, dtype=np.int64).reshape(-1, 7)
+        return CaptureIndex({
+            'run_start': cat(self._run_start, np.int64),
+            'run_end': cat(self._run_end, np.int64),
+            'run_value': cat(self._run_value, np.uint32),
+            'run_seq': cat(self._run_seq, np.int64),
+            'run_session': cat(self._run_session, np.uint16),
+            'blocks': blocks,
+            'block_jump': np.array(self._block_jump, dtype=np.float32).reshape(-1, NUM_DEVICES),
+            'block_prev': np.array(self._block_prev, dtype=np.float64).reshape(-1, NUM_DEVICES),
+            'frames': np.int64(self.frames),
+            **{key: np.int64(value) for key, value in meta.items()},
+        })
+
+
+def iter_batches(reader, port=PORT_RASPI, block_frames=BLOCK_FRAMES, start=0, stop=None):
+    """
+    Frame RX records of one port into batches of about block_frames.
+
+    A batch is only cut where the framer holds no partial frame, so
+    decoding the same record range again gives exactly the same frames
+    (forced after MAX_BLOCK_FACTOR * block_frames; the frame split at
+    that boundary is then missed by jumps()).
+
+    Yields:
+        (FRAME_DTYPE array, t_ns array, record_start, record_stop)
+    """
+    framer = StreamFramer((DATA,))
+    raw = bytearray()
+    stamps = []
+    batch_start = None
+    records = reader.select(port, DIR_RX, start, stop)
+    for i in records:
+        t_ns, _, _, payload = reader[i]
+        if batch_start is None:
+            batch_start = int(i)
+        framer.feed(payload)
+        count = 0
+        for _, frame in framer.frames():
+            raw += frame
+            count += 1
+        if count:
+            stamps.append(np.full(count, t_ns, dtype=np.int64))
+        size = len(raw) // DATA_FRAME_LEN
+        if size >= block_frames and (len(framer) == 0 or size >= MAX_BLOCK_FACTOR * block_frames):
+            yield decode_frames(raw, validate=False), np.concatenate(stamps), batch_start, int(i) + 1
+            raw = bytearray()
+            stamps = []
+            batch_start = None
+    if raw:
+        yield decode_frames(raw, validate=False), np.concatenate(stamps), batch_start, int(records[-1]) + 1
+
+
+def index_meta(reader, port=PORT_RASPI, block_frames=BLOCK_FRAMES, gap_ms=GAP_MS):
+    """Parameters an index was built with; a cached index is only reused if all match"""
+    st = os.stat(reader.path)
+    return {
+        'version': INDEX_VERSION,
+        'port': port,
+        'block_frames': block_frames,
+        'gap_ns': int(gap_ms * NS_PER_MS),
+        'capture_size': st.st_size,
+        'capture_mtime_ns': st.st_mtime_ns,
+    }
+
+
+def build_index(reader, port=PORT_RASPI, block_frames=BLOCK_FRAMES, gap_ms=GAP_MS):
+    """Index every session of the capture separately (framer restarts at each reboot)"""
+    builder = CaptureIndexBuilder(gap_ms)
+    for session in range(len(reader.sessions) if len(reader) else 0):
+        builder.new_session(session)
+        start, stop = reader.session_range(session)
+        for frames, t_ns, record_start, record_stop in iter_batches(reader, port, block_frames, start, stop):
+            builder.add_batch(frames, t_ns, record_start, record_stop)
+    return builder.finish(index_meta(reader, port, block_frames, gap_ms))
+
+
+def index_path(capture_path, port=PORT_RASPI):
+    return f"{capture_path}.p{port}.qidx.npz"
+
+
+def load_or_build(reader, port=PORT_RASPI, rebuild=False):
+    """(CaptureIndex, built) using <capture>.p<port>.qidx.npz when still valid"""
+    path = index_path(reader.path, port)
+    meta = index_meta(reader, port)
+    if not rebuild and os.path.exists(path):
+        with np.load(path) as cached:
+            if all(key in cached.files and int(cached[key]) == value for key, value in meta.items()):
+                return CaptureIndex({k: cached[k] for k in cached.files}), False
+    index = build_index(reader, port)
+    try:
+        np.savez(path, **index.arrays)
+    except OSError:
+        pass  # Read-only directory: index tetap dipakai di memori
+    return index, True
+
+
+# ===== QUERY =====
+
+def _flag_positions(name):
+    """{mode_code: (discrete index, bit)} for a flag name in FLAG_MAPS"""
+    positions = {}
+    for code, mode in enumerate(MODE_NAMES):
+        for k, discrete in enumerate(DISCRETES):
+            for bit, flag in FLAG_MAPS.get(mode, {}).get(discrete, {}).items():
+                if flag.lower() == name.lower():
+                    positions[code] = (k, bit)
+    return positions
+
+
+class CaptureIndex:
+    """Run-length discrete state + per-block jump zone map"""
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.run_start = arrays['run_start']
+        self.run_end = arrays['run_end']
+        self.run_value = arrays['run_value']
+        self.run_seq = arrays['run_seq']
+        self.run_session = arrays['run_session']
+        self.blocks = arrays['blocks']
+        self.block_jump = arrays['block_jump']
+        self.block_prev = arrays['block_prev']
+        self.frames = int(arrays['frames'])
+        self.port = int(arrays['port'])
+
+    @property
+    def sessions(self):
+        """Capture sessions that hold frames of this port"""
+        return np.unique(self.run_session)
+
+    def t0(self, session):
+        """First frame of a session (t_ns restarts after every reboot)"""
+        runs = np.nonzero(self.run_session == session)[0]
+        return int(self.run_start[runs[0]]) if len(runs) else 0
+
+    @property
+    def duration_ns(self):
+        """Indexed time, summed over sessions"""
+        total = 0
+        for session in self.sessions:
+            runs = np.nonzero(self.run_session == session)[0]
+            total += int(self.run_end[runs[-1]]) - int(self.run_start[runs[0]])
+        return total
+
+    def frame_session(self, seq):
+        """Session of a frame number (frames are numbered across sessions)"""
+        return int(self.run_session[np.searchsorted(self.run_seq, seq, side='right') - 1])
+
+    def field(self, label):
+        """Per-run value of Mode / Nav / Country as index codes"""
+        for discrete, shift, mask, name, names in FIELDS:
+            if name.lower() == label.lower():
+                k = DISCRETES.index(discrete)
+                return (self.run_value >> (8 * k + shift)) & mask, names
+        raise ValueError(f"Unknown field: {label} (pilih: {', '.join(f[3] for f in FIELDS)})")
+
+    def _term(self, term):
+        """Boolean per run for one expression term"""
+        term = term.strip()
+        if term.startswith('!'):
+            return ~self._term(term[1:])
+        if '=' in term:
+            label, value = (part.strip() for part in term.split('=', 1))
+            codes, names = self.field(label)
+            matches = [i for i, name in enumerate(names) if name.lower() == value.lower()]
+            if not matches:
+                raise ValueError(f"Unknown {label} value: {value}")
+            return np.isin(codes, matches)
+        if term.upper() in MODE_NAMES[:-1]:
+            return self._term(f"Mode={term}")
+        if len(term) >= 2 and term[0].upper() in DISCRETES and term[1:].isdigit():
+            k = DISCRETES.index(term[0].upper())
+            return ((self.run_value >> (8 * k + int(term[1:]))) & 1).astype(bool)
+
+        positions = _flag_positions(term)
+        if not positions:
+            raise ValueError(f"Unknown flag / term: {term}")
+        mode = self.run_value >> 8 & 0x03
+        result = np.zeros(len(self.run_value), dtype=bool)
+        for code, (k, bit) in positions.items():
+            result |= (mode == code) & (((self.run_value >> (8 * k + bit)) & 1) == 1)
+        return result
+
+    def where(self, expression):
+        """Boolean per run; '|' of '&' of (optionally negated) terms"""
+        result = np.zeros(len(self.run_value), dtype=bool)
+        for alternative in expression.split('|'):
+            part = np.ones(len(self.run_value), dtype=bool)
+            for term in alternative.split('&'):
+                part &= self._term(term)
+            result |= part
+        return result
+
+    def intervals(self, mask):
+        """Merge touching matching runs into (start_ns, end_ns, session) arrays"""
+        idx = np.nonzero(mask)[0]
+        if not len(idx):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+        starts, ends, sessions = self.run_start[idx], self.run_end[idx], self.run_session[idx]
+        # Run berurutan yang bersambung (akhir == awal berikut, session sama) digabung
+        joined = (np.diff(idx) == 1) & (ends[:-1] == starts[1:]) & (sessions[:-1] == sessions[1:])
+        first = np.concatenate([[True], ~joined])
+        last = np.concatenate([~joined, [True]])
+        return starts[first], ends[last], sessions[first]
+
+    def time_in(self, expression):
+        """(total ns, start array, end array, session array) where the expression holds"""
+        starts, ends, sessions = self.intervals(self.where(expression))
+        return int((ends - starts).sum()), starts, ends, sessions
+
+    def field_intervals(self, label):
+        """
+        Constant-value intervals of a field.
+
+        Returns:
+            (start array, end array, list of value labels, session array)
+        """
+        codes, names = self.field(label)
+        if not len(codes):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), [], np.zeros(0, dtype=np.uint16)
+        # Interval baru kalau nilai field berubah, ada gap, atau session baru
+        new = np.concatenate([[True], (codes[1:] != codes[:-1]) | (self.run_end[:-1] != self.run_start[1:])
+                              | (self.run_session[1:] != self.run_session[:-1])])
+        first = np.nonzero(new)[0]
+        last = np.concatenate([first[1:] - 1, [len(codes) - 1]])
+        return self.run_start[first], self.run_end[last], [names[c] for c in codes[first]], self.run_session[first]
+
+    def jumps(self, reader, device_id, threshold_deg):
+        """
+        Frames where a device angle changed more than threshold_deg.
+
+        Only blocks whose recorded maximum exceeds the threshold are
+        decoded again from the capture (port the index was built for).
+
+        Returns:
+            (list of (t_ns, frame_seq, from_deg, to_deg), blocks decoded)
+        """
+        col = device_id - 1
+        candidates = np.nonzero(self.block_jump[:, col] > threshold_deg)[0]
+        hits = []
+        for b in candidates:
+            record_start, record_stop, frame_start = (int(v) for v in self.blocks[b, :3])
+            for frames, t_ns, _, _ in iter_batches(reader, self.port, 1 << 62, record_start, record_stop):
+                angles = device_angles(frames)[:, col]
+                previous = np.concatenate([[self.block_prev[b, col]], angles[:-1]])
+                jump = np.nan_to_num(angle_jump(previous, angles), nan=0.0)
+                for i in np.nonzero(jump > threshold_deg)[0]:
+                    hits.append((int(t_ns[i]), frame_start + int(i), float(previous[i]), float(angles[i])))
+        return hits, len(candidates)
+
+
+# ===== CLI =====
+
+def _clock(index, t_ns, session):
+    """Time since the start of the frame's session ("s1 +1.234s" when there are several)"""
+    clock = f"+{(int(t_ns) - index.t0(session)) / NS_PER_S:.3f}s"
+    return f"s{session} {clock}" if len(index.sessions) > 1 else clock
+
+
+def _print_intervals(index, starts, ends, sessions, labels=None, limit=LIST_LIMIT):
+    for i in range(min(len(starts), limit)):
+        label = f"  {labels[i]}" if labels is not None else ""
+        print(f"   {_clock(index, starts[i], sessions[i]):>18} .. {_clock(index, ends[i], sessions[i]):>18}  "
+              f"{(ends[i] - starts[i]) / NS_PER_MS:>12,.1f} ms{label}")
+    if len(starts) > limit:
+        print(f"   ... {len(starts) - limit:,} lagi")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query discrete state and device jumps in a capture")
+    parser.add_argument('capture', help="capture file (.rcap)")
+    parser.add_argument('--port', type=int, default=PORT_RASPI, help="port tag with A5 99 frames")
+    parser.add_argument('--time-in', action='append', default=[], help="total time where EXPR holds")
+    parser.add_argument('--where', action='append', default=[], help="intervals where EXPR holds")
+    parser.add_argument('--changes', action='append', default=[], help="intervals of Mode / Nav / Country")
+    parser.add_argument('--jump', action='append', default=[], help="DEV:DEG frames with a jump > DEG")
+    parser.add_argument('--list', action='store_true', help="also list intervals for --time-in")
+    parser.add_argument('--rebuild', action='store_true', help="ignore the cached .p<port>.qidx.npz")
+    args = parser.parse_args()
+
+    with CaptureReader(args.capture) as reader:
+        t0 = time.perf_counter()
+        index, built = load_or_build(reader, args.port, args.rebuild)
+        elapsed = time.perf_counter() - t0
+        print("=" * 90)
+        print(f"Capture: {args.capture} | {index.frames:,} frames, {index.duration_ns / NS_PER_S:,.1f}s | "
+              f"{len(index.run_start):,} runs, {len(index.blocks):,} blocks"
+              + (f", {len(index.sessions)} sessions" if len(index.sessions) > 1 else ""))
+        print(f"Index {'built' if built else 'loaded'} in {elapsed * 1000:,.1f} ms")
+        print("=" * 90)
+
+        try:
+            for expression in args.time_in:
+                t0 = time.perf_counter()
+                total, starts, ends, sessions = index.time_in(expression)
+                query_ms = (time.perf_counter() - t0) * 1000
+                share = total / index.duration_ns * 100 if index.duration_ns else 0.0
+                print(f"\n⏱️  time in [{expression}]: {total / NS_PER_S:,.3f}s ({share:.2f}%), "
+                      f"{len(starts):,} intervals  [{query_ms:.2f} ms]")
+                if args.list:
+                    _print_intervals(index, starts, ends, sessions)
+
+            for expression in args.where:
+                t0 = time.perf_counter()
+                starts, ends, sessions = index.intervals(index.where(expression))
+                query_ms = (time.perf_counter() - t0) * 1000
+                print(f"\n🔎 where [{expression}]: {len(starts):,} intervals  [{query_ms:.2f} ms]")
+                _print_intervals(index, starts, ends, sessions)
+
+            for label in args.changes:
+                t0 = time.perf_counter()
+                starts, ends, labels, sessions = index.field_intervals(label)
+                query_ms = (time.perf_counter() - t0) * 1000
+                changes = sum(1 for i in range(1, len(labels))
+                              if labels[i] != labels[i - 1] and sessions[i] == sessions[i - 1])
+                print(f"\n🔁 {label}: {changes:,} changes, {len(starts):,} intervals  [{query_ms:.2f} ms]")
+                _print_intervals(index, starts, ends, sessions, labels)
+
+            for spec in args.jump:
+                device, threshold = spec.split(':')
+                t0 = time.perf_counter()
+                hits, decoded = index.jumps(reader, int(device), float(threshold))
+                query_ms = (time.perf_counter() - t0) * 1000
+                print(f"\n📈 Device {device} jump > {float(threshold):g} deg: {len(hits):,} frames "
+                      f"(decoded {decoded}/{len(index.blocks)} blocks)  [{query_ms:.2f} ms]")
+                for t_ns, seq, before, after in hits[:LIST_LIMIT]:
+                    print(f"   {_clock(index, t_ns, index.frame_session(seq)):>18}  frame {seq:>12,}  {before:7.1f} -> {after:7.1f} deg")
+                if len(hits) > LIST_LIMIT:
+                    print(f"   ... {len(hits) - LIST_LIMIT:,} lagi")
+
+        except ValueError as e:
+            raise SystemExit(f"Query error: {e}")
+
+if __name__ == "__main__":
+    main()
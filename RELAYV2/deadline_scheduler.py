@@ -0,0 +1,173 @@
+"""
+Deadline Scheduler - Drift-Free Periodic Send
+=============================================
+Pengganti pola "kirim -> print -> time.sleep(INTERVAL)". Dengan pola itu
+waktu print + overshoot sleep ikut terakumulasi, jadi rate asli selalu
+di bawah nominal (200 Hz jadi ~150-180 Hz, lebih parah di Windows).
+
+Scheduler ini pakai deadline absolut dari time.perf_counter_ns():
+    deadline[n] = t0 + n * period
+Keterlambatan satu tick tidak menggeser tick berikutnya. Sleep berhenti
+SPIN_US sebelum deadline, sisanya busy-wait, supaya jitter sleep OS
+(~1 ms Linux, ~1-15 ms Windows) tidak masuk ke jadwal kirim.
+
+Kalau tertinggal lebih dari max_behind tick (mis. laptop suspend),
+tick yang lewat di-skip dan dihitung sebagai 'skipped', bukan dikirim
+borongan.
+
+Usage (self-test tanpa serial):
+    python deadline_scheduler.py --rate 200 --duration 5
+    python deadline_scheduler.py --rate 1000 --spin 500
+"""
+
+import argparse
+import time
+
+from latency_histogram import LatencyHistogram, PERCENTILES
+
+# ===== CONFIGURATION =====
+DEFAULT_SPIN_US = 300      # Busy-wait sebelum deadline (0 = sleep saja)
+DEFAULT_MAX_BEHIND = 50    # Tick tertinggal sebelum skip
+
+NS_PER_US = 1_000
+NS_PER_S = 1_000_000_000
+
+
+class DeadlineScheduler:
+    """Absolute-deadline periodic scheduler with optional spin-wait"""
+
+    def __init__(self, rate_hz, spin_us=DEFAULT_SPIN_US, max_behind=DEFAULT_MAX_BEHIND):
+        """
+        Args:
+            rate_hz: target tick rate (e.g. 200, 500, 1000)
+            spin_us: busy-wait window before each deadline
+            max_behind: skip ahead when this many ticks late
+        """
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be > 0")
+        self.rate_hz = rate_hz
+        self.period_ns = round(NS_PER_S / rate_hz)
+        self.spin_ns = int(spin_us * NS_PER_US)
+        self.max_behind = max_behind
+
+        self._t0 = None
+        self._tick = 0
+
+        # Statistics
+        self.ticks = 0
+        self.skipped = 0
+        self.lateness = LatencyHistogram()  # ns, memori tetap untuk soak test panjang
+        self._first_ns = None
+        self._last_ns = None
+
+    def start(self, t0_ns=None):
+        """Anchor tick 0 at t0_ns (default: now)"""
+        self._t0 = time.perf_counter_ns() if t0_ns is None else t0_ns
+        self._tick = 0
+
+    @property
+    def next_deadline_ns(self):
+        return self._t0 + self._tick * self.period_ns
+
+    def wait(self):
+        """
+        Block until the next deadline, then advance the schedule.
+
+        Returns:
+            lateness in ns of this tick (0 if exactly on time)
+        """
+        if self._t0 is None:
+            self.start()
+
+        deadline = self.next_deadline_ns
+        now = time.perf_counter_ns()
+
+        if now - deadline > self.max_behind * self.period_ns:
+            # Tertinggal jauh: lompat ke tick sekarang, jangan kirim borongan
+            behind = (now - deadline) // self.period_ns
+            self.skipped += behind
+            self._tick += behind
+            deadline = self.next_deadline_ns
+
+        remaining = deadline - now
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / NS_PER_S)
+        now = time.perf_counter_ns()
+        while now < deadline:
+            now = time.perf_counter_ns()
+
+        late = now - deadline
+        self._record(now, late)
+        self._tick += 1
+        return late
+
+    def _record(self, now, late):
+        self.ticks += 1
+        if self._first_ns is None:
+            self._first_ns = now
+        self._last_ns = now
+        self.lateness.record(late)
+
+    def run(self, callback, count=None, duration_s=None):
+        """
+        Call callback(tick) at every deadline.
+
+        Stops after `count` ticks, `duration_s` seconds, or when the
+        callback returns False.
+        """
+        self.start()
+        end_ns = None if duration_s is None else self._t0 + int(duration_s * NS_PER_S)
+        while count is None or self.ticks < count:
+            if end_ns is not None and self.next_deadline_ns >= end_ns:
+                break
+            self.wait()
+            if callback(self.ticks - 1) is False:
+                break
+
+    def stats(self):
+        """Achieved rate and lateness percentiles (microseconds)"""
+        elapsed = (self._last_ns - self._first_ns) if self.ticks > 1 else 0
+        achieved = (self.ticks - 1) * NS_PER_S / elapsed if elapsed else 0.0
+        result = {
+            'target_hz': self.rate_hz,
+            'achieved_hz': achieved,
+            'ticks': self.ticks,
+            'skipped': self.skipped,
+            'max_late_us': (self.lateness.max or 0) / NS_PER_US,
+        }
+        if self.lateness.count:
+            for p, v in zip(PERCENTILES, self.lateness.percentiles()):
+                result[f'p{p:g}_late_us'] = v / NS_PER_US
+        return result
+
+
+def format_stats(stats):
+    """One-block text report of DeadlineScheduler.stats()"""
+    lines = [
+        f"Target rate:   {stats['target_hz']:.1f} Hz",
+        f"Achieved rate: {stats['achieved_hz']:.2f} Hz ({stats['ticks']:,} ticks, {stats['skipped']:,} skipped)",
+    ]
+    if 'p50_late_us' in stats:
+        lines.append("Lateness:      " + "  ".join(
+            f"p{p:g} {stats[f'p{p:g}_late_us']:.0f}" for p in PERCENTILES
+        ) + f"  max {stats['max_late_us']:.0f} us")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deadline scheduler self-test (no serial port)")
+    parser.add_argument('--rate', type=float, action='append', help="tick rate in Hz (repeatable)")
+    parser.add_argument('--duration', type=float, default=3.0, help="seconds per rate")
+    parser.add_argument('--spin', type=float, default=DEFAULT_SPIN_US, help="spin-wait window (us)")
+    args = parser.parse_args()
+
+    for rate in args.rate or (200, 500, 1000):
+        scheduler = DeadlineScheduler(rate, spin_us=args.spin)
+        scheduler.run(lambda tick: None, duration_s=args.duration)
+        print("=" * 70)
+        print(format_stats(scheduler.stats()))
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Discrete A/B/C Decoder (Lookup Table)
+=====================================
+Bit mapping Discrete A, B, C per mode (EADI, EHSI, RDU) dikompilasi
+sekali saat import menjadi tabel 256 entry per byte, jadi decode
+cukup index tabel, tidak ada lagi rantai `if discrete_a & (1 << n)`.
+
+Hasil decode lengkap di-cache per (A, B, C) karena traffic asli
+mengulang state discrete yang sama dalam waktu lama.
+
+TransitionDetector: XOR (A, B, C) tiap frame dengan frame sebelumnya
+dan keluarkan event hanya untuk bit yang berubah, jadi pulsa pendek
+(marker beacon, Auto_Test) tidak hilang di antara snapshot. Batch
+frame dibandingkan sekaligus dengan NumPy; kerja Python hanya untuk
+frame yang berubah.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from frame_codec import MODE_NAMES, NAV_SOURCE_NAMES
+
+# ===== BIT MAPPING PER MODE =====
+# {bit: flag_name}
+FLAG_MAPS = {
+    'EADI': {
+        'A': {0: "GS_Valid", 1: "Gyro_Mon", 2: "FD_Valid", 3: "ROT_Valid",
+              4: "NVIS_Sel", 5: "DH_Input"},
+        'B': {4: "Auto_Test", 5: "LAT/BAR_View", 6: "ILS_Freq_Tuned",
+              7: "NAV_Super_Flag"},
+        'C': {2: "Radio_Alt_Mon", 3: "REV_Mode", 4: "Inner_Marker",
+              5: "Outer_Marker", 6: "Middle_Marker"},
+    },
+    'EHSI': {
+        'A': {0: "GS_Valid", 1: "TRUE/MAG", 2: "FMS_Decimal", 3: "WP_Alert",
+              4: "NVIS_Sel"},
+        'B': {4: "Auto_Test", 5: "Heading_Mon", 6: "ILS_Freq_Tuned",
+              7: "NAV_Valid"},
+        'C': {3: "Back_Loc_Sense", 5: "VHF_NAV_Config"},
+    },
+    'RDU': {
+        'A': {4: "NVIS_Sel", 6: "Video_Radar_ON"},
+        'B': {},  # No specific flags for RDU
+        'C': {},  # No specific flags for RDU
+    },
+}
+
+# Country di monitor discrete hanya kenal TNI_AU & Bangladesh
+COUNTRY_LABELS = ("TNI_AU", "Bangladesh", "Unknown", "Unknown")
+
+DISCRETES = ('A', 'B', 'C')
+
+
+def _build_table(bit_map):
+    """256-entry tuple: byte value -> joined flag string"""
+    table = []
+    for value in range(256):
+        flags = [name for bit, name in sorted(bit_map.items()) if value & (1 << bit)]
+        table.append(', '.join(flags) if flags else 'None')
+    return tuple(table)
+
+
+# FLAG_TABLES[mode_code] = (table_A, table_B, table_C)
+_UNKNOWN_TABLE = ('Unknown',) * 256
+FLAG_TABLES = tuple(
+    tuple(_build_table(FLAG_MAPS[mode][d]) for d in DISCRETES)
+    if mode in FLAG_MAPS else (_UNKNOWN_TABLE,) * 3
+    for mode in MODE_NAMES
+)
+
+
+@lru_cache(maxsize=4096)
+def decode_packet(discrete_a, discrete_b, discrete_c):
+    """
+    Decode full packet based on mode.
+
+    Returns:
+        dict with mode, nav_source, country, flags_a, flags_b, flags_c.
+        Dict ini di-share oleh cache, jangan dimodifikasi.
+    """
+    mode_code = discrete_b & 0x03
+    table_a, table_b, table_c = FLAG_TABLES[mode_code]
+    return {
+        'mode': MODE_NAMES[mode_code],
+        'nav_source': NAV_SOURCE_NAMES[(discrete_b >> 2) & 0x03],
+        'country': COUNTRY_LABELS[discrete_c & 0x03],
+        'flags_a': table_a[discrete_a],
+        'flags_b': table_b[discrete_b],
+        'flags_c': table_c[discrete_c],
+    }
+
+
+# ===== TRANSITION EVENTS =====
+
+# Field multi-bit: (discrete, shift, mask, label, names) -> satu event per perubahan nilai
+FIELDS = (
+    ('B', 0, 0x03, 'Mode', MODE_NAMES),
+    ('B', 2, 0x03, 'Nav', NAV_SOURCE_NAMES),
+    ('C', 0, 0x03, 'Country', COUNTRY_LABELS),
+)
+_FIELD_BITS = {d: sum(mask << shift for dd, shift, mask, _, _ in FIELDS if dd == d) for d in DISCRETES}
+
+DiscreteEvent = namedtuple('DiscreteEvent', 't_ns seq discrete bit name state mode duration_ns')
+DiscreteEvent.__doc__ = """
+One discrete change.
+
+    bit          bit number, or None for a multi-bit field (Mode / Nav / Country)
+    name         flag name in the frame's mode, '(unmapped)' if none
+    state        True / False for a flag, new field label for a field
+    duration_ns  how long a flag was ON (falling edge only), else None
+"""
+
+
+def _bit_name(discrete, bit, mode, previous_mode):
+    """Flag name in the current mode, falling back to the previous one"""
+    for m in (mode, previous_mode):
+        name = FLAG_MAPS.get(m, {}).get(discrete, {}).get(bit)
+        if name:
+            return name
+    return "(unmapped)"
+
+
+class TransitionDetector:
+    """Emit timestamped events for every flipped bit of Discrete A/B/C"""
+
+    def __init__(self):
+        self.state = None        # (A, B, C) terakhir
+        self._rise_ns = {}       # (discrete, bit) -> t_ns saat ON
+
+        # Statistics
+        self.frames = 0
+        self.changed_frames = 0
+        self.events = 0
+
+    def feed_frames(self, discretes, t_ns, first_seq=0):
+        """
+        Compare a batch of frames with the previous state.
+
+        Args:
+            discretes: uint8 array (N, 3) of A, B, C
+            t_ns: int array (N,) receive timestamps
+            first_seq: sequence number of the first frame
+
+        Returns:
+            list of DiscreteEvent in frame order
+        """
+        discretes = np.asarray(discretes, dtype=np.uint8).reshape(-1, 3)
+        if not len(discretes):
+            return []
+        packed = (discretes[:, 0].astype(np.uint32) | (discretes[:, 1].astype(np.uint32) << 8)
+                  | (discretes[:, 2].astype(np.uint32) << 16))
+        previous = np.empty_like(packed)
+        previous[1:] = packed[:-1]
+        previous[0] = packed[0] if self.state is None else (
+            self.state[0] | (self.state[1] << 8) | (self.state[2] << 16))
+        changed = np.nonzero(packed ^ previous)[0]
+
+        events = []
+        for i in changed:
+            events += self._diff(int(previous[i]), int(packed[i]), int(t_ns[i]), first_seq + int(i))
+        self.frames += len(discretes)
+        self.changed_frames += len(changed)
+        self.events += len(events)
+        last = int(packed[-1])
+        self.state = (last & 0xFF, (last >> 8) & 0xFF, last >> 16)
+        return events
+
+    def feed(self, discrete_a, discrete_b, discrete_c, t_ns, seq=0):
+        """Single-frame version of feed_frames()"""
+        return self.feed_frames(np.array([[discrete_a, discrete_b, discrete_c]]), np.array([t_ns]), seq)
+
+    def _diff(self, old, new, t_ns, seq):
+        events = []
+        mode = MODE_NAMES[(new >> 8) & 0x03]
+        previous_mode = MODE_NAMES[(old >> 8) & 0x03]
+        flipped = old ^ new
+        for k, discrete in enumerate(DISCRETES):
+            shift = 8 * k
+            diff = (flipped >> shift) & 0xFF
+            if not diff:
+                continue
+            value = (new >> shift) & 0xFF
+            for d, field_shift, mask, label, names in FIELDS:
+                if d == discrete and diff & (mask << field_shift):
+                    events.append(DiscreteEvent(t_ns, seq, discrete, None, label,
+                                                names[(value >> field_shift) & mask], mode, None))
+            bits = diff & ~_FIELD_BITS[discrete]
+            while bits:
+                bit = (bits & -bits).bit_length() - 1
+                bits &= bits - 1
+                on = bool(value & (1 << bit))
+                duration = None
+                if on:
+                    self._rise_ns[(discrete, bit)] = t_ns
+                else:
+                    rise = self._rise_ns.pop((discrete, bit), None)
+                    duration = None if rise is None else t_ns - rise
+                events.append(DiscreteEvent(t_ns, seq, discrete, bit,
+                                            _bit_name(discrete, bit, mode, previous_mode), on, mode, duration))
+        return events
+
+
+def format_event(event, clock):
+    """One text line; clock(t_ns) formats the timestamp"""
+    if event.bit is None:
+        return f"{clock(event.t_ns):<12} {event.discrete}     {event.name:<18} -> {event.state}"
+    state = "ON " if event.state else "OFF"
+    pulse = f"  (ON {event.duration_ns / 1e6:.1f} ms)" if event.duration_ns is not None else ""
+    return (f"{clock(event.t_ns):<12} {event.discrete}{event.bit:<4} {event.name:<18} {state} "
+            f"[{event.mode}]{pulse}")
@@ -0,0 +1,531 @@
+"""
+RELAYV2 Firmware Model (Host Emulator)
+======================================
+Model Python dari data path firmware RELAYV2 (RELAY/Core/Src/raspi.c,
+DI.c, relay.c), dijalankan di PC dan diekspos lewat Linux pseudo-terminal
+(pty) supaya simulate_raspberry_pi.py dan monitor bisa dipakai tanpa
+board di meja.
+
+Yang dimodelkan persis seperti firmware:
+- USART1 RX ISR -> ring buffer 256 byte (byte dibuang kalau penuh)
+- Process_RX_Buffer(): sliding window 20 byte, STATUS [99 A5 val]
+  (3 byte) dan DATA [A5 99 + 13 byte] (15 byte), garbage collection
+  cari header berikutnya saat window penuh
+- Parse_Data_Packet(): Relay_Update(mask A|B<<8|C<<16) + 5x Queue_ROME
+- Queue_ROME(): ring 16 entry (15 terpakai), packet dibuang diam-diam
+  kalau penuh; Process_ROME_Queue() kirim 1 paket 4 byte per TX IT
+- Relay_Update(): inversi active-low dan mapping BSRR ke PC/PD/PA
+- Value_Discrete(): Send_RASPI [99 A5 PB15] tiap 5 ms (200 Hz) dan
+  Send_NANO [AA 01 04 D2] tiap 300 ms, timer HAL_GetTick() 1 ms dengan
+  last_tx = tick saat kirim (tidak catch-up)
+
+Waktu dimodelkan di "virtual clock" (ns) dengan timing wire UART
+(10 bit per byte), main loop dianggap jalan terus tanpa blocking
+(main_loop_us > 0 untuk model satu pass while(1) yang makan waktu:
+pass jalan back-to-back di grid k * main_loop_us, ISR tetap real-time).
+
+pty yang dibuat:
+    RASPI  : sisi Raspberry Pi (tulis A5 99 / 99 A5, baca status 99 A5)
+    SNIFF  : copy byte uplink (seperti sniff PA10) untuk monitor_*.py
+    ROME   : output USART2 [BB ID MSB LSB]
+    NANO   : output USART3 [AA 01 04 D2]
+
+Usage (Linux): python firmware_model.py
+"""
+
+import os
+import select
+import time
+from collections import deque
+
+# ===== CONFIGURATION =====
+BAUD_RATE = 115200
+STATS_INTERVAL = 5  # seconds - print statistik tiap N detik
+PB15_PRESSED = False  # State tombol PB15 (DI.c MODE_BUTTON)
+
+# ===== FIRMWARE CONSTANTS (raspi.c / DI.c) =====
+RX_BUF_SIZE = 256
+PKT_BUF_SIZE = 20
+ROME_QUEUE_SIZE = 16
+ROME_PACKET_LEN = 4
+STATUS_PERIOD_MS = 5
+NANO_PERIOD_MS = 300
+NANO_PACKET = bytes([0xAA, 0x01, 0x04, 0xD2])
+NUM_RELAYS = 24
+
+NS_PER_MS = 1_000_000
+NS_PER_S = 1_000_000_000
+
+
+def byte_time_ns(baud):
+    """Wire time of one 8N1 byte (start + 8 data + stop)"""
+    return 10 * NS_PER_S // baud
+
+
+class RelayFirmwareModel:
+    """Discrete-time model of the RELAYV2 UART data path"""
+
+    def __init__(self, baud=BAUD_RATE, pb15_pressed=PB15_PRESSED,
+                 on_raspi_tx=None, on_rome_tx=None, on_nano_tx=None, main_loop_us=0):
+        """
+        Args:
+            baud: baud rate of USART1/2/3
+            pb15_pressed: DI input state reported in the status stream
+            main_loop_us: time one while(1) pass is busy (0 = instant)
+            on_*_tx: callback(t_ns, bytes) when a UART finishes sending
+        """
+        self.baud = baud
+        self.byte_ns = byte_time_ns(baud)
+        self.pb15_pressed = pb15_pressed
+        self.on_raspi_tx = on_raspi_tx
+        self.on_rome_tx = on_rome_tx
+        self.on_nano_tx = on_nano_tx
+
+        self.now_ns = 0
+        self.main_loop_ns = int(main_loop_us * 1000)
+        self._next_loop_ns = 0
+
+        # USART1 RX ring buffer
+        self.rx_buffer = bytearray(RX_BUF_SIZE)
+        self.rx_head = 0
+        self.rx_tail = 0
+        self._rx_arrivals = deque()  # (t_ns, byte) belum masuk ISR
+        self._rx_wire_free_ns = 0
+
+        # Process_RX_Buffer() static state
+        self.pkt_buf = bytearray(PKT_BUF_SIZE)
+        self.pkt_idx = 0
+
+        # ROME TX queue
+        self.rome_tx_queue = [bytes(ROME_PACKET_LEN)] * ROME_QUEUE_SIZE
+        self.rome_queue_head = 0
+        self.rome_queue_tail = 0
+        self.rome_tx_busy = False
+        self._rome_tx_done_ns = None
+
+        # USART1 / USART3 TX (HAL_BUSY kalau masih kirim)
+        self._raspi_tx_done_ns = 0
+        self._nano_tx_done_ns = 0
+
+        # Value_Discrete() static last_tx / last_tx1 (HAL_GetTick ms)
+        self._last_status_tick = 0
+        self._last_nano_tick = 0
+
+        # GPIO output data registers (BSRR result)
+        self.gpio_odr = {'C': 0xFFFF, 'D': 0xFFFF, 'A': 0xFFFF}
+        self.relay_mask = 0
+
+        # Statistics
+        self.rx_bytes = 0
+        self.rx_dropped = 0
+        self.rx_ring_max = 0
+        self.status_packets = 0
+        self.data_packets = 0
+        self.gc_shifts = 0
+        self.gc_flushes = 0
+        self.relay_updates = 0
+        self.rome_enqueued = 0
+        self.rome_dropped = 0
+        self.rome_dropped_by_device = [0] * 6
+        self.rome_sent = 0
+        self.rome_queue_max = 0
+        self._rome_occupancy_area = 0  # integral occupancy * ns
+        self._rome_occupancy_since = 0
+        self.raspi_tx_sent = 0
+        self.raspi_tx_busy = 0
+        self.nano_tx_sent = 0
+
+    # ===== RING / QUEUE OCCUPANCY =====
+
+    @property
+    def rx_ring_used(self):
+        return (self.rx_head - self.rx_tail) % RX_BUF_SIZE
+
+    @property
+    def rome_queue_used(self):
+        return (self.rome_queue_head - self.rome_queue_tail) % ROME_QUEUE_SIZE
+
+    def _account_rome_occupancy(self):
+        self._rome_occupancy_area += self.rome_queue_used * (self.now_ns - self._rome_occupancy_since)
+        self._rome_occupancy_since = self.now_ns
+
+    # ===== HOST SIDE INPUT =====
+
+    def receive(self, data, t_ns=None):
+        """
+        Bytes arriving on USART1 RX starting at t_ns.
+
+        Byte di-schedule dengan kecepatan wire, jadi burst besar dari
+        host masuk ke ISR satu per satu seperti di hardware.
+        """
+        if t_ns is None:
+            t_ns = self.now_ns
+        t = max(t_ns, self._rx_wire_free_ns)
+        for byte in data:
+            t += self.byte_ns
+            self._rx_arrivals.append((t, byte))
+        self._rx_wire_free_ns = t
+
+    # ===== ISR / CALLBACKS =====
+
+    def _rx_isr(self, byte):
+        """HAL_UART_RxCpltCallback (USART1)"""
+        self.rx_bytes += 1
+        next_head = (self.rx_head + 1) % RX_BUF_SIZE
+        if next_head != self.rx_tail:
+            self.rx_buffer[self.rx_head] = byte
+            self.rx_head = next_head
+            self.rx_ring_max = max(self.rx_ring_max, self.rx_ring_used)
+        else:
+            # Buffer full! Drop byte
+            self.rx_dropped += 1
+
+    def _rome_tx_complete(self):
+        """HAL_UART_TxCpltCallback (USART2)"""
+        packet = self.rome_tx_queue[self.rome_queue_tail]
+        self._account_rome_occupancy()
+        self.rome_queue_tail = (self.rome_queue_tail + 1) % ROME_QUEUE_SIZE
+        self.rome_tx_busy = False
+        self._rome_tx_done_ns = None
+        self.rome_sent += 1
+        if self.on_rome_tx:
+            self.on_rome_tx(self.now_ns, packet)
+
+    # ===== TRANSMIT =====
+
+    def _send_raspi(self, data):
+        """Send_RASPI: HAL_UART_Transmit_IT on USART1"""
+        if self.now_ns < self._raspi_tx_done_ns:
+            self.raspi_tx_busy += 1  # HAL_BUSY, paket hilang
+            return
+        self._raspi_tx_done_ns = self.now_ns + len(data) * self.byte_ns
+        self.raspi_tx_sent += 1
+        if self.on_raspi_tx:
+            self.on_raspi_tx(self._raspi_tx_done_ns, data)
+
+    def _send_nano(self, data):
+        """Send_NANO: HAL_UART_Transmit_IT on USART3"""
+        if self.now_ns < self._nano_tx_done_ns:
+            return
+        self._nano_tx_done_ns = self.now_ns + len(data) * self.byte_ns
+        self.nano_tx_sent += 1
+        if self.on_nano_tx:
+            self.on_nano_tx(self._nano_tx_done_ns, data)
+
+    def queue_rome(self, id_device, data1, data2):
+        """Queue_ROME: drop silently if the ring is full"""
+        next_head = (self.rome_queue_head + 1) % ROME_QUEUE_SIZE
+        if next_head == self.rome_queue_tail:
+            self.rome_dropped += 1
+            self.rome_dropped_by_device[id_device] += 1
+            return
+        self._account_rome_occupancy()
+        self.rome_tx_queue[self.rome_queue_head] = bytes([0xBB, id_device, data1, data2])
+        self.rome_queue_head = next_head
+        self.rome_enqueued += 1
+        self.rome_queue_max = max(self.rome_queue_max, self.rome_queue_used)
+
+    def process_rome_queue(self):
+        """Process_ROME_Queue: start one 4-byte TX if idle"""
+        if self.rome_tx_busy:
+            return
+        if self.rome_queue_tail != self.rome_queue_head:
+            self.rome_tx_busy = True
+            self._rome_tx_done_ns = self.now_ns + ROME_PACKET_LEN * self.byte_ns
+
+    # ===== RELAY =====
+
+    def relay_update(self, relay_mask):
+        """Relay_Update: active-low inversion and BSRR writes"""
+        self.relay_updates += 1
+        self.relay_mask = relay_mask & 0xFFFFFFFF
+        relay_mask = ~relay_mask & 0xFFFFFFFF
+
+        def bsrr(port, set_bits, reset_bits):
+            self.gpio_odr[port] = (self.gpio_odr[port] & ~reset_bits & 0xFFFF) | set_bits
+
+        # PC0-PC15 (Relay 1-16)
+        bsrr('C', relay_mask & 0xFFFF, ~relay_mask & 0xFFFF)
+        # PD0-PD3 (Relay 17-20)
+        bsrr('D', (relay_mask >> 16) & 0x000F, (~relay_mask >> 16) & 0x000F)
+        # PA4-PA7 (Relay 20-23)
+        bsrr('A', ((relay_mask >> 20) & 0x000F) << 4, ((~relay_mask >> 20) & 0x000F) << 4)
+
+    def relay_outputs(self):
+        """24 booleans: True = relay energised (pin driven LOW)"""
+        pins = [('C', i) for i in range(16)] + [('D', i) for i in range(4)] + [('A', i) for i in range(4, 8)]
+        return [not (self.gpio_odr[port] >> pin) & 1 for port, pin in pins]
+
+    # ===== PACKET PROCESSING (raspi.c) =====
+
+    def _parse_status_packet(self, data):
+        self.status_packets += 1
+        self.relay_update(data[2])
+
+    def _parse_data_packet(self, data):
+        self.data_packets += 1
+        payload = data[2:15]
+        relay_mask = payload[0] | (payload[1] << 8) | (payload[2] << 16)
+        self.relay_update(relay_mask)
+        for i in range(5):
+            self.queue_rome(i + 1, payload[3 + i * 2], payload[4 + i * 2])
+
+    def process_rx_buffer(self):
+        """Process_RX_Buffer: byte-for-byte port of the firmware parser"""
+        pkt_buf = self.pkt_buf
+        while self.rx_tail != self.rx_head:
+            byte = self.rx_buffer[self.rx_tail]
+            self.rx_tail = (self.rx_tail + 1) % RX_BUF_SIZE
+
+            if self.pkt_idx < PKT_BUF_SIZE:
+                pkt_buf[self.pkt_idx] = byte
+                self.pkt_idx += 1
+
+            if self.pkt_idx >= 3:
+                if pkt_buf[0] == 0x99 and pkt_buf[1] == 0xA5:
+                    self._parse_status_packet(pkt_buf)
+                    self.pkt_idx = 0
+                    continue
+
+            if self.pkt_idx >= 15:
+                if pkt_buf[0] == 0xA5 and pkt_buf[1] == 0x99:
+                    self._parse_data_packet(pkt_buf)
+                    self.pkt_idx = 0
+                    continue
+
+            # Garbage Collection / Sliding Window
+            if self.pkt_idx >= PKT_BUF_SIZE:
+                found = False
+                for i in range(1, self.pkt_idx - 1):
+                    if ((pkt_buf[i] == 0x99 and pkt_buf[i + 1] == 0xA5) or
+                            (pkt_buf[i] == 0xA5 and pkt_buf[i + 1] == 0x99)):
+                        pkt_buf[:self.pkt_idx - i] = pkt_buf[i:self.pkt_idx]
+                        self.pkt_idx -= i
+                        found = True
+                        self.gc_shifts += 1
+                        break
+                if not found:
+                    self.pkt_idx = 0
+                    self.gc_flushes += 1
+
+    @property
+    def tick_ms(self):
+        """HAL_GetTick(): 1 ms SysTick counter"""
+        return self.now_ns // NS_PER_MS
+
+    def _value_discrete(self):
+        """
+        Value_Discrete: 200 Hz status and 300 ms Nano packet.
+
+        Sama dengan DI.c: last_tx = HAL_GetTick() saat kirim, jadi timer
+        tidak mengejar. Main loop yang lambat menurunkan rate status.
+        """
+        tick = self.tick_ms
+        if tick - self._last_status_tick >= STATUS_PERIOD_MS:
+            self._last_status_tick = tick
+            value_pb15 = 0x00 if self.pb15_pressed else 0x01
+            self._send_raspi(bytes([0x99, 0xA5, value_pb15]))
+        if tick - self._last_nano_tick >= NANO_PERIOD_MS:
+            self._last_nano_tick = tick
+            self._send_nano(NANO_PACKET)
+
+    def main_loop(self):
+        """One pass of while(1): Tx_Raspy(); Value_Discrete();"""
+        self.process_rx_buffer()
+        self.process_rome_queue()
+        self._value_discrete()
+
+    # ===== VIRTUAL TIME =====
+
+    def _loop_start_ns(self, t_ns):
+        """
+        Start of the first while(1) pass that sees an event at t_ns.
+
+        Dengan main_loop_us > 0 pass jalan back-to-back di grid
+        k * main_loop_ns; event di antara grid baru dilihat pass berikutnya.
+        """
+        loop_ns = self.main_loop_ns
+        if not loop_ns:
+            return max(t_ns, self._next_loop_ns)
+        return max(-(-t_ns // loop_ns) * loop_ns, self._next_loop_ns)
+
+    def next_event_ns(self):
+        """Time of the next internal event"""
+        # Timer Value_Discrete() baru jalan di pass main loop berikutnya
+        next_status_ns = (self._last_status_tick + STATUS_PERIOD_MS) * NS_PER_MS
+        next_nano_ns = (self._last_nano_tick + NANO_PERIOD_MS) * NS_PER_MS
+        candidates = [self._loop_start_ns(next_status_ns), self._loop_start_ns(next_nano_ns)]
+        if self._rx_arrivals:
+            candidates.append(self._rx_arrivals[0][0])
+        if self._rome_tx_done_ns is not None:
+            candidates.append(self._rome_tx_done_ns)
+        if self.main_loop_ns and (self.rx_ring_used or (not self.rome_tx_busy and self.rome_queue_used)):
+            candidates.append(self._loop_start_ns(self.now_ns))
+        return min(candidates)
+
+    def run_until(self, t_ns):
+        """Advance the virtual clock to t_ns, processing every event"""
+        arrivals = self._rx_arrivals
+        loop_ns = self.main_loop_ns
+        while True:
+            t_next = self.next_event_ns()
+            if t_next > t_ns:
+                break
+            self.now_ns = max(self.now_ns, t_next)
+
+            while arrivals and arrivals[0][0] <= self.now_ns:
+                self._rx_isr(arrivals.popleft()[1])
+            if self._rome_tx_done_ns is not None and self._rome_tx_done_ns <= self.now_ns:
+                self._rome_tx_complete()
+
+            if self.now_ns >= self._next_loop_ns and (not loop_ns or self.now_ns % loop_ns == 0):
+                self.main_loop()
+                self._next_loop_ns = self.now_ns + loop_ns
+        self.now_ns = max(self.now_ns, t_ns)
+
+    def stats(self):
+        """Snapshot of counters as a dict"""
+        self._account_rome_occupancy()
+        elapsed = self.now_ns or 1
+        return {
+            't_s': self.now_ns / NS_PER_S,
+            'rx_bytes': self.rx_bytes,
+            'rx_dropped': self.rx_dropped,
+            'rx_ring_max': self.rx_ring_max,
+            'status_packets': self.status_packets,
+            'data_packets': self.data_packets,
+            'gc_shifts': self.gc_shifts,
+            'gc_flushes': self.gc_flushes,
+            'rome_enqueued': self.rome_enqueued,
+            'rome_dropped': self.rome_dropped,
+            'rome_dropped_by_device': self.rome_dropped_by_device[1:],
+            'rome_sent': self.rome_sent,
+            'rome_queue_max': self.rome_queue_max,
+            'rome_queue_avg': self._rome_occupancy_area / elapsed,
+            'raspi_tx_sent': self.raspi_tx_sent,
+            'raspi_tx_busy': self.raspi_tx_busy,
+            'nano_tx_sent': self.nano_tx_sent,
+            'relay_mask': self.relay_mask,
+        }
+
+
+# ============================================================================
+# PTY FRONT-END
+# ============================================================================
+
+def _open_pty():
+    """Return (master_fd, slave_fd, slave_path) in raw mode"""
+    import tty  # POSIX only; model di atas tetap bisa dipakai di Windows
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    os.set_blocking(master, False)
+    return master, slave, os.ttyname(slave)
+
+
+class PtyFirmwareEmulator:
+    """Run RelayFirmwareModel in real time behind Linux pseudo-terminals"""
+
+    def __init__(self, model=None):
+        self.model = model or RelayFirmwareModel()
+        self.ptys = {name: _open_pty() for name in ('RASPI', 'SNIFF', 'ROME', 'NANO')}
+        self._pending = []  # (t_ns, fd, data) output belum waktunya dikirim
+
+        self.model.on_raspi_tx = lambda t, d: self._schedule(t, 'RASPI', d)
+        self.model.on_rome_tx = lambda t, d: self._schedule(t, 'ROME', d)
+        self.model.on_nano_tx = lambda t, d: self._schedule(t, 'NANO', d)
+        self._t0 = time.monotonic_ns()
+
+    def path(self, name):
+        return self.ptys[name][2]
+
+    def _now(self):
+        return time.monotonic_ns() - self._t0
+
+    def _schedule(self, t_ns, name, data):
+        self._pending.append((t_ns, self.ptys[name][0], data))
+
+    def _flush_output(self, now):
+        keep = []
+        for t_ns, fd, data in self._pending:
+            if t_ns > now:
+                keep.append((t_ns, fd, data))
+                continue
+            try:
+                os.write(fd, data)
+            except (BlockingIOError, OSError):
+                pass  # Tidak ada yang baca / buffer pty penuh: buang
+        self._pending = keep
+
+    def run(self, stats_interval=STATS_INTERVAL, on_stats=None):
+        """Serve forever (Ctrl+C to stop)"""
+        raspi_fd = self.ptys['RASPI'][0]
+        sniff_fd = self.ptys['SNIFF'][0]
+        next_stats = stats_interval * NS_PER_S
+
+        while True:
+            now = self._now()
+            timeout_ns = max(0, min(self.model.next_event_ns(), next_stats) - now)
+            readable, _, _ = select.select([raspi_fd], [], [], timeout_ns / NS_PER_S)
+
+            now = self._now()
+            if readable:
+                try:
+                    data = os.read(raspi_fd, 4096)
+                except (BlockingIOError, OSError):
+                    data = b''
+                if data:
+                    self.model.receive(data, now)
+                    try:
+                        os.write(sniff_fd, data)
+                    except (BlockingIOError, OSError):
+                        pass
+
+            self.model.run_until(now)
+            self._flush_output(now)
+
+            if now >= next_stats:
+                next_stats += stats_interval * NS_PER_S
+                if on_stats:
+                    on_stats(self.model.stats())
+
+
+def print_stats(stats):
+    """Print one statistics block"""
+    print(f"\n[t={stats['t_s']:.1f}s] RX {stats['rx_bytes']:,} B "
+          f"(dropped {stats['rx_dropped']:,}, ring max {stats['rx_ring_max']}/{RX_BUF_SIZE - 1}) | "
+          f"DATA {stats['data_packets']:,} STATUS {stats['status_packets']:,} "
+          f"GC shift/flush {stats['gc_shifts']}/{stats['gc_flushes']}")
+    print(f"   ROME queue: enq {stats['rome_enqueued']:,} sent {stats['rome_sent']:,} "
+          f"dropped {stats['rome_dropped']:,} {stats['rome_dropped_by_device']} | "
+          f"max {stats['rome_queue_max']}/{ROME_QUEUE_SIZE - 1} avg {stats['rome_queue_avg']:.2f}")
+    print(f"   Status TX {stats['raspi_tx_sent']:,} (busy {stats['raspi_tx_busy']}) | "
+          f"Nano TX {stats['nano_tx_sent']:,} | Relay mask 0x{stats['relay_mask']:06X}")
+
+
+def main():
+    if os.name != 'posix':
+        print("Emulator pty hanya jalan di Linux / macOS.")
+        return
+
+    emulator = PtyFirmwareEmulator()
+    print("=" * 70)
+    print("RELAYV2 Firmware Emulator")
+    print("=" * 70)
+    print(f"Baud Rate (virtual): {BAUD_RATE}")
+    print(f"RASPI port (USART1): {emulator.path('RASPI')}  <- simulate_raspberry_pi.py")
+    print(f"SNIFF port (PA10):   {emulator.path('SNIFF')}  <- monitor_complete / monitor_discrete")
+    print(f"ROME port (USART2):  {emulator.path('ROME')}")
+    print(f"NANO port (USART3):  {emulator.path('NANO')}")
+    print("=" * 70)
+    print("\nPress Ctrl+C to stop...\n")
+
+    try:
+        emulator.run(on_stats=print_stats)
+    except KeyboardInterrupt:
+        print("\n\nEmulator stopped by user")
+        print_stats(emulator.model.stats())
+
+
+if __name__ == "__main__":
+    main()
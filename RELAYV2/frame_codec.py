@@ -0,0 +1,204 @@
+"""
+Raspberry Pi Frame Codec (Batch)
+================================
+Decode / encode paket 15-byte Raspberry Pi -> RELAYV2 secara batch
+dengan NumPy, bukan satu-satu per paket.
+
+Format paket (sama dengan Parse_Data_Packet() di raspi.c):
+    [0xA5, 0x99, Discrete_A, Discrete_B, Discrete_C,
+     Dev1_MSB, Dev1_LSB, Dev2_MSB, Dev2_LSB, Dev3_MSB, Dev3_LSB,
+     Dev4_MSB, Dev4_LSB, Dev5_MSB, Dev5_LSB]
+
+Hasil decode adalah NumPy structured array (FRAME_DTYPE) dengan field:
+    discrete_a, discrete_b, discrete_c  : uint8
+    device                              : uint16[5] (Device 1..5)
+    mode, nav_source, country           : uint8 (index ke *_NAMES)
+device_angles() mengubah device word ke derajat persis seperti ROME_DSC1.
+
+Usage: python frame_codec.py <raw_dump.bin>
+"""
+
+import sys
+import time
+
+import numpy as np
+
+# ===== PROTOCOL =====
+DATA_HEADER = b'\xA5\x99'     # Raspy -> RELAYV2 data frame
+STATUS_HEADER = b'\x99\xA5'   # RELAYV2 -> Raspy status (3 byte)
+ROME_HEADER = b'\xBB'         # RELAYV2 -> ROME device (4 byte)
+NANO_HEADER = b'\xAA\x01'     # RELAYV2 -> Nano (4 byte, tiap 300 ms)
+
+DATA_FRAME_LEN = 15
+STATUS_FRAME_LEN = 3
+ROME_FRAME_LEN = 4
+NANO_FRAME_LEN = 4
+NUM_DEVICES = 5
+
+MODE_NAMES = ("EADI", "EHSI", "RDU", "Unknown")
+NAV_SOURCE_NAMES = ("INS", "TAC", "VOR/ILS", "Unknown")
+COUNTRY_NAMES = ("TNI_AU", "Bangladesh", "India", "Pakistan")
+
+# Device word -> sudut, sama dengan ROME_DSC1 (main.c)
+ANGLE_SCALE = 10
+DEVICE5_ID = 5
+DEVICE5_OFFSET = 179.9
+
+# Layout di wire (big-endian device word, persis 15 byte)
+WIRE_DTYPE = np.dtype([
+    ('header', '>u2'),
+    ('discrete_a', 'u1'),
+    ('discrete_b', 'u1'),
+    ('discrete_c', 'u1'),
+    ('device', '>u2', (NUM_DEVICES,)),
+])
+assert WIRE_DTYPE.itemsize == DATA_FRAME_LEN
+
+# Layout hasil decode (native endian, siap dipakai)
+FRAME_DTYPE = np.dtype([
+    ('discrete_a', 'u1'),
+    ('discrete_b', 'u1'),
+    ('discrete_c', 'u1'),
+    ('device', 'u2', (NUM_DEVICES,)),
+    ('mode', 'u1'),
+    ('nav_source', 'u1'),
+    ('country', 'u1'),
+])
+
+_DATA_HEADER_WORD = 0xA599
+_FRAME_SPAN = np.arange(DATA_FRAME_LEN, dtype=np.intp)
+
+
+def _from_wire(wire):
+    """Convert WIRE_DTYPE array to FRAME_DTYPE array"""
+    frames = np.empty(len(wire), dtype=FRAME_DTYPE)
+    frames['discrete_a'] = wire['discrete_a']
+    frames['discrete_b'] = wire['discrete_b']
+    frames['discrete_c'] = wire['discrete_c']
+    frames['device'] = wire['device']
+    frames['mode'] = wire['discrete_b'] & 0x03
+    frames['nav_source'] = (wire['discrete_b'] >> 2) & 0x03
+    frames['country'] = wire['discrete_c'] & 0x03
+    return frames
+
+
+def decode_frames(buf, validate=True):
+    """
+    Decode back-to-back 15-byte frames from a byte buffer.
+
+    Args:
+        buf: bytes / bytearray / memoryview holding aligned frames.
+             Trailing partial frame is ignored.
+        validate: Drop frames whose header is not A5 99.
+
+    Returns:
+        NumPy array of FRAME_DTYPE
+    """
+    count = len(buf) // DATA_FRAME_LEN
+    wire = np.frombuffer(buf, dtype=WIRE_DTYPE, count=count)
+    if validate:
+        wire = wire[wire['header'] == _DATA_HEADER_WORD]
+    return _from_wire(wire)
+
+
+def decode_frames_at(buf, offsets):
+    """
+    Decode 15-byte frames that start at arbitrary offsets in a buffer.
+
+    Dipakai bersama stream framer: framer cukup mengumpulkan offset
+    header A5 99, decode dilakukan sekali untuk semua offset.
+
+    Args:
+        buf: bytes / bytearray / memoryview
+        offsets: sequence of frame start offsets (header already checked)
+
+    Returns:
+        NumPy array of FRAME_DTYPE
+    """
+    raw = np.frombuffer(buf, dtype=np.uint8)
+    offsets = np.asarray(offsets, dtype=np.intp)
+    packed = raw[offsets[:, None] + _FRAME_SPAN]
+    wire = packed.reshape(-1).view(WIRE_DTYPE)
+    return _from_wire(wire)
+
+
+def encode_frames(frames):
+    """
+    Encode FRAME_DTYPE array back to wire bytes.
+
+    mode / nav_source / country tidak dipakai saat encode, nilai aslinya
+    sudah ada di discrete_b / discrete_c.
+
+    Returns:
+        bytes (len(frames) * 15)
+    """
+    wire = np.empty(len(frames), dtype=WIRE_DTYPE)
+    wire['header'] = _DATA_HEADER_WORD
+    wire['discrete_a'] = frames['discrete_a']
+    wire['discrete_b'] = frames['discrete_b']
+    wire['discrete_c'] = frames['discrete_c']
+    wire['device'] = frames['device']
+    return wire.tobytes()
+
+
+def make_frames(count, discrete_a=0, discrete_b=0, discrete_c=0, devices=None):
+    """
+    Build a FRAME_DTYPE array (e.g. for simulators / benchmarks).
+
+    Args:
+        count: number of frames
+        discrete_a/b/c: scalar or array of length count
+        devices: array shape (count, 5) or (5,) of raw 16-bit values
+    """
+    frames = np.zeros(count, dtype=FRAME_DTYPE)
+    frames['discrete_a'] = discrete_a
+    frames['discrete_b'] = discrete_b
+    frames['discrete_c'] = discrete_c
+    if devices is not None:
+        frames['device'] = devices
+    frames['mode'] = frames['discrete_b'] & 0x03
+    frames['nav_source'] = (frames['discrete_b'] >> 2) & 0x03
+    frames['country'] = frames['discrete_c'] & 0x03
+    return frames
+
+
+def device_angles(frames):
+    """
+    Device angles in degrees as ROME_DSC1 displays them, shape (N, 5)
+    (or (5,) for a single frame).
+
+    Device 1-4: raw / 10. Device 5: int16(raw) / 10 - 179.9 (raw
+    di-cast signed di firmware, jadi 0xFFFF = -180.0).
+    """
+    raw = frames['device']
+    angles = raw / ANGLE_SCALE
+    angles[..., DEVICE5_ID - 1] = raw[..., DEVICE5_ID - 1].astype(np.int16) / ANGLE_SCALE - DEVICE5_OFFSET
+    return angles
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python frame_codec.py <raw_dump.bin>")
+        return
+
+    path = sys.argv[1]
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    start = time.perf_counter()
+    frames = decode_frames(data)
+    elapsed = time.perf_counter() - start
+
+    print(f"File:    {path} ({len(data):,} bytes)")
+    print(f"Frames:  {len(frames):,}")
+    print(f"Decode:  {elapsed * 1000:.1f} ms ({len(frames) / elapsed if elapsed > 0 else 0:,.0f} frames/s)")
+
+    if len(frames):
+        print("\nMode distribution:")
+        counts = np.bincount(frames['mode'], minlength=len(MODE_NAMES))
+        for code, name in enumerate(MODE_NAMES):
+            print(f"   {name:<8} {counts[code]:,}")
+
+
+if __name__ == "__main__":
+    main()
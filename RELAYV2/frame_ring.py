@@ -0,0 +1,187 @@
+"""
+Frame Ring - Columnar Raw Frame Store with Lazy Decode
+======================================================
+Ring berukuran tetap untuk frame A5 99 (15 byte) + timestamp
+time.monotonic_ns(). Per frame hanya ada satu copy 15 byte dan satu
+tulis int64; decode (FRAME_DTYPE), konversi sudut dan format jam
+dilakukan hanya untuk frame yang benar-benar ditampilkan / di-export.
+
+Layout:
+    raw    uint8 (capacity, 15)   frame persis seperti di wire
+    t_ns   int64 (capacity,)      monotonic_ns saat frame diterima
+    seq    nomor urut frame global (total frame yang pernah masuk)
+
+Frame lama ditimpa begitu ring penuh; seq tetap naik, jadi pembaca
+(exporter) bisa minta "semua sejak seq X" dan tahu berapa yang sudah
+tertimpa.
+
+Contoh:
+    ring = FrameRing(4096)
+    for _, packet in framer.frames():
+        ring.append(packet, time.monotonic_ns())
+    frame, t_ns = ring.latest()             # decode 1 frame saja
+    print(format_time(t_ns), ring.rate())
+
+Usage (benchmark vs dict per paket):
+    python frame_ring.py --frames 200000
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from frame_codec import DATA_FRAME_LEN, decode_frames, make_frames, encode_frames
+
+# ===== CONFIGURATION =====
+DEFAULT_CAPACITY = 4096   # frames (~20 s @ 200 Hz)
+RATE_WINDOW_S = 1.0       # Window untuk rate()
+
+NS_PER_S = 1_000_000_000
+
+# Offset monotonic -> wall clock, diambil sekali saat import
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+def format_time(t_ns):
+    """HH:MM:SS.mmm of a monotonic_ns timestamp (wall clock)"""
+    return datetime.fromtimestamp((t_ns + _WALL_OFFSET_NS) / NS_PER_S).strftime("%H:%M:%S.%f")[:-3]
+
+
+class FrameRing:
+    """Fixed-size ring of raw 15-byte frames and receive timestamps"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = capacity
+        self._buf = bytearray(capacity * DATA_FRAME_LEN)
+        self.raw = np.frombuffer(self._buf, dtype=np.uint8).reshape(capacity, DATA_FRAME_LEN)
+        self.t_ns = np.zeros(capacity, dtype=np.int64)
+        self.seq = 0   # total frame yang pernah masuk
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    @property
+    def overwritten(self):
+        """Frames dropped from the ring since the start"""
+        return max(0, self.seq - self.capacity)
+
+    def append(self, frame, t_ns):
+        """Store one 15-byte frame (bytes / memoryview from StreamFramer)"""
+        slot = self.seq % self.capacity
+        pos = slot * DATA_FRAME_LEN
+        self._buf[pos:pos + DATA_FRAME_LEN] = frame
+        self.t_ns[slot] = t_ns
+        self.seq += 1
+
+    def extend(self, buf, t_ns):
+        """
+        Store back-to-back frames from one read (all with the same t_ns).
+
+        Args:
+            buf: bytes holding whole 15-byte frames (header already checked)
+        """
+        rows = np.frombuffer(buf, dtype=np.uint8)
+        rows = rows[:len(rows) - len(rows) % DATA_FRAME_LEN].reshape(-1, DATA_FRAME_LEN)
+        if len(rows) > self.capacity:
+            self.seq += len(rows) - self.capacity
+            rows = rows[-self.capacity:]
+        slots = (self.seq + np.arange(len(rows))) % self.capacity
+        self.raw[slots] = rows
+        self.t_ns[slots] = t_ns
+        self.seq += len(rows)
+
+    def _slots(self, first_seq, last_seq):
+        return np.arange(first_seq, last_seq) % self.capacity
+
+    def since(self, seq):
+        """
+        Decode every frame with sequence number >= seq still in the ring.
+
+        Returns:
+            (first_seq, FRAME_DTYPE array, t_ns array); first_seq > seq
+            means frames were overwritten before they were read
+        """
+        first = max(seq, self.seq - len(self))
+        slots = self._slots(first, self.seq)
+        return first, decode_frames(self.raw[slots].reshape(-1), validate=False), self.t_ns[slots]
+
+    def last(self, count):
+        """Decode the newest `count` frames (oldest first): (FRAME_DTYPE array, t_ns array)"""
+        _, frames, t_ns = self.since(self.seq - min(count, len(self)))
+        return frames, t_ns
+
+    def latest(self):
+        """(FRAME_DTYPE record, t_ns) of the newest frame, or (None, None) when empty"""
+        if self.seq == 0:
+            return None, None
+        slot = (self.seq - 1) % self.capacity
+        return decode_frames(self.raw[slot], validate=False)[0], int(self.t_ns[slot])
+
+    def rate(self, window_s=RATE_WINDOW_S, now_ns=None):
+        """Frames per second received in the last window_s (limited by ring span)"""
+        if self.seq == 0:
+            return 0.0
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        cutoff = now_ns - int(window_s * NS_PER_S)
+        count = int(np.count_nonzero(self.t_ns[:len(self)] > cutoff))
+        return count / window_s
+
+
+def _bench_dict(packets):
+    """Old monitor_complete.py path: full dict + strftime per packet"""
+    latest = None
+    for packet in packets:
+        rome = {}
+        for i in range(5):
+            raw_value = (packet[5 + i * 2] << 8) | packet[6 + i * 2]
+            rome[f'rome_{i + 1}_raw'] = raw_value
+            rome[f'rome_{i + 1}_angle'] = (raw_value * 360.0) / 65535.0
+        latest = {
+            'timestamp': datetime.now().strftime("%H:%M:%S.%f")[:-3],
+            'discrete_a': packet[2], 'discrete_b': packet[3], 'discrete_c': packet[4],
+            **rome,
+        }
+    return latest
+
+
+def _bench_ring(packets, ring):
+    for packet in packets:
+        ring.append(packet, time.monotonic_ns())
+    return ring.latest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FrameRing against per-packet dict decoding")
+    parser.add_argument('--frames', type=int, default=200_000)
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = encode_frames(make_frames(args.frames, devices=rng.integers(0, 3600, (args.frames, 5))))
+    view = memoryview(data)
+    packets = [view[i:i + DATA_FRAME_LEN] for i in range(0, len(data), DATA_FRAME_LEN)]
+
+    t0 = time.perf_counter()
+    _bench_dict(packets)
+    dict_s = time.perf_counter() - t0
+
+    ring = FrameRing(args.capacity)
+    t0 = time.perf_counter()
+    frame, t_ns = _bench_ring(packets, ring)
+    ring_s = time.perf_counter() - t0
+    assert (frame['device'] == np.frombuffer(packets[-1][5:], dtype='>u2')).all()
+
+    print(f"{args.frames:,} frames")
+    print(f"  dict per paket : {dict_s * 1000:8.1f} ms  ({args.frames / dict_s:>12,.0f} frames/s)")
+    print(f"  FrameRing      : {ring_s * 1000:8.1f} ms  ({args.frames / ring_s:>12,.0f} frames/s)  "
+          f"x{dict_s / ring_s:.1f}")
+    print(f"  latest @ {format_time(t_ns)}: devices {frame['device'].tolist()}")
+
+
+if __name__ == "__main__":
+    main()
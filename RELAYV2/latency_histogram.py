@@ -0,0 +1,218 @@
+"""
+Latency Histogram - Log-Bucketed, Constant Memory
+=================================================
+Histogram gaya HDR untuk inter-arrival time / jitter. Setiap record()
+O(1) dan memori tetap, jadi aman untuk run berhari-hari (pengganti
+list intervals + pop(0) dan deque timestamp).
+
+Bucketing (nilai integer, biasanya nanodetik):
+    nilai < 2 * SUB_BUCKETS       -> bucket linear (exact)
+    nilai lebih besar             -> per pangkat dua dibagi SUB_BUCKETS
+                                     sub-bucket (error relatif < 1/64)
+
+Nilai >= 2^MAX_BITS (~13 hari dalam ns) masuk bucket terakhir; min/max
+tetap disimpan exact.
+
+- LatencyHistogram: histogram all-time.
+- WindowedHistogram: all-time + sliding window (ring of slot histogram
+  berbasis timestamp, jadi bisa dipakai juga saat replay capture).
+
+Contoh:
+    hist = WindowedHistogram(window_s=10)
+    hist.record_arrival(time.perf_counter_ns())   # per paket
+    print(format_summary(hist.window_summary()))
+"""
+
+import math
+
+# ===== CONFIGURATION =====
+SUB_BUCKET_BITS = 6
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_BITS = 50
+NUM_BUCKETS = (MAX_BITS - SUB_BUCKET_BITS + 1) * SUB_BUCKETS
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+NS_PER_US = 1_000
+NS_PER_MS = 1_000_000
+NS_PER_S = 1_000_000_000
+
+
+def bucket_index(value):
+    """Bucket number for a non-negative integer value"""
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    index = (shift + 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+    return index if index < NUM_BUCKETS else NUM_BUCKETS - 1
+
+
+def bucket_range(index):
+    """(lowest, highest) value that maps to bucket `index`"""
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Fixed-size log-bucketed histogram of integer values"""
+
+    def __init__(self):
+        self.counts = [0] * NUM_BUCKETS
+        self.reset()
+
+    def reset(self):
+        counts = self.counts
+        for i in range(NUM_BUCKETS):
+            counts[i] = 0
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        """Add one sample (negative values are clamped to 0)"""
+        value = int(value)
+        if value < 0:
+            value = 0
+        self.counts[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Add all samples of another histogram into this one"""
+        if not other.count:
+            return
+        counts = self.counts
+        for i, n in enumerate(other.counts):
+            if n:
+                counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentiles(self, ps=PERCENTILES):
+        """Values at the given percentiles (highest equivalent value of the bucket)"""
+        if not self.count:
+            return [0] * len(ps)
+        targets = sorted((max(1, math.ceil(p / 100.0 * self.count)), i) for i, p in enumerate(ps))
+        result = [0] * len(ps)
+        seen = 0
+        t = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while t < len(targets) and seen >= targets[t][0]:
+                value = bucket_range(index)[1]
+                result[targets[t][1]] = min(max(value, self.min), self.max)
+                t += 1
+            if t == len(targets):
+                break
+        # Bisa terjadi kalau histogram dibaca sambil di-update thread lain
+        for _, i in targets[t:]:
+            result[i] = self.max
+        return result
+
+    def percentile(self, p):
+        return self.percentiles((p,))[0]
+
+    def summary(self):
+        """Dict with count, mean, min, max and PERCENTILES (same unit as samples)"""
+        result = {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min or 0,
+            'max': self.max or 0,
+        }
+        for p, v in zip(PERCENTILES, self.percentiles()):
+            result[f'p{p:g}'] = v
+        return result
+
+
+class WindowedHistogram:
+    """All-time histogram plus a sliding window built from time slots"""
+
+    def __init__(self, window_s=10.0, slots=10):
+        """
+        Args:
+            window_s: sliding window length in seconds
+            slots: number of sub-histograms (window granularity = window_s / slots)
+        """
+        self.window_ns = int(window_s * NS_PER_S)
+        self.slot_ns = max(1, self.window_ns // slots)
+        self.all_time = LatencyHistogram()
+        self._slots = [LatencyHistogram() for _ in range(slots)]
+        self._slot_ids = [None] * slots
+        self._last_arrival_ns = None
+        self._now_ns = None
+
+    def record(self, value, t_ns):
+        """Add one sample taken at time t_ns (monotonic ns)"""
+        self.all_time.record(value)
+        slot_id = t_ns // self.slot_ns
+        pos = slot_id % len(self._slots)
+        if self._slot_ids[pos] != slot_id:
+            self._slots[pos].reset()
+            self._slot_ids[pos] = slot_id
+        self._slots[pos].record(value)
+        self._now_ns = t_ns
+
+    def record_arrival(self, t_ns):
+        """Record the gap since the previous arrival; returns it (or None)"""
+        gap = None
+        if self._last_arrival_ns is not None:
+            gap = t_ns - self._last_arrival_ns
+            self.record(gap, t_ns)
+        self._last_arrival_ns = t_ns
+        return gap
+
+    def break_arrivals(self):
+        """Forget the previous arrival (e.g. stream restarted), next one records no gap"""
+        self._last_arrival_ns = None
+
+    def window(self, t_ns=None):
+        """Merged histogram of the last window_s seconds before t_ns"""
+        merged = LatencyHistogram()
+        if t_ns is None:
+            t_ns = self._now_ns
+        if t_ns is None:
+            return merged
+        newest = t_ns // self.slot_ns
+        oldest = newest - len(self._slots) + 1
+        for slot_id, hist in zip(self._slot_ids, self._slots):
+            if slot_id is not None and oldest <= slot_id <= newest:
+                merged.merge(hist)
+        return merged
+
+    def window_start(self, t_ns):
+        """First timestamp covered by window(t_ns) (slot boundary)"""
+        return (t_ns // self.slot_ns - len(self._slots) + 1) * self.slot_ns
+
+    def window_summary(self, t_ns=None):
+        return self.window(t_ns).summary()
+
+    def summary(self):
+        return self.all_time.summary()
+
+
+def format_summary(summary, unit='ms'):
+    """One-line text of a summary() dict; samples are assumed to be ns"""
+    scale = {'ns': 1, 'us': NS_PER_US, 'ms': NS_PER_MS, 's': NS_PER_S}[unit]
+    if not summary['count']:
+        return "no samples"
+    parts = [f"n={summary['count']:,}", f"mean {summary['mean'] / scale:.2f}"]
+    parts += [f"p{p:g} {summary[f'p{p:g}'] / scale:.2f}" for p in PERCENTILES]
+    parts.append(f"max {summary['max'] / scale:.2f} {unit}")
+    return "  ".join(parts)
@@ -0,0 +1,367 @@
+"""
+Latency Tracer - Tagged Probe Frames Raspi -> RELAYV2 -> ROME
+=============================================================
+Kirim frame A5 99 yang word device-nya berisi tag unik, lalu tunggu
+paket BB ID MSB LSB dengan tag yang sama di port ROME. Firmware
+meneruskan word device apa adanya, jadi:
+    latency[slot] = t(BB ID tag diterima) - t(A5 99 tag ditulis)
+
+Rate kirim di-sweep bertahap (deadline absolut, DeadlineScheduler)
+supaya kelihatan kapan rome_tx_queue (16 entry, 15 terpakai) mulai
+penuh. Satu frame = 5 paket ROME x 4 byte, drain USART2 ~347 us per
+paket, jadi di atas ~576 frame/s antrian pasti penuh dan paket dibuang.
+
+Per step dilaporkan:
+- latency per device slot (p50 / p90 / p99 / max) dan probe yang hilang
+- perkiraan isi antrian ROME saat probe masuk:
+      (latency D1 - latency D1 minimum) / waktu kirim 1 paket ROME
+- stream status 99 A5 di port Raspi (rate dan interval), untuk melihat
+  apakah main loop ikut tersendat saat uplink padat
+- prediksi rome_queue_model.py (drop + isi antrian) dari waktu kirim
+  yang sama, untuk dibandingkan dengan yang terukur
+
+Tag memakai word dari TAG_BASE ke atas, byte A5/99/BB/AA dilewati
+supaya tidak membuat header palsu. Gauge ikut bergerak ke nilai tag,
+jadi jalankan dengan device yang aman untuk digerakkan (atau dilepas).
+
+Usage:
+    python latency_tracer.py
+    python latency_tracer.py --raspi /dev/ttyUSB0 --rome /dev/ttyUSB1 --rates 100,200,400,600,700
+    python latency_tracer.py --rates 500 --step-duration 10 --repeat 0   (terus-menerus)
+"""
+
+import argparse
+import threading
+import time
+
+import serial
+
+from deadline_scheduler import DeadlineScheduler
+from frame_codec import DATA_HEADER, NUM_DEVICES, ROME_FRAME_LEN
+from latency_histogram import LatencyHistogram, format_summary, NS_PER_MS, NS_PER_S, NS_PER_US
+from rome_queue_model import RomeQueueModel, max_safe_rate_hz
+from stream_framer import StreamFramer, STATUS, ROME
+
+# ===== CONFIGURATION =====
+RASPI_PORT = 'COM13'  # Port ke RELAYV2 USART1 (tulis A5 99, baca 99 A5)
+ROME_PORT = 'COM15'   # Port sniff USART2 (BB ID MSB LSB)
+BAUD_RATE = 115200
+
+RATES_HZ = (50, 100, 200, 300, 400, 500, 600, 700)  # Step sweep
+STEP_DURATION = 5       # seconds per rate step
+MATCH_TIMEOUT_MS = 200  # Probe dianggap hilang kalau BB belum datang
+EXPIRED_MEMORY = 1024   # Tag expired yang diingat untuk menghitung BB terlambat
+SPIN_US = 300           # Busy-wait sebelum deadline kirim
+TIMEOUT = 0.1           # read() blocking maksimal segini
+
+TAG_BASE = 0x0100       # Word tag pertama
+TAG_COUNT = 4096        # Jumlah tag sebelum berulang (unik ~5 s di 700 Hz)
+TAG_AVOID = (0xA5, 0x99, 0xBB, 0xAA)  # Byte header, jangan muncul di tag
+DISCRETES = (0x00, 0x00, 0x00)        # DA DB DC untuk probe (relay off)
+
+ROME_QUEUE_ENTRIES = 15  # rome_tx_queue[16], satu slot selalu kosong
+BYTE_NS = 10 * NS_PER_S // BAUD_RATE
+ROME_PACKET_NS = ROME_FRAME_LEN * BYTE_NS
+
+
+def make_tags(base=TAG_BASE, count=TAG_COUNT, avoid=TAG_AVOID):
+    """List of 16-bit tag words whose bytes never equal a header byte"""
+    tags = []
+    word = base
+    while len(tags) < count:
+        if word > 0xFFFF:
+            raise ValueError("not enough tag words above TAG_BASE")
+        if (word >> 8) not in avoid and (word & 0xFF) not in avoid:
+            tags.append(word)
+        word += 1
+    return tags
+
+
+def probe_frame(tag, discretes=DISCRETES):
+    """15-byte A5 99 frame carrying `tag` in all five device words"""
+    return DATA_HEADER + bytes(discretes) + bytes([tag >> 8, tag & 0xFF]) * NUM_DEVICES
+
+
+class TraceStep:
+    """Statistics of one rate step"""
+
+    def __init__(self, rate_hz):
+        self.rate_hz = rate_hz
+        self.sent = 0
+        self.achieved_hz = 0.0
+        self.latency = [LatencyHistogram() for _ in range(NUM_DEVICES)]
+        self.missing = [0] * NUM_DEVICES
+        self.complete = 0
+        self.model = RomeQueueModel(BAUD_RATE)  # prediksi dari waktu kirim
+        self.queue_depth = LatencyHistogram()  # perkiraan entry antrian di depan D1
+        self.status = LatencyHistogram()       # interval 99 A5 (ns)
+        self.status_packets = 0
+        self.status_first_ns = None
+        self.status_last_ns = None
+
+    @property
+    def status_hz(self):
+        if self.status_packets < 2:
+            return 0.0
+        return (self.status_packets - 1) * NS_PER_S / (self.status_last_ns - self.status_first_ns)
+
+    @property
+    def loss_ratio(self):
+        expected = self.sent * NUM_DEVICES
+        return sum(self.missing) / expected if expected else 0.0
+
+
+class LatencyTracer:
+    """Probe sender plus ROME / Raspi receivers sharing one monotonic clock"""
+
+    def __init__(self, raspi_port, rome_port, baud=BAUD_RATE, timeout_ms=MATCH_TIMEOUT_MS):
+        self.raspi = serial.Serial(raspi_port, baud, timeout=TIMEOUT)
+        self.rome = serial.Serial(rome_port, baud, timeout=TIMEOUT)
+        self.timeout_ns = int(timeout_ms * NS_PER_MS)
+        self.tags = make_tags()
+        self._tag_pos = 0
+
+        # tag -> [t_send_ns, step, slot bitmask sudah diterima]
+        self._pending = {}
+        # tag expired -> slot bitmask yang belum diterima (urutan expire,
+        # maksimal EXPIRED_MEMORY; dihapus saat tag dipakai lagi)
+        self._expired = {}
+        self._lock = threading.Lock()
+        self.step = None
+        self.running = True
+        self._threads = []
+
+        # Baseline D1 (latency tanpa antrian) untuk perkiraan isi queue
+        self.min_d1_ns = None
+
+        # Statistics
+        self.unknown_bb = 0    # BB dengan tag yang tidak sedang ditunggu
+        self.late_bb = 0       # BB datang setelah probe dinyatakan hilang
+        self.rome_framer = StreamFramer((ROME,))
+        self.raspi_framer = StreamFramer((STATUS,))
+
+    # ===== RX =====
+
+    def rome_loop(self):
+        """Match BB ID MSB LSB packets against pending probes"""
+        framer = self.rome_framer
+        while self.running:
+            data = self.rome.read(self.rome.in_waiting or 1)
+            t_ns = time.monotonic_ns()
+            if not data:
+                continue
+            framer.feed(data)
+            for _, packet in framer.frames():
+                self._on_rome(t_ns, packet[1] - 1, (packet[2] << 8) | packet[3])
+
+    def _on_rome(self, t_ns, slot, tag):
+        if not 0 <= slot < NUM_DEVICES:
+            self.unknown_bb += 1
+            return
+        with self._lock:
+            entry = self._pending.get(tag)
+            if entry is None:
+                missing = self._expired.get(tag, 0)
+                if missing & (1 << slot):
+                    # Probe sudah di-expire, BB-nya baru datang
+                    self._expired[tag] = missing & ~(1 << slot)
+                    self.late_bb += 1
+                else:
+                    self.unknown_bb += 1
+                return
+            if entry[2] & (1 << slot):
+                self.unknown_bb += 1
+                return
+            t_send, step, mask = entry
+            latency = t_ns - t_send
+            if latency > self.timeout_ns:
+                self.late_bb += 1
+                return
+            entry[2] = mask | (1 << slot)
+            if entry[2] == (1 << NUM_DEVICES) - 1:
+                del self._pending[tag]
+                step.complete += 1
+
+        step.latency[slot].record(latency)
+        if slot == 0:
+            if self.min_d1_ns is None or latency < self.min_d1_ns:
+                self.min_d1_ns = latency
+            step.queue_depth.record((latency - self.min_d1_ns) // ROME_PACKET_NS)
+
+    def raspi_loop(self):
+        """Follow the 99 A5 status stream coming back on USART1"""
+        framer = self.raspi_framer
+        last_ns = None
+        while self.running:
+            data = self.raspi.read(self.raspi.in_waiting or 1)
+            t_ns = time.monotonic_ns()
+            if not data:
+                continue
+            framer.feed(data)
+            step = self.step
+            for _ in framer.frames():
+                if step is None:
+                    continue
+                if step.status_first_ns is None:
+                    step.status_first_ns = t_ns
+                elif last_ns is not None:
+                    step.status.record(t_ns - last_ns)
+                step.status_last_ns = t_ns
+                step.status_packets += 1
+                last_ns = t_ns
+
+    # ===== TX =====
+
+    def _next_tag(self):
+        tag = self.tags[self._tag_pos]
+        self._tag_pos = (self._tag_pos + 1) % len(self.tags)
+        return tag
+
+    def _expire(self, now_ns):
+        """Count probes whose BB packets did not arrive within the timeout"""
+        with self._lock:
+            expired = [tag for tag, (t_send, _, _) in self._pending.items()
+                       if now_ns - t_send > self.timeout_ns]
+            for tag in expired:
+                _, step, mask = self._pending.pop(tag)
+                for slot in range(NUM_DEVICES):
+                    if not mask & (1 << slot):
+                        step.missing[slot] += 1
+                self._expired[tag] = ~mask & ((1 << NUM_DEVICES) - 1)
+            while len(self._expired) > EXPIRED_MEMORY:
+                del self._expired[next(iter(self._expired))]
+
+    def run_step(self, rate_hz, duration_s):
+        """Send probes at rate_hz for duration_s, then wait for stragglers"""
+        step = TraceStep(rate_hz)
+        self.step = step
+        scheduler = DeadlineScheduler(rate_hz, spin_us=SPIN_US)
+        expire_every = max(1, int(rate_hz // 10))
+
+        def send(tick):
+            tag = self._next_tag()
+            frame = probe_frame(tag)
+            t_ns = time.monotonic_ns()
+            with self._lock:
+                self._expired.pop(tag, None)
+                self._pending[tag] = [t_ns, step, 0]
+            step.model.frame(t_ns)
+            self.raspi.write(frame)
+            step.sent += 1
+            if tick % expire_every == 0:
+                self._expire(t_ns)
+            return self.running
+
+        scheduler.run(send, duration_s=duration_s)
+        step.achieved_hz = scheduler.stats()['achieved_hz']
+
+        # Tunggu BB terakhir, lalu tutup step
+        time.sleep(self.timeout_ns / NS_PER_S)
+        self._expire(time.monotonic_ns() + self.timeout_ns + 1)
+        self.step = None
+        return step
+
+    def start(self):
+        """Start the ROME and Raspi receiver threads"""
+        self._threads = [threading.Thread(target=self.rome_loop, daemon=True),
+                         threading.Thread(target=self.raspi_loop, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self):
+        self.running = False
+        for thread in self._threads:
+            thread.join(timeout=2 * TIMEOUT)
+        for ser in (self.raspi, self.rome):
+            if ser.is_open:
+                ser.close()
+
+
+# ===== OUTPUT =====
+
+def print_step(step):
+    print("=" * 90)
+    print(f"Rate {step.rate_hz:.0f} Hz (achieved {step.achieved_hz:.1f} Hz) | probes {step.sent:,} | "
+          f"complete {step.complete:,} | slot loss {step.loss_ratio * 100:.2f}%")
+    for slot, hist in enumerate(step.latency):
+        print(f"  D{slot + 1}  {format_summary(hist.summary())}  missing {step.missing[slot]:,}")
+    if step.queue_depth.count:
+        p50, p99 = step.queue_depth.percentiles((50, 99))
+        print(f"  ROME queue ahead of D1 (est.): p50 {p50}  p99 {p99}  max {step.queue_depth.max}"
+              f" / {ROME_QUEUE_ENTRIES} entries")
+    model = step.model.stats()
+    model_loss = model['dropped'] / max(1, step.sent * NUM_DEVICES)
+    print(f"  Model: predicted drop {model['dropped']:,} ({model_loss * 100:.2f}%)  "
+          f"queue max {model['max_occupancy']}/{ROME_QUEUE_ENTRIES} avg {model['avg_occupancy']:.1f}")
+    print(f"  Status 99 A5: {step.status_hz:.1f} Hz  interval {format_summary(step.status.summary())}")
+
+
+def print_sweep(steps):
+    print("\n" + "=" * 90)
+    print("📊 LATENCY vs RATE (Raspi -> RELAYV2 -> ROME)")
+    print("=" * 90)
+    print(f"{'Rate Hz':>8} {'Sent':>8} {'Loss %':>7} {'Model %':>8} {'D1 p50':>8} {'D5 p50':>8} {'D5 p99':>8} "
+          f"{'D5 max':>8} {'Queue p99':>10} {'Status Hz':>10}")
+    print("-" * 90)
+    for step in steps:
+        d1 = step.latency[0]
+        d5 = step.latency[NUM_DEVICES - 1]
+        d1_p50 = d1.percentile(50) / NS_PER_MS
+        d5_p50, d5_p99 = (v / NS_PER_MS for v in d5.percentiles((50, 99)))
+        queue_p99 = step.queue_depth.percentile(99) if step.queue_depth.count else 0
+        model_loss = step.model.dropped / max(1, step.sent * NUM_DEVICES)
+        print(f"{step.rate_hz:>8.0f} {step.sent:>8,} {step.loss_ratio * 100:>7.2f} {model_loss * 100:>8.2f} "
+              f"{d1_p50:>6.2f}ms {d5_p50:>6.2f}ms {d5_p99:>6.2f}ms {(d5.max or 0) / NS_PER_MS:>6.2f}ms "
+              f"{queue_p99:>10} {step.status_hz:>10.1f}")
+    print("=" * 90)
+    print(f"ROME drain: {ROME_PACKET_NS / NS_PER_US:.0f} us/packet -> max "
+          f"{max_safe_rate_hz(BAUD_RATE)[0]:.0f} frame/s tanpa antrian penuh")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raspi -> RELAYV2 -> ROME latency tracer (tagged probes)")
+    parser.add_argument('--raspi', default=RASPI_PORT, help="port to RELAYV2 USART1")
+    parser.add_argument('--rome', default=ROME_PORT, help="port sniffing USART2 (ROME bus)")
+    parser.add_argument('--rates', default=','.join(str(r) for r in RATES_HZ),
+                        help="comma separated probe rates in Hz")
+    parser.add_argument('--step-duration', type=float, default=STEP_DURATION, help="seconds per rate")
+    parser.add_argument('--repeat', type=int, default=1, help="sweeps to run (0 = forever)")
+    args = parser.parse_args()
+    rates = [float(r) for r in args.rates.split(',') if r]
+
+    try:
+        tracer = LatencyTracer(args.raspi, args.rome)
+    except serial.SerialException as e:
+        print(f"❌ Serial Error: {e}")
+        return
+
+    print("=" * 90)
+    print("Latency Tracer - Raspi -> RELAYV2 -> ROME")
+    print("=" * 90)
+    print(f"Raspi: {args.raspi}  ROME: {args.rome}  Baud: {BAUD_RATE}")
+    print(f"Rates: {', '.join(f'{r:g}' for r in rates)} Hz x {args.step_duration:g}s  "
+          f"Match timeout: {MATCH_TIMEOUT_MS} ms  Tags: {len(tracer.tags)}")
+    print("\nPress Ctrl+C to stop...\n")
+
+    tracer.start()
+    steps = []
+    sweep = 0
+    try:
+        while args.repeat == 0 or sweep < args.repeat:
+            for rate in rates:
+                step = tracer.run_step(rate, args.step_duration)
+                steps.append(step)
+                print_step(step)
+            sweep += 1
+    except KeyboardInterrupt:
+        print("\n\n⏹️  Tracing stopped by user")
+    finally:
+        tracer.close()
+        if steps:
+            print_sweep(steps)
+        print(f"Unknown BB packets: {tracer.unknown_bb:,}  Late BB packets: {tracer.late_bb:,}  "
+              f"ROME resyncs: {tracer.rome_framer.resyncs:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Link Bandwidth Planner - RELAYV2 Topology
+=========================================
+Hitung beban wire per UART dan simulasikan antrian firmware untuk satu
+konfigurasi rate, sebelum dicoba di hardware:
+
+    USART1 RX   Raspi -> RELAYV2   A5 99 (15 B) x uplink rate
+                                   + 99 A5 (3 B) x host status rate
+    USART1 TX   RELAYV2 -> Raspi   99 A5 (3 B) x 200 Hz (Value_Discrete)
+    USART2 TX   RELAYV2 -> ROME    BB ID MSB LSB (4 B) x 5 x uplink rate
+    USART3 TX   RELAYV2 -> Nano    AA 01 04 D2 (4 B) tiap 300 ms
+
+Simulasi memakai RelayFirmwareModel (firmware_model.py): ring RX 256
+byte, rome_tx_queue 16 entry, HAL_BUSY di USART1 TX. Opsi:
+    --burst N       host menulis N frame sekaligus (USB / OS buffering)
+    --loop-us U     satu pass while(1) makan U us (model blocking work)
+
+Output: utilisasi + headroom per UART, isi ring / queue maksimum,
+paket yang dibuang, verdict SUSTAINABLE / NOT SUSTAINABLE, dan rate
+uplink maksimum untuk burst / loop yang sama (bisection simulasi).
+
+Usage:
+    python link_planner.py --uplink-rate 200
+    python link_planner.py --uplink-rate 500 --burst 4 --host-status-rate 200
+    python link_planner.py --uplink-rate 300 --loop-us 2000 --baud 57600
+"""
+
+import argparse
+
+from firmware_model import (
+    RelayFirmwareModel, RX_BUF_SIZE, ROME_QUEUE_SIZE, ROME_PACKET_LEN,
+    STATUS_PERIOD_MS, NANO_PERIOD_MS, NANO_PACKET,
+)
+from frame_codec import DATA_HEADER, STATUS_HEADER, DATA_FRAME_LEN, STATUS_FRAME_LEN, NUM_DEVICES
+
+# ===== CONFIGURATION =====
+BAUD_RATE = 115200
+UPLINK_RATE_HZ = 200       # A5 99 dari Raspi
+HOST_STATUS_RATE_HZ = 0    # 99 A5 dari Raspi (Aktif_raspi.py), 0 = tidak ada
+SIM_DURATION = 3.0         # seconds virtual time per simulasi
+UTIL_WARNING = 0.8         # Utilisasi wire di atas ini dianggap mepet
+SEARCH_MAX_HZ = 2000       # Batas atas bisection rate maksimum
+DRAIN_MS = 100             # Simulasi lanjut segini setelah write terakhir
+STATUS_MIN_RATIO = 0.95    # Status 99 A5 terkirim minimal segini dari nominal
+
+NS_PER_S = 1_000_000_000
+
+DATA_FRAME = DATA_HEADER + bytes(DATA_FRAME_LEN - len(DATA_HEADER))
+HOST_STATUS_FRAME = STATUS_HEADER + b'\x01'
+
+
+def wire_budget(uplink_hz, host_status_hz=HOST_STATUS_RATE_HZ, baud=BAUD_RATE):
+    """
+    Bytes/s and utilisation per UART direction.
+
+    Returns:
+        list of (name, bytes_per_s, utilisation)
+    """
+    capacity = baud / 10  # 8N1
+    links = [
+        ('USART1 RX  Raspi -> RELAYV2', uplink_hz * DATA_FRAME_LEN + host_status_hz * STATUS_FRAME_LEN),
+        ('USART1 TX  RELAYV2 -> Raspi', 1000 / STATUS_PERIOD_MS * STATUS_FRAME_LEN),
+        ('USART2 TX  RELAYV2 -> ROME', uplink_hz * NUM_DEVICES * ROME_PACKET_LEN),
+        ('USART3 TX  RELAYV2 -> Nano', 1000 / NANO_PERIOD_MS * len(NANO_PACKET)),
+    ]
+    return [(name, bps, bps / capacity) for name, bps in links]
+
+
+def simulate(uplink_hz, host_status_hz=HOST_STATUS_RATE_HZ, baud=BAUD_RATE,
+             burst=1, loop_us=0, duration_s=SIM_DURATION):
+    """
+    Drive RelayFirmwareModel with the configured host traffic.
+
+    Returns:
+        RelayFirmwareModel.stats() dict plus 'expected_status'
+    """
+    model = RelayFirmwareModel(baud=baud, main_loop_us=loop_us)
+    end_ns = int(duration_s * NS_PER_S)
+
+    # Jadwal write host: (t_ns, bytes), frame di-group per burst
+    writes = []
+    if uplink_hz > 0:
+        period_ns = NS_PER_S / uplink_hz
+        count = int(duration_s * uplink_hz)
+        for i in range(0, count, burst):
+            n = min(burst, count - i)
+            writes.append((int((i + n - 1) * period_ns), DATA_FRAME * n))
+    if host_status_hz > 0:
+        period_ns = NS_PER_S / host_status_hz
+        writes += [(int(i * period_ns), HOST_STATUS_FRAME) for i in range(int(duration_s * host_status_hz))]
+    writes.sort(key=lambda w: w[0])
+
+    for t_ns, data in writes:
+        model.run_until(t_ns)
+        model.receive(data, t_ns)
+    # Status dihitung di window [0, end], sisa frame di wire / queue di-drain dulu
+    model.run_until(end_ns)
+    status_sent = model.raspi_tx_sent
+    model.run_until(end_ns + DRAIN_MS * 1_000_000)
+
+    stats = model.stats()
+    stats['status_in_window'] = status_sent
+    stats['expected_status'] = int(end_ns / (STATUS_PERIOD_MS * 1_000_000))
+    stats['frames_written'] = sum(len(data) // DATA_FRAME_LEN for _, data in writes if data[:2] == DATA_HEADER)
+    return stats
+
+
+def sustainable(stats):
+    """(ok, list of reasons) for one simulation result"""
+    reasons = []
+    if stats['rx_dropped']:
+        reasons.append(f"RX ring overflow: {stats['rx_dropped']:,} byte dibuang (ring {RX_BUF_SIZE})")
+    if stats['rome_dropped']:
+        reasons.append(f"rome_tx_queue penuh: {stats['rome_dropped']:,} paket device dibuang")
+    if stats['data_packets'] < stats['frames_written']:
+        reasons.append(f"Frame A5 99 hilang di parser: {stats['frames_written'] - stats['data_packets']:,}")
+    if stats['raspi_tx_busy']:
+        reasons.append(f"Status 99 A5 HAL_BUSY: {stats['raspi_tx_busy']:,} status tidak terkirim")
+    if stats['status_in_window'] < STATUS_MIN_RATIO * stats['expected_status']:
+        reasons.append(f"Status 99 A5 cuma {stats['status_in_window']:,}/{stats['expected_status']:,} "
+                       f"(main loop terlalu lambat untuk {1000 / STATUS_PERIOD_MS:.0f} Hz)")
+    return not reasons, reasons
+
+
+def max_sustainable_rate(host_status_hz, baud, burst, loop_us, duration_s, hi=SEARCH_MAX_HZ):
+    """Highest uplink rate (1 Hz resolution) with no drops in simulation"""
+    lo = 0
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        ok, _ = sustainable(simulate(mid, host_status_hz, baud, burst, loop_us, duration_s))
+        if ok:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def print_plan(args):
+    print("=" * 80)
+    print("RELAYV2 Link Planner")
+    print("=" * 80)
+    print(f"Baud {args.baud} ({args.baud / 10:,.0f} B/s per arah) | uplink {args.uplink_rate:g} Hz | "
+          f"host status {args.host_status_rate:g} Hz | burst {args.burst} | loop {args.loop_us:g} us")
+
+    print("\n📡 WIRE UTILISATION")
+    print(f"  {'Link':<30} {'Bytes/s':>10} {'Util':>8} {'Headroom':>10}")
+    print("  " + "-" * 62)
+    budget = wire_budget(args.uplink_rate, args.host_status_rate, args.baud)
+    for name, bps, util in budget:
+        flag = "❌" if util > 1 else ("⚠️ " if util > UTIL_WARNING else "✅")
+        print(f"  {name:<30} {bps:>10,.0f} {util * 100:>7.1f}% {(1 - util) * 100:>9.1f}%  {flag}")
+
+    stats = simulate(args.uplink_rate, args.host_status_rate, args.baud, args.burst, args.loop_us, args.duration)
+    print(f"\n🧮 FIRMWARE SIMULATION ({args.duration:g}s virtual + {DRAIN_MS} ms drain)")
+    print(f"  RX ring:        max {stats['rx_ring_max']}/{RX_BUF_SIZE - 1} byte, dropped {stats['rx_dropped']:,}")
+    print(f"  Parser:         DATA {stats['data_packets']:,}/{stats['frames_written']:,}  "
+          f"STATUS {stats['status_packets']:,}  GC shift/flush {stats['gc_shifts']}/{stats['gc_flushes']}")
+    print(f"  rome_tx_queue:  max {stats['rome_queue_max']}/{ROME_QUEUE_SIZE - 1}, avg {stats['rome_queue_avg']:.2f}, "
+          f"enq {stats['rome_enqueued']:,} dropped {stats['rome_dropped']:,} {stats['rome_dropped_by_device']}")
+    print(f"  Status TX:      {stats['status_in_window']:,}/{stats['expected_status']:,} "
+          f"(HAL_BUSY {stats['raspi_tx_busy']})")
+    print(f"  Nano TX:        {stats['nano_tx_sent']:,}")
+
+    ok, reasons = sustainable(stats)
+    bottleneck = max(budget, key=lambda link: link[2])
+    print("\n" + "=" * 80)
+    if ok:
+        print("✅ SUSTAINABLE")
+    else:
+        print("❌ NOT SUSTAINABLE")
+        for reason in reasons:
+            print(f"   - {reason}")
+    print(f"   Bottleneck wire: {bottleneck[0].strip()} ({bottleneck[2] * 100:.1f}%)")
+    if not args.no_search:
+        best = max_sustainable_rate(args.host_status_rate, args.baud, args.burst, args.loop_us, args.duration)
+        headroom = best - args.uplink_rate
+        if best == 0:
+            print("   Tidak ada rate uplink yang sustainable: masalah bukan di uplink (cek --loop-us / baud)")
+        else:
+            print(f"   Max uplink rate (burst {args.burst}, loop {args.loop_us:g} us): {best} Hz "
+                  f"({'+' if headroom >= 0 else ''}{headroom:g} Hz dari konfigurasi)")
+    print("=" * 80)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan UART rates for the RELAYV2 topology")
+    parser.add_argument('--uplink-rate', type=float, default=UPLINK_RATE_HZ, help="A5 99 frames per second")
+    parser.add_argument('--host-status-rate', type=float, default=HOST_STATUS_RATE_HZ,
+                        help="99 A5 packets per second sent by the Raspi")
+    parser.add_argument('--baud', type=int, default=BAUD_RATE)
+    parser.add_argument('--burst', type=int, default=1, help="frames written back-to-back per host write")
+    parser.add_argument('--loop-us', type=float, default=0, help="busy time of one firmware main loop pass")
+    parser.add_argument('--duration', type=float, default=SIM_DURATION, help="simulated seconds")
+    parser.add_argument('--no-search', action='store_true', help="skip the max-rate search")
+    print_plan(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,13 @@ Fitur:
 - Bisa pilih Device ID (Target)
 - Bisa input Sudut (0-360)
 - Otomatis handle encoding khusus Device 5 (EHSI Relative)
+- Trajectory mode (sweep / sine / step) via trajectory_player.py,
+  di-encode sekaligus dan dikirim dengan rate presisi
+- Semua kirim lewat CoalescingRomeSender (rome_sender.py): auto rotate
+  tidak kirim ulang nilai yang sama dan ada keepalive periodik
+- Calibration multi-titik (rome_calibration.py): tabel koreksi per
+  device disimpan di CALIBRATION_FILE dan langsung dipakai semua mode
+  kirim, tanpa re-flash ROME_DSC1
 
 Protocol Output: [0xBB, ID, MSB, LSB]
 """
@@ -16,10 +23,18 @@ import serial
 import time
 import sys
 
+from trajectory_player import TrajectoryPlayer, sweep, sine, step, DEFAULT_RATE_HZ
+from deadline_scheduler import format_stats
+from rome_sender import CoalescingRomeSender
+from rome_calibration import (CalibrationSet, Calibrator, operator_measure, sweep_points,
+                              CALIBRATION_FILE, DEFAULT_POINTS)
+
 # ===== KONFIGURASI =====
 SERIAL_PORT = 'COM14'   # Ganti dengan Port USB-TTL kamu
 BAUD_RATE = 115200
 DEFAULT_DEVICE_ID = 2   # Target Device ID Default
+DEADBAND = 0            # Auto rotate: perubahan raw < ini tidak dikirim (1 = 0.1 deg)
+KEEPALIVE_S = 1.0       # Auto rotate: kirim ulang nilai terakhir tiap N detik
 
 def get_valid_float(prompt):
     while True:
@@ -28,33 +43,72 @@ def get_valid_float(prompt):
         except ValueError:
             print("Input tidak valid. Masukkan angka.")
 
-def calculate_raw_data(device_id, angle):
-    """
-    Hitung Raw Data 16-bit berdasarkan Dev ID & Sudut.
-    """
-    if device_id == 5:
-        # === LOGIKA KHUSUS DEVICE 5 (EHSI) ===
-        # Encoding: (Angle + 179.9) * 10
-        # Range Angle: -180.0 s/d +180.0 (biasanya relative course)
-        
-        encoded_val = (angle + 179.9) * 10
-        
-        # Clamp limit agar tidak overflow uint16 jika user input aneh-aneh
-        # Tapi technically Device 5 support negative values via int16 casting di firmware
-        # Kita kirim sebagai unsigned 16-bit representation
-        
-        int_val = int(encoded_val)
-        
-        # Handle negative logic for python bitwise
-        if int_val < 0:
-            int_val = int_val & 0xFFFF  # Convert -1 to 0xFFFF
-            
-        return int_val
-    
+def get_float_default(prompt, default):
+    text = input(f"{prompt} (Default {default}) : ")
+    return float(text) if text.strip() else default
+
+def run_calibration(sender, calibration, device_id):
+    """Sweep N titik, operator ketik bacaan jarum, simpan tabel koreksi"""
+    print("\n--- CALIBRATION MODE (MULTI-POINT) ---")
+    points = int(get_float_default("Jumlah titik", DEFAULT_POINTS))
+    print("Di tiap titik: ketik sudut yang ditunjuk jarum, ENTER kalau sudah pas, 's' untuk skip.")
+    print("Tekan CTRL+C untuk batal (tabel lama tetap dipakai).\n")
+
+    # Sender tanpa koreksi: Calibrator sendiri yang menambahkan koreksi ke sudut
+    calibrator = Calibrator(CoalescingRomeSender(sender.ser, keepalive_s=None), operator_measure)
+    initial = calibration.tables.get(device_id)
+    try:
+        table, results = calibrator.run(
+            device_id, sweep_points(device_id, points), initial,
+            lambda target, corr, err: print(f"   -> koreksi {corr:+.2f}deg (error {err:+.2f})"))
+    except KeyboardInterrupt:
+        print("\n\nCalibration dibatalkan.")
+        return
+
+    # Posisi jarum sekarang dari Calibrator, bukan dari sender utama
+    sender.sent.pop(device_id, None)
+    calibration[device_id] = table
+    calibration.save(CALIBRATION_FILE)
+    print(f"\n\nCALIBRATION DONE! {len(results)}/{points} titik")
+    print("-" * 40)
+    for point, corr in zip(table.points, table.corrections):
+        print(f"  {point:7.1f}deg -> {corr:+6.2f}deg")
+    print("-" * 40)
+    print(f"Disimpan ke {CALIBRATION_FILE}, langsung aktif (tidak perlu re-upload firmware).\n")
+
+def run_trajectory(ser, device_id, calibration=None):
+    """Trajectory mode: encode seluruh gerakan sekali, kirim dengan deadline absolut"""
+    print("\n--- TRAJECTORY MODE ---")
+    kind = input("Jenis [sweep/sine/step] (Default sweep) : ").strip().lower() or 'sweep'
+    rate = get_float_default("Rate Hz", DEFAULT_RATE_HZ)
+
+    if kind == 'sweep':
+        start = get_float_default("Sudut awal", 0.0)
+        stop = get_float_default("Sudut akhir", 360.0)
+        duration = get_float_default("Durasi detik", 10.0)
+        angles = sweep(start, stop, max(1, round(duration * rate)))
+    elif kind == 'sine':
+        center = get_float_default("Center", 180.0)
+        amplitude = get_float_default("Amplitudo", 90.0)
+        freq = get_float_default("Frekuensi Hz", 0.2)
+        duration = get_float_default("Durasi detik", 10.0)
+        angles = sine(center, amplitude, freq, max(1, round(duration * rate)), rate)
+    elif kind == 'step':
+        levels = input("Level sudut, pisah koma (Default 0,90,180,270) : ").strip() or "0,90,180,270"
+        dwell = get_float_default("Tahan per level detik", 2.0)
+        angles = step([float(v) for v in levels.split(',')], dwell, rate)
     else:
-        # === LOGIKA STANDAR (Device 1, 2, 3, 4) ===
-        # Encoding: Angle * 10
-        return int(angle * 10)
+        print("Jenis tidak dikenal.")
+        return
+
+    player = TrajectoryPlayer(ser, [device_id], angles, rate, calibration=calibration)
+    print(f"{player.ticks} tick @ {rate:g} Hz ({player.duration_s:.1f}s). Tekan CTRL+C untuk stop.\n")
+    try:
+        player.play(lambda i: print(f"Traj: {player.angles[i, 0]:.1f}deg -> Raw: {player.raw[i, 0]}"))
+        print("\nTrajectory selesai.")
+    except KeyboardInterrupt:
+        print(f"\n\nTrajectory Stopped di tick {player.sent}/{player.ticks}.")
+    print(format_stats(player.scheduler.stats()))
 
 def main():
     print("="*60)
@@ -67,6 +121,10 @@ def main():
     except Exception as e:
         print(f"Connection Failed: {e}")
         return
+    calibration = CalibrationSet.load_if_exists(CALIBRATION_FILE)
+    if calibration.tables:
+        print(f"Calibration: {CALIBRATION_FILE} (device {', '.join(map(str, sorted(calibration.tables)))})")
+    sender = CoalescingRomeSender(ser, deadband=DEADBAND, keepalive_s=KEEPALIVE_S, calibration=calibration)
 
     try:
         while True:
@@ -91,7 +149,8 @@ def main():
             print("   Available Commands:")
             print("   [Number] : Set Angle (e.g. 120.5)")
             print("   'a'      : Auto Rotate (Animation)")
-            print("   'c'      : CALIBRATION MODE (Cari Offset)")
+            print("   't'      : Trajectory (sweep / sine / step, rate presisi)")
+            print("   'c'      : CALIBRATION MODE (Tabel koreksi multi-titik)")
             print("   'b'      : Back to Device Select")
             print("   'q'      : Quit App")
             print("-" * 40)
@@ -101,50 +160,12 @@ def main():
                 
                 # === COMMAND: CALIBRATION MODE ===
                 if user_val.lower() == 'c':
-                    print("\n--- CALIBRATION MODE ---")
-                    print("1. Putar jarum sampai menunjuk angka 0 (Zero Physical Position).")
-                    print("2. Gunakan: 'w/s' (+/- 10), 'd/a' (+/- 1), 'e/q' (+/- 0.1)")
-                    print("3. Tekan ENTER jika jarum sudah pas di 0.")
-                    
-                    calib_angle = 0.0
-                    while True:
-                        # Kirim Data
-                        raw_data = calculate_raw_data(device_id, calib_angle)
-                        msb = (raw_data >> 8) & 0xFF
-                        lsb = raw_data & 0xFF
-                        ser.write(bytearray([0xBB, device_id, msb, lsb]))
-                        
-                        print(f"\rCalib Angle: {calib_angle:.1f}deg | Raw Sent: {raw_data} (0x{raw_data:04X})  ", end="")
-                        
-                        # Input Kontrol
-                        key = input() # Tunggu enter
-                        if key == "": break # DONE
-                        
-                        if key == 'w': calib_angle += 10.0
-                        elif key == 's': calib_angle -= 10.0
-                        elif key == 'd': calib_angle += 1.0
-                        elif key == 'a': calib_angle -= 1.0
-                        elif key == 'e': calib_angle += 0.1
-                        elif key == 'q': calib_angle -= 0.1
-                        
-                        # Wrap around
-                        if calib_angle >= 360.0: calib_angle -= 360.0
-                        if calib_angle < 0.0: calib_angle += 360.0
-                    
-                    print(f"\n\nCALIBRATION DONE!")
-                    print(f"Saat ini Raw Data = 0x{raw_data:04X}")
-                    
-                    # Hitung Offset
-                    # Logika: Jika kita kirim X supaya jarum jadi 0.
-                    # Maka Offset yang harus diset di firmware adalah (65536 - X).
-                    # Supaya nanti kalau firmware dapet data 0, dia nambahin Offset ini dan outputnya jadi X.
-                    
-                    offset_needed = (65536 - raw_data) & 0xFFFF
-                    print("-" * 40)
-                    print(f"COPY KODE INI KE main.c:")
-                    print(f"#define DSC_ZERO_OFFSET   0x{offset_needed:04X}")
-                    print("-" * 40)
-                    print("Setelah update main.c, re-upload codingnya.\n")
+                    run_calibration(sender, calibration, device_id)
+                    continue
+
+                # === COMMAND: TRAJECTORY ===
+                if user_val.lower() == 't':
+                    run_trajectory(ser, device_id, calibration)
                     continue
 
                 # === COMMAND: AUTO ROTATE ===
@@ -163,11 +184,10 @@ def main():
                         curr_angle = 0.0
                         while True:
                             # 1. Hitung & Kirim
-                            raw_data = calculate_raw_data(device_id, curr_angle)
-                            msb = (raw_data >> 8) & 0xFF
-                            lsb = raw_data & 0xFF
-                            packet = bytearray([0xBB, device_id, msb, lsb])
-                            ser.write(packet)
+                            # Nilai sama / dalam deadband tidak dikirim ulang
+                            sender.set_angle(device_id, curr_angle)
+                            sender.flush()
+                            raw_data = sender.latest[device_id]
                             
                             # 2. Print Status (Overwrite line for clean look via \r, or simple print)
                             # print(f"\rSudut: {curr_angle:>6.1f}deg | Raw: {raw_data:>5}", end="", flush=True)
@@ -199,20 +219,19 @@ def main():
                 except ValueError:
                     # If not a command and not a number, skip
                     if user_val.strip() != "":
-                        print("Masukkan angka atau command 'a'/'b'/'c'/'q'")
+                        print("Masukkan angka atau command 'a'/'t'/'b'/'c'/'q'")
                     continue
                 
-                # 3. Hitung Raw Data
-                raw_data = calculate_raw_data(device_id, target_angle)
+                # 3. Kirim Paket: 0xBB, ID, MSB, LSB (input manual selalu dikirim)
+                # Raw dihitung sender: encode_angles() (trajectory_player.py) + koreksi kalibrasi
+                sender.set_angle(device_id, target_angle)
+                sender.flush(force=True)
                 
                 # Pecah ke MSB LSB
+                raw_data = sender.latest[device_id]
                 msb = (raw_data >> 8) & 0xFF
                 lsb = raw_data & 0xFF
                 
-                # 4. Kirim Paket: 0xBB, ID, MSB, LSB
-                packet = bytearray([0xBB, device_id, msb, lsb])
-                ser.write(packet)
-                
                 print(f"   SENT: [BB {device_id:02X} {msb:02X} {lsb:02X}] -> Raw: {raw_data} (Angle: {target_angle})")
 
     except KeyboardInterrupt:
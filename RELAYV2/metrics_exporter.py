@@ -0,0 +1,195 @@
+"""
+Metrics Exporter - OpenMetrics over HTTP (localhost)
+====================================================
+Endpoint opsional untuk soak test: monitor tool cukup register objek
+statistiknya, lalu Prometheus / curl scrape http://127.0.0.1:<port>/metrics.
+
+- RX path tidak disentuh: counter tetap int biasa yang di-update oleh
+  thread RX (tanpa lock). Exporter hanya membaca atribut saat scrape,
+  jadi biaya per paket nol.
+- Persentil histogram dihitung saat scrape saja.
+- Server bind ke 127.0.0.1 secara default.
+
+Metrik per port (label port="..."):
+    relay_link_bytes_total, relay_link_frames_total{kind}
+    relay_link_resyncs_total, relay_link_discarded_bytes_total
+    relay_link_frame_rate_hz{kind}         (sliding window sampai saat scrape)
+    relay_link_interval_seconds{kind,quantile}  (quantile: window,
+                                           _count / _sum: all-time)
+    relay_link_stalls_total, relay_link_stalled,
+    relay_link_last_stall_gap_seconds, relay_link_last_frame_age_seconds
+
+Contoh:
+    exporter = MetricsExporter(port=9464)
+    exporter.add_link('raspi', diag)      # uart_diagnostic.LinkDiagnostics
+    exporter.add_framer('sniff', framer)  # stream_framer.StreamFramer
+    exporter.start()
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from latency_histogram import PERCENTILES, NS_PER_S
+
+# ===== CONFIGURATION =====
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 9464
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PREFIX = 'relay_link'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class MetricFamily:
+    """One metric family collected at scrape time"""
+
+    def __init__(self, name, kind, help_text, unit=None):
+        self.name = name
+        self.kind = kind  # 'counter' | 'gauge' | 'summary'
+        self.help = help_text
+        self.unit = unit
+        self.samples = []  # (suffix, labels, value)
+
+    def add(self, labels, value, suffix=''):
+        self.samples.append((suffix, labels, value))
+
+    def render(self, lines):
+        lines.append(f'# TYPE {self.name} {self.kind}')
+        if self.unit:
+            lines.append(f'# UNIT {self.name} {self.unit}')
+        lines.append(f'# HELP {self.name} {self.help}')
+        for suffix, labels, value in self.samples:
+            lines.append(f'{self.name}{suffix}{_labels(labels)} {value}')
+
+
+def collect_framer(port, framer):
+    """Families for a bare StreamFramer"""
+    frames = MetricFamily(f'{PREFIX}_frames', 'counter', 'Frames decoded')
+    for kind, count in framer.frame_counts.items():
+        frames.add({'port': port, 'kind': kind}, count, '_total')
+
+    families = [frames]
+    for name, help_text, value in (
+        ('bytes', 'Bytes received', framer.bytes_in),
+        ('resyncs', 'Loss-of-sync events', framer.resyncs),
+        ('discarded_bytes', 'Bytes discarded while resynchronising', framer.discarded_bytes),
+    ):
+        family = MetricFamily(f'{PREFIX}_{name}', 'counter', help_text)
+        family.add({'port': port}, value, '_total')
+        families.append(family)
+    return families
+
+
+def collect_link(port, link, now_ns=None):
+    """Families for a uart_diagnostic.LinkDiagnostics"""
+    families = collect_framer(port, link.framer)
+    if now_ns is None:
+        now_ns = time.monotonic_ns()
+
+    rate = MetricFamily(f'{PREFIX}_frame_rate_hz', 'gauge', 'Frame rate over the sliding window')
+    interval = MetricFamily(f'{PREFIX}_interval_seconds', 'summary', 'Frame inter-arrival time', 'seconds')
+    for kind, gaps in link.gaps.items():
+        labels = {'port': port, 'kind': kind}
+        rate.add(labels, link.window_rate(kind, now_ns))
+        # Quantile dari sliding window sampai sekarang; _count / _sum all-time (harus monotonic)
+        window = gaps.window(now_ns)
+        for p, value in zip(PERCENTILES, window.percentiles()):
+            interval.add({**labels, 'quantile': f'{p / 100:g}'}, value / NS_PER_S)
+        interval.add(labels, gaps.all_time.count, '_count')
+        interval.add(labels, gaps.all_time.total / NS_PER_S, '_sum')
+    families += [rate, interval]
+
+    stalls = MetricFamily(f'{PREFIX}_stalls', 'counter', 'Stall events (no frame for stuck timeout)')
+    stalls.add({'port': port}, len(link.stall_events), '_total')
+    stalled = MetricFamily(f'{PREFIX}_stalled', 'gauge', '1 while the link is stalled')
+    stalled.add({'port': port}, int(link.stalled))
+    last_gap = MetricFamily(f'{PREFIX}_last_stall_gap_seconds', 'gauge', 'Gap that triggered the last stall', 'seconds')
+    last_gap.add({'port': port}, link.stall_events[-1][1] if link.stall_events else 0)
+    since = MetricFamily(f'{PREFIX}_last_frame_age_seconds', 'gauge', 'Time since the last framed packet', 'seconds')
+    last = link.last_packet_ns
+    since.add({'port': port}, (now_ns - last) / NS_PER_S if last is not None else 'NaN')
+    families += [stalls, stalled, last_gap, since]
+    return families
+
+
+class MetricsExporter:
+    """Opt-in localhost HTTP endpoint serving OpenMetrics text"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._collectors = []
+        self._server = None
+        self._thread = None
+        self.scrapes = 0
+
+    def add_collector(self, collect):
+        """collect() -> list of MetricFamily, called on every scrape"""
+        self._collectors.append(collect)
+
+    def add_framer(self, port, framer):
+        self.add_collector(lambda: collect_framer(port, framer))
+
+    def add_link(self, port, link):
+        self.add_collector(lambda: collect_link(port, link))
+
+    def render(self):
+        """Serialise every collector (merging families with the same name)"""
+        merged = {}
+        for collect in self._collectors:
+            for family in collect():
+                if family.name in merged:
+                    merged[family.name].samples += family.samples
+                else:
+                    merged[family.name] = family
+        lines = []
+        for family in merged.values():
+            family.render(lines)
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def start(self):
+        """Serve /metrics from a daemon thread"""
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                exporter.scrapes += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Jangan ganggu output monitor
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}/metrics'
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -1,12 +1,18 @@
 import serial
 import time
-from datetime import datetime
+
+from stream_framer import StreamFramer, DATA
+from metrics_exporter import MetricsExporter
+from frame_ring import FrameRing, format_time
+from frame_codec import device_angles
 
 # ===== CONFIGURATION =====
 SERIAL_PORT = 'COM14'  # Port untuk sniff data Raspy -> RELAYV2
 BAUD_RATE = 115200
 TIMEOUT = 1  # seconds
 DISPLAY_INTERVAL = 10  # Display every N seconds (UBAH DI SINI!)
+METRICS_PORT = None  # Contoh: 9464 -> http://127.0.0.1:9464/metrics (opsional)
+RING_CAPACITY = 4096  # Frame mentah yang disimpan (decode hanya saat display)
 
 # ===== STATISTICS =====
 packet_count = 0
@@ -45,6 +51,29 @@ def decode_gps_ins(discrete_c):
     """Decode GPS/INS from Discrete C bit 2"""
     return "GPS" if (discrete_c & (1 << 2)) == 0 else "INS"
 
+def snapshot(ring):
+    """Decode only the newest frame in the ring into the display dict"""
+    frame, t_ns = ring.latest()
+    discrete_b = int(frame['discrete_b'])
+    discrete_c = int(frame['discrete_c'])
+    angles = device_angles(frame)
+    rome_data = {}
+    for i in range(5):
+        rome_data[f'rome_{i + 1}_raw'] = int(frame['device'][i])
+        rome_data[f'rome_{i + 1}_angle'] = float(angles[i])
+    return {
+        'timestamp': format_time(t_ns),
+        'mode': decode_mode(discrete_b),
+        'nav_source': decode_nav_source(discrete_b),
+        'country': decode_country(discrete_c),
+        'gps_ins': decode_gps_ins(discrete_c),
+        'discrete_a': int(frame['discrete_a']),
+        'discrete_b': discrete_b,
+        'discrete_c': discrete_c,
+        'rate': ring.rate(),
+        **rome_data
+    }
+
 def display_data(data):
     """Display complete data in organized format"""
     timestamp = data['timestamp']
@@ -92,93 +121,33 @@ def main():
         # Flush input buffer
         ser.reset_input_buffer()
         
-        buffer = bytearray()
+        framer = StreamFramer((DATA,))
+        if METRICS_PORT:
+            exporter = MetricsExporter(port=METRICS_PORT).start()
+            exporter.add_framer(SERIAL_PORT, framer)
+            print(f"Metrics: {exporter.url}\n")
+        ring = FrameRing(RING_CAPACITY)
         last_display_time = time.time()
-        last_count_time = time.time()
-        last_packet_count = 0
-        latest_data = None
         
         while True:
             # Read available data
             if ser.in_waiting > 0:
                 data = ser.read(ser.in_waiting)
-                buffer.extend(data)
+                framer.feed(data)
+                now_ns = time.monotonic_ns()
+                
+                # Framer cari header A5 99 dan buang byte sampah.
+                # Per paket cuma simpan 15 byte mentah + timestamp;
+                # decode / format jam hanya untuk paket yang ditampilkan.
+                for _, packet in framer.frames():
+                    ring.append(packet, now_ns)
+                total_packets = ring.seq
                 
-                # Look for packet header (A5 99)
-                while len(buffer) >= 15:
-                    # Find header
-                    header_idx = -1
-                    for i in range(len(buffer) - 1):
-                        if buffer[i] == 0xA5 and buffer[i+1] == 0x99:
-                            header_idx = i
-                            break
-                    
-                    if header_idx == -1:
-                        # No header found, keep last byte
-                        buffer = buffer[-1:]
-                        break
-                    
-                    # Remove data before header
-                    if header_idx > 0:
-                        buffer = buffer[header_idx:]
-                    
-                    # Check if we have full packet (15 bytes)
-                    if len(buffer) >= 15:
-                        packet = buffer[:15]
-                        buffer = buffer[15:]
-                        
-                        # Parse packet: [A5 99 | DA DB DC | D1_MSB D1_LSB D2_MSB D2_LSB ... D5_MSB D5_LSB]
-                        discrete_a = packet[2]
-                        discrete_b = packet[3]
-                        discrete_c = packet[4]
-                        
-                        # Parse ROME devices (5 devices, 2 bytes each)
-                        rome_data = {}
-                        for i in range(5):
-                            dev_id = i + 1
-                            msb = packet[5 + (i * 2)]
-                            lsb = packet[6 + (i * 2)]
-                            raw_value = (msb << 8) | lsb
-                            
-                            # CORRECT FORMULA: Convert raw (0-65535) to degrees (0-360)
-                            angle = (raw_value * 360.0) / 65535.0
-                            
-                            rome_data[f'rome_{dev_id}_raw'] = raw_value
-                            rome_data[f'rome_{dev_id}_angle'] = angle
-                        
-                        # Calculate rate
-                        current_time = time.time()
-                        time_diff = current_time - last_count_time
-                        if time_diff >= 1.0:
-                            rate = (total_packets - last_packet_count) / time_diff
-                            last_packet_count = total_packets
-                            last_count_time = current_time
-                        else:
-                            rate = 0
-                        
-                        # Store latest data
-                        latest_data = {
-                            'timestamp': datetime.now().strftime("%H:%M:%S.%f")[:-3],
-                            'mode': decode_mode(discrete_b),
-                            'nav_source': decode_nav_source(discrete_b),
-                            'country': decode_country(discrete_c),
-                            'gps_ins': decode_gps_ins(discrete_c),
-                            'discrete_a': discrete_a,
-                            'discrete_b': discrete_b,
-                            'discrete_c': discrete_c,
-                            'rate': rate,
-                            **rome_data
-                        }
-                        
-                        total_packets += 1
-                        
-                        # Display every N seconds
-                        if current_time - last_display_time >= DISPLAY_INTERVAL:
-                            if latest_data:
-                                display_data(latest_data)
-                                last_display_time = current_time
-                    else:
-                        break
+                # Display every N seconds
+                current_time = time.time()
+                if current_time - last_display_time >= DISPLAY_INTERVAL and ring.seq:
+                    display_data(snapshot(ring))
+                    last_display_time = current_time
             
             # Small delay to prevent CPU hogging
             time.sleep(0.001)
@@ -195,6 +164,9 @@ def main():
         print(f"\n\nMonitoring stopped by user")
         print(f"\nFinal Statistics:")
         print(f"   Total packets decoded: {total_packets:,}")
+        if 'framer' in locals():
+            print(f"   Resyncs:               {framer.resyncs:,}")
+            print(f"   Bytes discarded:       {framer.discarded_bytes:,}")
     
     finally:
         if 'ser' in locals() and ser.is_open:
@@ -1,43 +1,53 @@
-import serial
+import asyncio
 import time
 import sys
 
+import serial
+
+from async_serial import open_serial
+from capture_file import CaptureWriter, PORT_RASPI, DIR_RX
+
 # Konfigurasi COM PORT
 COM_PORT = 'COM13'
 BAUD_RATE = 115200
+CAPTURE_FILE = None  # Contoh: 'sesi_com13.rcap' untuk rekam semua data RX
 
-def monitor_uart():
+async def monitor_uart():
     print(f"Membuka {COM_PORT} dengan baudrate {BAUD_RATE}...")
+    port = None
+    capture = CaptureWriter(CAPTURE_FILE) if CAPTURE_FILE else None
     try:
-        ser = serial.Serial(COM_PORT, BAUD_RATE, timeout=0.1)
+        port = await open_serial(COM_PORT, BAUD_RATE)
         print("Berhasil terhubung! Tekan Ctrl+C untuk berhenti.")
         print("-" * 50)
-        
-        while True:
-            # Baca data yang tersedia
-            if ser.in_waiting > 0:
-                data = ser.read(ser.in_waiting)
-                
-                # Format ke HEX string (contoh: 99 A5 01)
-                hex_string = ' '.join(f'{b:02X}' for b in data)
-                
-                # Print Hex dan ASCII (kalau ada text terselip)
-                timestamp = time.strftime("[%H:%M:%S]")
-                print(f"{timestamp} RAW HEX: {hex_string}")
-                
-            time.sleep(0.01) # Istirahat dikit biar CPU gak panas
+
+        # Tunggu data dari event loop (tanpa polling in_waiting / sleep)
+        async for t_ns, data in port:
+            if capture is not None:
+                capture.write(data, PORT_RASPI, DIR_RX, t_ns)
+
+            # Format ke HEX string (contoh: 99 A5 01)
+            hex_string = ' '.join(f'{b:02X}' for b in data)
+
+            # Print Hex dan ASCII (kalau ada text terselip)
+            timestamp = time.strftime("[%H:%M:%S]")
+            print(f"{timestamp} RAW HEX: {hex_string}")
 
     except serial.SerialException as e:
         print(f"Error membuka port {COM_PORT}: {e}")
         print("Pastikan port tidak sedang dipakai aplikasi lain (seperti Serial Monitor IDE).")
-    except KeyboardInterrupt:
-        print("\nMonitoring dihentikan.")
     except Exception as e:
         print(f"Terjadi kesalahan: {e}")
     finally:
-        if 'ser' in locals() and ser.is_open:
-            ser.close()
+        if port is not None and port.is_open:
+            port.close()
             print("Port ditutup.")
+        if capture is not None:
+            capture.close()
+            print(f"Capture disimpan: {CAPTURE_FILE} ({capture.records} record)")
 
 if __name__ == "__main__":
-    monitor_uart()
+    try:
+        asyncio.run(monitor_uart())
+    except KeyboardInterrupt:
+        print("\nMonitoring dihentikan.")
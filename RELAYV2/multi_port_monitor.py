@@ -0,0 +1,442 @@
+"""
+Multi-Port Monitor - Raspi / ROME / Nano Correlation
+====================================================
+Monitor tiga bus RELAYV2 sekaligus dan korelasikan di satu timeline:
+    RASPI  (sniff PA10)  A5 99 DA DB DC D1..D5   Raspi -> RELAYV2, 200 Hz
+    ROME   (USART2 TX)   BB ID MSB LSB           RELAYV2 -> device 1..5
+    NANO   (USART3 TX)   AA 01 04 D2             RELAYV2 -> Nano, tiap 300 ms
+
+Satu worker asyncio per port (async_serial, timestamp time.monotonic_ns()
+saat byte dibaca). Chunk dari semua port digabung lewat reorder buffer
+kecil (REORDER_MS) supaya urutan waktu tetap monoton walaupun worker
+selesai tidak berurutan.
+
+Korelasi fan-out: firmware meneruskan word device apa adanya
+(Queue_ROME(i+1, payload[3+i*2], payload[4+i*2]), payload = frame tanpa
+header A5 99), jadi setiap paket BB ID MSB LSB dicocokkan ke frame A5 99
+paling lama yang slot ID-nya belum terisi dan nilainya sama. Frame ditutup kalau kelima slot sudah
+terisi atau setelah MATCH_TIMEOUT_MS.
+    forward latency  = t(BB) - t(A5 99), per device
+    fan-out          = berapa dari 5 device yang benar-benar diteruskan
+    orphan           = paket BB tanpa frame A5 99 yang cocok
+
+Usage:
+    python multi_port_monitor.py
+    python multi_port_monitor.py --raspi /dev/ttyUSB0 --rome /dev/ttyUSB1 --nano /dev/ttyUSB2
+    python multi_port_monitor.py --capture sesi.rcap       (rekam ketiga port)
+    python multi_port_monitor.py --replay sesi.rcap        (analisa capture)
+"""
+
+import argparse
+import asyncio
+import heapq
+import time
+from collections import deque
+from datetime import datetime
+
+import serial
+
+from async_serial import open_serial
+from capture_file import CaptureWriter, CaptureReader, DIR_RX, PORT_RASPI, PORT_ROME, PORT_NANO, PORT_NAMES
+from frame_codec import NUM_DEVICES
+from latency_histogram import WindowedHistogram, format_summary, NS_PER_MS, NS_PER_S
+from metrics_exporter import MetricsExporter
+from stream_framer import StreamFramer, DATA, ROME, NANO
+
+# ===== CONFIGURATION =====
+RASPI_PORT = 'COM14'  # Sniff Raspi -> RELAYV2 (PA10)
+ROME_PORT = 'COM15'   # RELAYV2 -> ROME devices
+NANO_PORT = 'COM16'   # RELAYV2 -> Nano
+BAUD_RATE = 115200
+
+MATCH_TIMEOUT_MS = 100  # Frame A5 99 ditutup kalau BB belum lengkap setelah ini
+REORDER_MS = 5          # Toleransi urutan timestamp antar worker
+REPORT_INTERVAL = 1     # seconds - print status tiap N detik
+STATS_WINDOW = 10       # seconds - sliding window latency / rate
+NANO_PERIOD_MS = 300    # Periode nominal paket Nano
+CAPTURE_FILE = None     # Contoh: 'multi_port.rcap' untuk rekam ketiga port
+METRICS_PORT = None     # Contoh: 9464 -> http://127.0.0.1:9464/metrics (opsional)
+
+# (nama, tag port di capture, jenis frame)
+LINKS = (
+    ('RASPI', PORT_RASPI, (DATA,)),
+    ('ROME', PORT_ROME, (ROME,)),
+    ('NANO', PORT_NANO, (NANO,)),
+)
+
+
+class _PendingFrame:
+    """One uplink A5 99 frame waiting for its five ROME packets"""
+
+    __slots__ = ('t_ns', 'seq', 'values', 'matched_ns', 'matched')
+
+    def __init__(self, t_ns, seq, values):
+        self.t_ns = t_ns
+        self.seq = seq
+        self.values = values
+        self.matched_ns = [None] * NUM_DEVICES
+        self.matched = 0
+
+
+class FanoutCorrelator:
+    """Pair each uplink frame with the BB packets forwarded from it"""
+
+    def __init__(self, match_timeout_ms=MATCH_TIMEOUT_MS, window_s=STATS_WINDOW):
+        self.timeout_ns = int(match_timeout_ms * NS_PER_MS)
+        self._pending = deque()
+
+        # Statistics
+        self.frames_in = 0
+        self.frames_closed = 0
+        self.fanout = [0] * (NUM_DEVICES + 1)   # jumlah frame per fan-out 0..5
+        self.missing = [0] * NUM_DEVICES        # slot tidak diteruskan, per device
+        self.orphans = [0] * NUM_DEVICES        # BB tanpa frame yang cocok, per device
+        self.bad_ids = 0                        # BB dengan ID di luar 1..5
+        self.latency = [WindowedHistogram(window_s=window_s) for _ in range(NUM_DEVICES)]
+        self.first_latency = WindowedHistogram(window_s=window_s)  # frame -> BB pertama
+        self.last_latency = WindowedHistogram(window_s=window_s)   # frame -> BB terakhir
+        self.on_close = None  # callback(frame) saat frame ditutup (timeline)
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def uplink(self, t_ns, frame):
+        """Register one A5 99 frame (15 bytes) seen on the Raspi bus"""
+        self.expire(t_ns)
+        values = tuple((frame[5 + i * 2] << 8) | frame[6 + i * 2] for i in range(NUM_DEVICES))
+        self._pending.append(_PendingFrame(t_ns, self.frames_in, values))
+        self.frames_in += 1
+
+    def downlink(self, t_ns, packet):
+        """
+        Match one BB ID MSB LSB packet seen on the ROME bus.
+
+        Returns:
+            (frame, slot) that was matched, or None for an orphan
+        """
+        self.expire(t_ns)
+        slot = packet[1] - 1
+        if not 0 <= slot < NUM_DEVICES:
+            self.bad_ids += 1
+            return None
+        value = (packet[2] << 8) | packet[3]
+
+        # FIFO: frame paling lama dulu, sama seperti antrian ROME di firmware
+        for frame in self._pending:
+            if frame.matched_ns[slot] is None and frame.values[slot] == value and frame.t_ns <= t_ns:
+                frame.matched_ns[slot] = t_ns
+                frame.matched += 1
+                self.latency[slot].record(t_ns - frame.t_ns, t_ns)
+                if frame.matched == NUM_DEVICES:
+                    self._pending.remove(frame)
+                    self._close(frame, t_ns)
+                return frame, slot
+
+        self.orphans[slot] += 1
+        return None
+
+    def expire(self, t_ns):
+        """Close frames older than the match timeout"""
+        pending = self._pending
+        while pending and t_ns - pending[0].t_ns > self.timeout_ns:
+            self._close(pending.popleft(), t_ns)
+
+    def flush(self, t_ns=None):
+        """Close every pending frame (end of run)"""
+        while self._pending:
+            frame = self._pending.popleft()
+            self._close(frame, frame.t_ns if t_ns is None else t_ns)
+
+    def _close(self, frame, t_ns):
+        self.frames_closed += 1
+        self.fanout[frame.matched] += 1
+        matched = [t for t in frame.matched_ns if t is not None]
+        for slot, t in enumerate(frame.matched_ns):
+            if t is None:
+                self.missing[slot] += 1
+        if matched:
+            self.first_latency.record(min(matched) - frame.t_ns, t_ns)
+            self.last_latency.record(max(matched) - frame.t_ns, t_ns)
+        if self.on_close is not None:
+            self.on_close(frame)
+
+    @property
+    def complete_ratio(self):
+        """Fraction of closed frames forwarded to all five devices"""
+        return self.fanout[NUM_DEVICES] / self.frames_closed if self.frames_closed else 0.0
+
+
+class MultiPortMonitor:
+    """Merge chunks from several ports onto one timeline and correlate them"""
+
+    def __init__(self, links=LINKS, match_timeout_ms=MATCH_TIMEOUT_MS,
+                 reorder_ms=REORDER_MS, window_s=STATS_WINDOW):
+        self.links = links
+        self.framers = {name: StreamFramer(kinds) for name, _, kinds in links}
+        self.correlator = FanoutCorrelator(match_timeout_ms, window_s)
+        self.nano_period = WindowedHistogram(window_s=window_s)
+        self.reorder_ns = int(reorder_ms * NS_PER_MS)
+
+        self._heap = []  # (t_ns, seq, name, data)
+        self._seq = 0
+        self.t0_ns = None
+        self.last_t_ns = None
+        self.out_of_order = 0  # chunk yang datang setelah timeline sudah lewat
+        self.sessions = 1
+        self.on_frame = None   # callback(t_ns, name, kind, frame) untuk timeline
+
+    def push(self, t_ns, name, data):
+        """Queue one received chunk (any port, any order within reorder_ms)"""
+        heapq.heappush(self._heap, (t_ns, self._seq, name, bytes(data)))
+        self._seq += 1
+
+    def drain(self, now_ns=None):
+        """Process queued chunks older than now - reorder_ms (all if now is None)"""
+        heap = self._heap
+        limit = None if now_ns is None else now_ns - self.reorder_ns
+        while heap and (limit is None or heap[0][0] <= limit):
+            t_ns, _, name, data = heapq.heappop(heap)
+            self._process(t_ns, name, data)
+
+    def _process(self, t_ns, name, data):
+        if self.t0_ns is None:
+            self.t0_ns = t_ns
+        if self.last_t_ns is not None and t_ns < self.last_t_ns:
+            self.out_of_order += 1
+            t_ns = self.last_t_ns  # jaga timeline tetap monoton
+        self.last_t_ns = t_ns
+
+        framer = self.framers[name]
+        framer.feed(data)
+        correlator = self.correlator
+        nano = False
+        for kind, frame in framer.frames():
+            frame = bytes(frame)
+            if self.on_frame is not None:
+                self.on_frame(t_ns, name, kind, frame)
+            if kind == DATA:
+                correlator.uplink(t_ns, frame)
+            elif kind == ROME:
+                correlator.downlink(t_ns, frame)
+            elif kind == NANO:
+                nano = True
+        if nano:
+            # Satu timestamp per chunk: periode dicatat sekali, bukan gap 0 ms
+            self.nano_period.record_arrival(t_ns)
+        correlator.expire(t_ns)
+
+    def finish(self):
+        self.drain()
+        self.correlator.flush(self.last_t_ns)
+
+    def new_session(self):
+        """
+        Capture clock restarted (reboot): close everything from the
+        previous session and drop partial frames, keep the statistics.
+        """
+        self.finish()
+        for framer in self.framers.values():
+            framer.reset()
+        self.nano_period.break_arrivals()
+        self.t0_ns = None
+        self.sessions += 1
+
+    def frame_counts(self):
+        """{port name: frames framed so far}"""
+        return {name: sum(framer.frame_counts.values()) for name, framer in self.framers.items()}
+
+
+# ===== OUTPUT =====
+
+def format_hex(data):
+    return ' '.join(f'{b:02X}' for b in data)
+
+
+def print_timeline_frame(monitor, t_ns, name, kind, frame):
+    print(f"+{(t_ns - monitor.t0_ns) / NS_PER_S:10.6f}s {name:<6} {format_hex(frame)}")
+
+
+def print_timeline_close(monitor, frame):
+    parts = []
+    for slot, t in enumerate(frame.matched_ns):
+        parts.append(f"D{slot + 1} {(t - frame.t_ns) / NS_PER_MS:5.2f}" if t is not None else f"D{slot + 1}  miss")
+    print(f"{'':13}frame #{frame.seq:<7} fan-out {frame.matched}/{NUM_DEVICES}  " + "  ".join(parts) + " ms")
+
+
+def print_header(ports):
+    print("=" * 100)
+    print("Multi-Port Monitor - Raspi / ROME / Nano")
+    print("=" * 100)
+    for (name, _, kinds), path in zip(LINKS, ports):
+        print(f"{name:<6} {path or '-':<16} frames: {', '.join(kinds)}")
+    print(f"Match timeout: {MATCH_TIMEOUT_MS} ms  Reorder: {REORDER_MS} ms  Window: {STATS_WINDOW}s")
+    print("=" * 100)
+    print(f"{'Time':<10} {'A5 99/s':>8} {'BB/s':>8} {'Nano/s':>7} {'Fan-out':>8} "
+          f"{'Lat p50':>8} {'Lat p99':>8} {'Orphan':>7} {'Missing':>8}")
+    print("-" * 100)
+
+
+def print_status(monitor, rates):
+    corr = monitor.correlator
+    window = corr.last_latency.window()
+    p50, p99 = window.percentiles((50, 99)) if window.count else (0, 0)
+    stamp = datetime.now().strftime("%H:%M:%S")
+    print(f"{stamp:<10} {rates['RASPI']:>8.1f} {rates['ROME']:>8.1f} {rates['NANO']:>7.2f} "
+          f"{corr.complete_ratio * 100:>7.1f}% {p50 / NS_PER_MS:>6.2f}ms {p99 / NS_PER_MS:>6.2f}ms "
+          f"{sum(corr.orphans):>7,} {sum(corr.missing):>8,}")
+
+
+def print_report(monitor):
+    corr = monitor.correlator
+    print("\n" + "=" * 100)
+    print("📊 MULTI-PORT REPORT")
+    print("=" * 100)
+    for name, framer in monitor.framers.items():
+        counts = ', '.join(f"{kind} {n:,}" for kind, n in framer.frame_counts.items())
+        print(f"  {name:<6} {framer.bytes_in:>10,} bytes  {counts}  resyncs {framer.resyncs:,}  "
+              f"discarded {framer.discarded_bytes:,}")
+    if monitor.out_of_order:
+        print(f"  Out-of-order chunks (> {REORDER_MS} ms): {monitor.out_of_order:,}")
+    if monitor.sessions > 1:
+        print(f"  Capture sessions: {monitor.sessions} (korelasi direset di tiap reboot)")
+
+    print(f"\n  Uplink frames: {corr.frames_in:,} (closed {corr.frames_closed:,})")
+    print(f"  Fan-out completeness: {corr.complete_ratio * 100:.2f}% frames forwarded to all {NUM_DEVICES} devices")
+    for n in range(NUM_DEVICES, -1, -1):
+        if corr.fanout[n]:
+            print(f"    {n}/{NUM_DEVICES}: {corr.fanout[n]:,}")
+    print(f"  Orphan BB packets: {sum(corr.orphans):,}  Bad device IDs: {corr.bad_ids:,}")
+
+    print("\n  Forward latency (A5 99 -> BB):")
+    print(f"    first   {format_summary(corr.first_latency.summary())}")
+    print(f"    last    {format_summary(corr.last_latency.summary())}")
+    for slot, hist in enumerate(corr.latency):
+        print(f"    D{slot + 1}      {format_summary(hist.summary())}  "
+              f"missing {corr.missing[slot]:,} orphan {corr.orphans[slot]:,}")
+
+    print(f"\n  Nano period (nominal {NANO_PERIOD_MS} ms): {format_summary(monitor.nano_period.summary())}")
+    print("=" * 100)
+
+
+# ===== LIVE / REPLAY =====
+
+async def run_live(monitor, ports, capture=None, duration=None):
+    """One reader task per port plus a report task on a single event loop"""
+    opened = []
+    try:
+        for (name, tag, _), path in zip(LINKS, ports):
+            if path:
+                opened.append((name, tag, await open_serial(path, BAUD_RATE)))
+                print(f"✅ {name} connected: {path}")
+        print()
+
+        async def worker(name, tag, port):
+            async for t_ns, data in port:
+                if capture is not None:
+                    capture.write(data, tag, DIR_RX, t_ns)
+                monitor.push(t_ns, name, data)
+                monitor.drain(time.monotonic_ns())
+
+        workers = [asyncio.create_task(worker(*link)) for link in opened]
+
+        end_ns = None if duration is None else time.monotonic_ns() + int(duration * NS_PER_S)
+        last_counts = monitor.frame_counts()
+        last_ns = time.monotonic_ns()
+        try:
+            while end_ns is None or time.monotonic_ns() < end_ns:
+                await asyncio.sleep(REPORT_INTERVAL)
+                for task in workers:
+                    if task.done():
+                        task.result()  # Port error -> raise di sini
+                now_ns = time.monotonic_ns()
+                monitor.drain(now_ns)
+                counts = monitor.frame_counts()
+                elapsed = (now_ns - last_ns) / NS_PER_S
+                rates = {name: (counts[name] - last_counts[name]) / elapsed for name in counts}
+                last_counts, last_ns = counts, now_ns
+                print_status(monitor, rates)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+    finally:
+        for _, _, port in opened:
+            port.close()
+
+
+def run_replay(monitor, path):
+    """
+    Feed every RX record of a capture through the same merge path.
+
+    Tiap session capture (jam mulai ulang setelah reboot) di-anchor
+    ulang tepat setelah session sebelumnya dan monitor.new_session()
+    dipanggil di batasnya, jadi frame tidak dikorelasikan lintas reboot.
+    """
+    with CaptureReader(path) as reader:
+        names = {tag: name for name, tag, _ in LINKS}
+        stamps = reader.index['t_ns']
+        end_ns = 0  # Akhir timeline session sebelumnya
+        for session in range(len(reader.sessions) if len(reader) else 0):
+            start, stop = reader.session_range(session)
+            offset = end_ns - int(stamps[start])
+            if session:
+                monitor.new_session()
+            for t_ns, tag, _, payload in reader.records(direction=DIR_RX, start=start, stop=stop):
+                if tag in names:
+                    monitor.push(t_ns + offset, names[tag], payload)
+                    monitor.drain(t_ns + offset)
+            end_ns = int(stamps[start:stop].max()) + offset
+        print(f"Replayed {len(reader):,} records, {reader.duration_s:.1f}s, {len(reader.sessions)} session(s) "
+              f"({', '.join(PORT_NAMES[tag] for tag in names)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Correlate Raspi, ROME and Nano UART traffic")
+    parser.add_argument('--raspi', default=RASPI_PORT, help="Raspi sniff port ('' = off)")
+    parser.add_argument('--rome', default=ROME_PORT, help="ROME bus port ('' = off)")
+    parser.add_argument('--nano', default=NANO_PORT, help="Nano bus port ('' = off)")
+    parser.add_argument('--capture', default=CAPTURE_FILE, help="record all ports to this .rcap file")
+    parser.add_argument('--replay', help="analyse a capture file instead of live ports")
+    parser.add_argument('--duration', type=float, help="stop after N seconds (live)")
+    parser.add_argument('--timeline', action='store_true', help="print every frame and fan-out result")
+    args = parser.parse_args()
+
+    monitor = MultiPortMonitor()
+    if args.timeline:
+        monitor.on_frame = lambda *event: print_timeline_frame(monitor, *event)
+        monitor.correlator.on_close = lambda frame: print_timeline_close(monitor, frame)
+
+    if args.replay:
+        run_replay(monitor, args.replay)
+        monitor.finish()
+        print_report(monitor)
+        return
+
+    ports = (args.raspi, args.rome, args.nano)
+    print_header(ports)
+    if METRICS_PORT:
+        exporter = MetricsExporter(port=METRICS_PORT).start()
+        for (name, _, _), path in zip(LINKS, ports):
+            if path:
+                exporter.add_framer(path, monitor.framers[name])
+        print(f"Metrics: {exporter.url}\n")
+
+    capture = CaptureWriter(args.capture) if args.capture else None
+    try:
+        asyncio.run(run_live(monitor, ports, capture, args.duration))
+    except serial.SerialException as e:
+        print(f"\n❌ Serial Error: {e}")
+        print("Pastikan ketiga port benar dan tidak dipakai aplikasi lain.")
+    except KeyboardInterrupt:
+        print("\n\n⏹️  Monitoring stopped by user")
+    finally:
+        monitor.finish()
+        print_report(monitor)
+        if capture is not None:
+            capture.close()
+            print(f"Capture disimpan: {args.capture} ({capture.records} record)")
+
+
+if __name__ == "__main__":
+    main()
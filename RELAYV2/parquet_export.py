@@ -0,0 +1,376 @@
+"""
+Parquet Export - Decoded Sessions for Analysis
+==============================================
+Konversi capture (.rcap) atau stream live ke file Parquet kolumnar,
+supaya traffic bench seharian bisa diload ke pandas dalam hitungan
+detik:
+
+    df = pd.read_parquet('sesi.parquet')
+    df[df.frame_type == 'data'].set_index('timestamp').dev2_angle.plot()
+
+Satu baris per frame, diurutkan per timestamp di tiap row group:
+    timestamp              timestamp[ns]   wall clock (perkiraan, lihat bawah)
+    t_ns                   int64           monotonic_ns asli dari capture
+    session                uint16          session capture (jam mulai ulang
+                                           setelah reboot), 0 untuk live
+    port                   uint8           PORT_RASPI / PORT_ROME / PORT_NANO
+    frame_type             dictionary      data / status / rome / nano
+    discrete_a/b/c         uint8           frame data (A5 99)
+    mode, nav_source,
+    country                dictionary      decode Discrete B / C (frame data)
+    status                 uint8           nilai 99 A5 xx (frame status)
+    dev1..dev5_raw         uint16          frame data: 5 device; frame rome:
+                                           hanya kolom device ID-nya
+    dev1..dev5_angle       float32         derajat seperti ROME_DSC1
+                                           (frame_codec.device_angles)
+Kolom yang tidak berlaku untuk frame_type tersebut bernilai null.
+
+Memori tetap: frame dikumpulkan per kind sebagai byte mentah, lalu
+setiap ROW_GROUP_ROWS frame di-decode batch (frame_codec) dan ditulis
+sebagai satu row group. Row group tidak pernah melewati batas session.
+
+Timestamp wall clock: capture hanya menyimpan monotonic_ns, dan jam itu
+mulai ulang di tiap session, jadi offset dihitung per session. Session
+terakhir diambil dari mtime file capture (= waktu record terakhir
+ditulis); session sebelumnya disambung mundur, masing-masing berakhir
+tepat saat session berikutnya mulai (lama reboot tidak terekam, jadi
+timestamp session lama bisa terlambat sebesar itu). Kalau diketahui,
+--start "2026-10-17 08:00:00" (boleh diulang, satu per session, urut)
+mengganti perkiraan itu; session sesudahnya disambung maju. Mode live
+memakai clock host langsung.
+
+Butuh pyarrow (pip install pyarrow); pandas hanya untuk membaca hasilnya.
+
+Usage:
+    python parquet_export.py sesi.rcap sesi.parquet
+    python parquet_export.py sesi.rcap sesi.parquet --port 0 --row-group 500000
+    python parquet_export.py soak.rcap soak.parquet --start "2026-10-17 08:00:00"
+    python parquet_export.py --live COM14 bench.parquet --duration 3600
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Dibutuhkan hanya saat export
+    pa = pq = None
+
+from capture_file import CaptureReader, DIR_RX, PORT_RASPI, PORT_ROME, PORT_NANO, PORT_NAMES
+from stream_framer import StreamFramer, DATA, STATUS, ROME, NANO
+from frame_codec import (decode_frames, device_angles, FRAME_DTYPE, ROME_FRAME_LEN, NUM_DEVICES,
+                         MODE_NAMES, NAV_SOURCE_NAMES, COUNTRY_NAMES)
+
+# ===== CONFIGURATION =====
+SERIAL_PORT = 'COM14'      # Port live (sniff Raspy -> RELAYV2)
+BAUD_RATE = 115200
+ROW_GROUP_ROWS = 256_000   # Frame per row group (batas memori)
+COMPRESSION = 'zstd'
+LIVE_FLUSH_S = 10.0        # Mode live: tulis row group minimal tiap N detik
+
+# Frame yang di-export per port tag
+PORT_KINDS = {
+    PORT_RASPI: (DATA, STATUS),
+    PORT_ROME: (ROME,),
+    PORT_NANO: (NANO,),
+}
+FRAME_TYPES = (DATA, STATUS, ROME, NANO)
+
+NS_PER_S = 1_000_000_000
+
+
+def _dictionary(names, codes, valid):
+    """Dictionary column from index codes (null where not valid)"""
+    indices = pa.array(codes.astype(np.int8), mask=~valid)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(names, type=pa.string()))
+
+
+def _column(values, valid, arrow_type):
+    return pa.array(values, mask=~valid, type=arrow_type)
+
+
+class ParquetFrameWriter:
+    """Buffer framed packets as raw bytes, decode + write one row group at a time"""
+
+    def __init__(self, path, wall_offset_ns, row_group_rows=ROW_GROUP_ROWS, compression=COMPRESSION):
+        """
+        Args:
+            path: output .parquet file
+            wall_offset_ns: added to t_ns to get the wall clock timestamp
+                (per session, see new_session())
+            row_group_rows: frames buffered before a row group is written
+        """
+        if pa is None:
+            raise SystemExit("pyarrow belum terinstall: pip install pyarrow")
+        self.path = path
+        self.wall_offset_ns = wall_offset_ns
+        self.session = 0
+        self.row_group_rows = row_group_rows
+        self.compression = compression
+        self._writer = None
+        self._reset()
+
+        # Statistics
+        self.rows = 0
+        self.row_groups = 0
+        self.frame_counts = {kind: 0 for kind in FRAME_TYPES}
+
+    def _reset(self):
+        # kind -> (bytearray frame mentah, list t_ns, list port)
+        self._pending = {kind: (bytearray(), [], []) for kind in FRAME_TYPES}
+        self._pending_rows = 0
+
+    def new_session(self, session, wall_offset_ns):
+        """Start a capture session: pending frames of the previous one are written first"""
+        self.flush()
+        self.session = session
+        self.wall_offset_ns = wall_offset_ns
+
+    def add(self, kind, frame, t_ns, port):
+        """Buffer one frame (memoryview from StreamFramer is copied)"""
+        raw, stamps, ports = self._pending[kind]
+        raw += frame
+        stamps.append(t_ns)
+        ports.append(port)
+        self._pending_rows += 1
+        if self._pending_rows >= self.row_group_rows:
+            self.flush()
+
+    def __len__(self):
+        """Frames waiting for the next row group"""
+        return self._pending_rows
+
+    def _build_table(self):
+        """Decode every pending frame into one Arrow table sorted by t_ns"""
+        parts = []
+        for kind in FRAME_TYPES:
+            raw, stamps, ports = self._pending[kind]
+            if stamps:
+                parts.append((kind, np.frombuffer(raw, dtype=np.uint8), np.asarray(stamps, dtype=np.int64),
+                              np.asarray(ports, dtype=np.uint8)))
+        n = sum(len(p[2]) for p in parts)
+
+        t_ns = np.concatenate([p[2] for p in parts])
+        port = np.concatenate([p[3] for p in parts])
+        kind_code = np.concatenate([np.full(len(p[2]), FRAME_TYPES.index(p[0]), dtype=np.int8) for p in parts])
+
+        discretes = np.zeros((n, 3), dtype=np.uint8)
+        codes = np.zeros((n, 3), dtype=np.int8)   # mode, nav_source, country
+        status = np.zeros(n, dtype=np.uint8)
+        decoded = np.zeros(n, dtype=FRAME_DTYPE)  # Hanya device dipakai (device_angles)
+        device = decoded['device']
+        device_valid = np.zeros((n, NUM_DEVICES), dtype=bool)
+
+        row = 0
+        for kind, raw, stamps, _ in parts:
+            rows = slice(row, row + len(stamps))
+            if kind == DATA:
+                frames = decode_frames(raw, validate=False)
+                discretes[rows] = np.column_stack([frames['discrete_a'], frames['discrete_b'], frames['discrete_c']])
+                codes[rows] = np.column_stack([frames['mode'], frames['nav_source'], frames['country']])
+                device[rows] = frames['device']
+                device_valid[rows] = True
+            elif kind == STATUS:
+                status[rows] = raw[2::3]
+            elif kind == ROME:
+                packets = raw.reshape(-1, ROME_FRAME_LEN)
+                dev_index = packets[:, 1].astype(np.intp) - 1
+                values = (packets[:, 2].astype(np.uint16) << 8) | packets[:, 3]
+                device[np.arange(rows.start, rows.stop), dev_index] = values
+                device_valid[np.arange(rows.start, rows.stop), dev_index] = True
+            row = rows.stop
+
+        is_data = kind_code == FRAME_TYPES.index(DATA)
+        is_status = kind_code == FRAME_TYPES.index(STATUS)
+        angles = device_angles(decoded).astype(np.float32)
+
+        columns = {
+            'timestamp': pa.array(t_ns + self.wall_offset_ns, type=pa.timestamp('ns')),
+            't_ns': pa.array(t_ns, type=pa.int64()),
+            'session': pa.array(np.full(n, self.session, dtype=np.uint16), type=pa.uint16()),
+            'port': pa.array(port, type=pa.uint8()),
+            'frame_type': _dictionary(FRAME_TYPES, kind_code, np.ones(n, dtype=bool)),
+            'discrete_a': _column(discretes[:, 0], is_data, pa.uint8()),
+            'discrete_b': _column(discretes[:, 1], is_data, pa.uint8()),
+            'discrete_c': _column(discretes[:, 2], is_data, pa.uint8()),
+            'mode': _dictionary(MODE_NAMES, codes[:, 0], is_data),
+            'nav_source': _dictionary(NAV_SOURCE_NAMES, codes[:, 1], is_data),
+            'country': _dictionary(COUNTRY_NAMES, codes[:, 2], is_data),
+            'status': _column(status, is_status, pa.uint8()),
+        }
+        for i in range(NUM_DEVICES):
+            columns[f'dev{i + 1}_raw'] = _column(device[:, i], device_valid[:, i], pa.uint16())
+        for i in range(NUM_DEVICES):
+            columns[f'dev{i + 1}_angle'] = _column(angles[:, i], device_valid[:, i], pa.float32())
+
+        table = pa.table(columns)
+        order = np.argsort(t_ns, kind='stable')
+        return table.take(pa.array(order))
+
+    def flush(self):
+        """Write pending frames as one row group"""
+        if not self._pending_rows:
+            return
+        for kind in FRAME_TYPES:
+            self.frame_counts[kind] += len(self._pending[kind][1])
+        table = self._build_table()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema, compression=self.compression)
+        self._writer.write_table(table)
+        self.rows += table.num_rows
+        self.row_groups += 1
+        self._reset()
+
+    def close(self):
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FrameExporter:
+    """Per-port framers feeding one ParquetFrameWriter"""
+
+    def __init__(self, writer, port_kinds=PORT_KINDS):
+        self.writer = writer
+        self.framers = {tag: StreamFramer(kinds) for tag, kinds in port_kinds.items()}
+
+    def feed(self, t_ns, port, data):
+        """Frame one received chunk; frames get the chunk's timestamp"""
+        framer = self.framers.get(port)
+        if framer is None:
+            return
+        framer.feed(data)
+        add = self.writer.add
+        for kind, frame in framer.frames():
+            add(kind, frame, t_ns, port)
+
+    def new_session(self):
+        """Drop partial frames: bytes never continue across a reboot"""
+        for framer in self.framers.values():
+            framer.reset()
+
+
+def capture_wall_offsets(reader, starts=()):
+    """
+    ns to add to capture t_ns for a wall clock timestamp, one per session.
+
+    Args:
+        starts: wall clock (datetime) of the first record of the first
+                len(starts) sessions, if known; later sessions follow
+                the previous one back to back. Without starts the last
+                record is the capture file mtime and earlier sessions
+                are chained backwards.
+    """
+    if not len(reader):
+        return []
+    t_ns = reader.index['t_ns']
+    bounds = [reader.session_range(k) for k in range(len(reader.sessions))]
+    first = [int(t_ns[start:stop].min()) for start, stop in bounds]
+    last = [int(t_ns[start:stop].max()) for start, stop in bounds]
+
+    offsets = [None] * len(bounds)
+    for k, start in enumerate(starts[:len(bounds)]):
+        offsets[k] = int(start.timestamp() * NS_PER_S) - first[k]
+    if not starts:
+        offsets[-1] = int(os.path.getmtime(reader.path) * NS_PER_S) - last[-1]
+        for k in range(len(bounds) - 2, -1, -1):
+            offsets[k] = first[k + 1] + offsets[k + 1] - last[k]
+    for k in range(len(bounds)):
+        if offsets[k] is None:
+            offsets[k] = last[k - 1] + offsets[k - 1] - first[k]
+    return offsets
+
+
+def export_capture(capture_path, out_path, port=None, starts=(), row_group_rows=ROW_GROUP_ROWS):
+    """Export every RX record of a capture, session by session; returns the closed ParquetFrameWriter"""
+    with CaptureReader(capture_path) as reader:
+        offsets = capture_wall_offsets(reader, starts)
+        writer = ParquetFrameWriter(out_path, offsets[0] if offsets else 0, row_group_rows)
+        exporter = FrameExporter(writer)
+        with writer:
+            for session, offset in enumerate(offsets):
+                writer.new_session(session, offset)
+                exporter.new_session()
+                start, stop = reader.session_range(session)
+                for t_ns, tag, _, payload in reader.records(port=port, direction=DIR_RX, start=start, stop=stop):
+                    exporter.feed(t_ns, tag, payload)
+    return writer
+
+
+def export_live(serial_port, out_path, port=PORT_RASPI, duration_s=None, row_group_rows=ROW_GROUP_ROWS):
+    """Export a live serial port until Ctrl+C / duration; returns the writer"""
+    import serial
+
+    writer = ParquetFrameWriter(out_path, time.time_ns() - time.monotonic_ns(), row_group_rows)
+    exporter = FrameExporter(writer)
+    ser = serial.Serial(serial_port, BAUD_RATE, timeout=0.1)
+    start = last_flush = time.monotonic()
+    try:
+        with writer:
+            while duration_s is None or time.monotonic() - start < duration_s:
+                data = ser.read(ser.in_waiting or 1)
+                if data:
+                    exporter.feed(time.monotonic_ns(), port, data)
+                if time.monotonic() - last_flush >= LIVE_FLUSH_S:
+                    writer.flush()
+                    last_flush = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nExport stopped by user")
+    finally:
+        ser.close()
+    return writer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export RELAYV2 traffic to Parquet")
+    parser.add_argument('source', nargs='?', help="capture file (.rcap)")
+    parser.add_argument('output', help="output .parquet file")
+    parser.add_argument('--live', metavar='SERIAL_PORT', help="export a live port instead of a capture")
+    parser.add_argument('--port', type=int, default=None,
+                        help="port tag (capture: filter, default all; live: tag, default RASPI)")
+    parser.add_argument('--start', action='append', default=[],
+                        help="wall clock of the first record of a session (YYYY-MM-DD HH:MM:SS); "
+                             "repeat for the following sessions")
+    parser.add_argument('--duration', type=float, help="stop after N seconds (live)")
+    parser.add_argument('--row-group', type=int, default=ROW_GROUP_ROWS, help="frames per row group")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.live:
+        print(f"Exporting {args.live} -> {args.output} (Ctrl+C untuk stop)")
+        port = PORT_RASPI if args.port is None else args.port
+        writer = export_live(args.live, args.output, port, args.duration, args.row_group)
+    else:
+        if not args.source:
+            parser.error("capture file atau --live wajib diisi")
+        starts = [datetime.fromisoformat(start) for start in args.start]
+        writer = export_capture(args.source, args.output, args.port, starts, args.row_group)
+    elapsed = time.perf_counter() - t0
+
+    print("=" * 70)
+    print(f"Parquet:     {args.output} ({os.path.getsize(args.output) / 1024 / 1024:,.1f} MB)"
+          if writer.rows else f"Parquet:     {args.output} (tidak ada frame)")
+    print(f"Rows:        {writer.rows:,} in {writer.row_groups} row groups "
+          f"({', '.join(f'{kind} {count:,}' for kind, count in writer.frame_counts.items() if count)})")
+    print(f"Elapsed:     {elapsed:.2f}s ({writer.rows / elapsed if elapsed > 0 else 0:,.0f} frames/s)")
+    if writer.session:
+        print(f"Sessions:    {writer.session + 1} (timestamp per session, lihat --start)")
+    if args.port is not None and not args.live:
+        print(f"Port:        {PORT_NAMES.get(args.port, args.port)}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
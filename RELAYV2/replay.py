@@ -0,0 +1,408 @@
+"""
+Capture Replay Engine
+=====================
+Jalankan logic monitor dari file capture (capture_file.py), bukan dari
+COM port. Berguna untuk benchmark decoder dengan workload yang sama
+setiap kali, dan untuk memproses ulang traffic bench berjam-jam dalam
+hitungan detik.
+
+Pacing:
+    --speed 1      real-time (sesuai timestamp capture)
+    --speed 10     10x lebih cepat
+    --speed max    secepat mungkin, lalu report frames/sec
+
+Target tool:
+    complete    -> logic monitor_complete.py   (frame A5 99 + angle)
+    discrete    -> logic monitor_discrete.py   (event per bit Discrete A/B/C)
+    relay_uart  -> logic test_relay_uart.py    (paket 3 byte + interval)
+    diagnostic  -> logic uart_diagnostic.py    (rate + stuck detection)
+
+Hanya satu port yang di-replay (default PORT_RASPI), jadi capture
+multi-port dari multi_port_monitor.py tidak mencampur byte ROME / Nano
+ke framer Raspi. Pilih port lain dengan --port.
+
+Usage:
+    python replay.py capture.rcap discrete --speed max
+    python replay.py capture.rcap diagnostic --speed 20 --port 0
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from capture_file import CaptureReader, DIR_RX, PORT_RASPI, PORT_NAMES
+from stream_framer import StreamFramer, DATA
+from frame_codec import decode_frames, device_angles, MODE_NAMES, NAV_SOURCE_NAMES, COUNTRY_NAMES
+from discrete_decoder import decode_packet, TransitionDetector, format_event
+from latency_histogram import WindowedHistogram, format_summary
+
+NS_PER_S = 1_000_000_000
+
+
+def _capture_clock(t_ns):
+    """Format a capture timestamp (monotonic ns) as seconds into the run"""
+    return f"+{t_ns / NS_PER_S:.3f}s"
+
+
+class ReplaySink:
+    """Base class: receives (t_ns, data) chunks in capture order"""
+
+    name = 'raw'
+
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.frames = 0
+        self.bytes = 0
+
+    def feed(self, t_ns, data):
+        self.bytes += len(data)
+
+    def new_session(self):
+        """Capture clock restarted (reboot): drop partial frames and arrival state"""
+
+    def finish(self):
+        """Called once after the last chunk"""
+
+
+class CompleteMonitorSink(ReplaySink):
+    """monitor_complete.py: decode A5 99 frames, show snapshot per interval"""
+
+    name = 'complete'
+
+    def __init__(self, quiet=False, display_interval=None):
+        super().__init__(quiet)
+        import monitor_complete
+        self._monitor = monitor_complete
+        self.display_interval = display_interval or monitor_complete.DISPLAY_INTERVAL
+        self.framer = StreamFramer((DATA,))
+        self._latest = None
+        self._last_display_ns = None
+        self._rate_start_ns = None
+        self._rate_start_frames = 0
+        self._rate = 0.0
+
+    def feed(self, t_ns, data):
+        super().feed(t_ns, data)
+        self.framer.feed(data)
+        for _, packet in self.framer.frames():
+            self.frames += 1
+            self._latest = packet
+
+        if self._latest is None:
+            return
+        # Frame terakhir dicopy, view framer hanya valid sampai feed() berikut
+        self._latest = bytes(self._latest)
+
+        if self._rate_start_ns is None:
+            self._rate_start_ns = t_ns
+            self._last_display_ns = t_ns
+        elif t_ns - self._rate_start_ns >= NS_PER_S:
+            self._rate = (self.frames - self._rate_start_frames) * NS_PER_S / (t_ns - self._rate_start_ns)
+            self._rate_start_ns = t_ns
+            self._rate_start_frames = self.frames
+
+        if t_ns - self._last_display_ns >= self.display_interval * NS_PER_S:
+            self._last_display_ns = t_ns
+            self._display(t_ns)
+
+    def new_session(self):
+        self.framer.reset()
+        self._rate_start_ns = None
+
+    def _display(self, t_ns):
+        if self.quiet:
+            return
+        frame = decode_frames(self._latest)[0]
+        angles = device_angles(frame)
+        data = {
+            'timestamp': _capture_clock(t_ns),
+            'mode': MODE_NAMES[frame['mode']],
+            'nav_source': NAV_SOURCE_NAMES[frame['nav_source']],
+            'country': COUNTRY_NAMES[frame['country']],
+            'gps_ins': self._monitor.decode_gps_ins(int(frame['discrete_c'])),
+            'discrete_a': int(frame['discrete_a']),
+            'discrete_b': int(frame['discrete_b']),
+            'discrete_c': int(frame['discrete_c']),
+            'rate': self._rate,
+        }
+        for i in range(5):
+            data[f'rome_{i + 1}_raw'] = int(frame['device'][i])
+            data[f'rome_{i + 1}_angle'] = float(angles[i])
+        self._monitor.total_packets = self.frames
+        self._monitor.display_data(data)
+
+
+class DiscreteMonitorSink(ReplaySink):
+    """monitor_discrete.py: initial state, then one line per flipped bit"""
+
+    name = 'discrete'
+
+    def __init__(self, quiet=False):
+        super().__init__(quiet)
+        self.framer = StreamFramer((DATA,))
+        self.detector = TransitionDetector()
+        self.events = []
+
+    def feed(self, t_ns, data):
+        super().feed(t_ns, data)
+        self.framer.feed(data)
+        raw = bytearray()
+        for _, packet in self.framer.frames():
+            raw += packet
+        if not raw:
+            return
+
+        frames = decode_frames(raw, validate=False)
+        first = self.detector.state is None
+        discretes = np.column_stack([frames['discrete_a'], frames['discrete_b'], frames['discrete_c']])
+        events = self.detector.feed_frames(discretes, np.full(len(frames), t_ns), self.frames)
+        self.frames += len(frames)
+        self.events += events
+        if self.quiet:
+            return
+        if first:
+            decoded = decode_packet(*(int(v) for v in discretes[0]))
+            print(f"{_capture_clock(t_ns):<12} {decoded['mode']:<6} {decoded['nav_source']:<10} "
+                  f"{decoded['country']:<12} {decoded['flags_a']:<40} "
+                  f"{decoded['flags_b']:<30} {decoded['flags_c']:<30}")
+        for event in events:
+            print(format_event(event, _capture_clock))
+
+    def new_session(self):
+        self.framer.reset()
+
+    def finish(self):
+        if not self.quiet:
+            print(f"\nFrames with changes: {self.detector.changed_frames:,}, events: {self.detector.events:,}")
+
+
+class RelayUartSink(ReplaySink):
+    """test_relay_uart.py: fixed 3-byte reads, classify, interval stats"""
+
+    name = 'relay_uart'
+
+    def __init__(self, quiet=False):
+        super().__init__(quiet)
+        self._pending = bytearray()
+        self.counts = {'status': 0, 'rome': 0, 'unknown': 0}
+        self.intervals = WindowedHistogram()
+
+    def feed(self, t_ns, data):
+        super().feed(t_ns, data)
+        self._pending += data
+        usable = len(self._pending) - len(self._pending) % 3
+        for i in range(0, usable, 3):
+            b0, b1 = self._pending[i], self._pending[i + 1]
+            if b0 == 0x99 and b1 == 0xA5:
+                self.counts['status'] += 1
+            elif 0x01 <= b0 <= 0x05:
+                self.counts['rome'] += 1
+            else:
+                self.counts['unknown'] += 1
+            self.frames += 1
+        # Semua paket dalam satu chunk punya timestamp yang sama: interval
+        # hanya dicatat sekali per chunk, bukan gap nol untuk paket lainnya
+        if usable:
+            self.intervals.record_arrival(t_ns)
+        del self._pending[:usable]
+
+    def new_session(self):
+        self._pending.clear()
+        self.intervals.break_arrivals()
+
+    def finish(self):
+        if self.quiet or not self.intervals.all_time.count:
+            return
+        print("\n" + "=" * 70)
+        print("STATISTICS")
+        print("=" * 70)
+        print(f"Packets: {self.frames:,}  (status {self.counts['status']:,}, "
+              f"rome {self.counts['rome']:,}, unknown {self.counts['unknown']:,})")
+        print(f"Interval all-time: {format_summary(self.intervals.summary())}")
+        print(f"Interval last 10s: {format_summary(self.intervals.window_summary())}")
+        print("=" * 70)
+
+
+class DiagnosticSink(ReplaySink):
+    """uart_diagnostic.py: framed per-type rates and stuck detection"""
+
+    name = 'diagnostic'
+
+    def __init__(self, quiet=False):
+        super().__init__(quiet)
+        import uart_diagnostic
+        self._diag = uart_diagnostic
+        self.link = uart_diagnostic.LinkDiagnostics()
+        self._last_check_ns = None
+
+    @property
+    def stuck_events(self):
+        return self.link.stall_events
+
+    def feed(self, t_ns, data):
+        super().feed(t_ns, data)
+        diag = self._diag
+        link = self.link
+
+        # Gap diukur saat chunk berikut datang (replay tidak punya jam dinding)
+        stall = link.check_stall(t_ns)
+        if stall is not None and not self.quiet:
+            _, gap_s, bytes_in_gap = stall
+            diag.analyze_stuck_cause(gap_s, link.total_packets, link.window_rate(), bytes_in_gap)
+
+        link.feed(t_ns, data)
+        self.frames = link.total_packets
+        if self._last_check_ns is None:
+            self._last_check_ns = t_ns
+
+        if t_ns - self._last_check_ns >= diag.RATE_CHECK_INTERVAL * NS_PER_S:
+            rates, new_resyncs = link.interval_rates(t_ns)
+            rate = sum(rates.values())
+            if rate == 0:
+                status = "NO PACKETS"
+            elif rate < diag.MIN_RATE_WARNING:
+                status = f"LOW RATE (< {diag.MIN_RATE_WARNING} Hz)"
+            elif new_resyncs:
+                status = f"RESYNC x{new_resyncs}"
+            else:
+                status = "OK"
+            if not self.quiet:
+                print(f"{_capture_clock(t_ns):<12} {link.total_packets:<15,} {rates.get('status', 0):<11.1f} "
+                      f"{rates.get('rome', 0):<11.1f} {link.resyncs:<9,} {link.discarded_bytes:<11,} {status:<30}")
+            self._last_check_ns = t_ns
+
+    def new_session(self):
+        self.link.framer.reset()
+        for gaps in self.link.gaps.values():
+            gaps.break_arrivals()
+
+    def finish(self):
+        if not self.quiet:
+            link = self.link
+            print(f"\nPackets: {link.counts}  resyncs {link.resyncs:,}  discarded {link.discarded_bytes:,} bytes")
+            print(f"Stuck events: {len(link.stall_events)}")
+
+
+SINKS = {
+    CompleteMonitorSink.name: CompleteMonitorSink,
+    DiscreteMonitorSink.name: DiscreteMonitorSink,
+    RelayUartSink.name: RelayUartSink,
+    DiagnosticSink.name: DiagnosticSink,
+}
+
+
+def replay(reader, sink, speed=1.0, port=PORT_RASPI, direction=DIR_RX, start=0, stop=None, session=None):
+    """
+    Feed capture records into a sink.
+
+    Capture hasil append bisa berisi beberapa session (jam monotonic
+    mulai ulang setelah reboot). Waktu di-anchor ulang per session dan
+    session berikutnya disambung tepat setelah session sebelumnya, jadi
+    sink dan pacing selalu melihat waktu yang maju; sink.new_session()
+    dipanggil di tiap batas session.
+
+    Args:
+        reader: CaptureReader
+        sink: ReplaySink (or anything with feed(t_ns, data) / finish())
+        speed: 1.0 = real-time, N = N times faster, None = max speed
+        port / direction: record filter (None = all; one sink should
+            only see one port's byte stream)
+        start / stop: record range
+        session: replay only this session (None = all, in file order)
+
+    Returns:
+        dict with frames, bytes, wall time and throughput
+    """
+    stamps = reader.index['t_ns']
+    sessions = range(len(reader.sessions)) if session is None else (session,)
+    stop = len(reader) if stop is None else stop
+    wall_start = time.perf_counter()
+    offset_ns = 0  # Waktu replay di awal session ini
+    capture_ns = 0
+    record_count = 0
+
+    for k in sessions:
+        first, last = reader.session_range(k)
+        records = reader.select(port, direction, max(start, first), min(stop, last))
+        if not len(records):
+            continue
+        if record_count and hasattr(sink, 'new_session'):
+            sink.new_session()
+        record_count += len(records)
+        t0_ns = int(stamps[records[0]])
+        for i in records:
+            t_ns, _, _, payload = reader[i]
+            # Timestamp dibuat relatif ke awal capture (session disambung)
+            t_rel = offset_ns + t_ns - t0_ns
+
+            if speed:
+                # Deadline absolut, jadi error sleep tidak menumpuk
+                due = wall_start + t_rel / NS_PER_S / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+            sink.feed(t_rel, payload)
+
+        span_ns = int(stamps[records[-1]]) - t0_ns
+        capture_ns += span_ns
+        offset_ns += span_ns
+
+    sink.finish()
+    wall = time.perf_counter() - wall_start
+    capture_s = capture_ns / NS_PER_S
+
+    return {
+        'records': record_count,
+        'frames': sink.frames,
+        'bytes': sink.bytes,
+        'wall_s': wall,
+        'capture_s': capture_s,
+        'frames_per_s': sink.frames / wall if wall > 0 else 0.0,
+        'bytes_per_s': sink.bytes / wall if wall > 0 else 0.0,
+        'speedup': capture_s / wall if wall > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a capture into monitor logic")
+    parser.add_argument('capture', help="capture file (.rcap)")
+    parser.add_argument('tool', choices=sorted(SINKS), help="monitor logic to drive")
+    parser.add_argument('--speed', default='1', help="1 = real-time, N = N x faster, max = no pacing")
+    parser.add_argument('--port', type=int, default=PORT_RASPI,
+                        help=f"port tag to replay (default: {PORT_RASPI} = {PORT_NAMES[PORT_RASPI]})")
+    parser.add_argument('--session', type=int, default=None, help="replay only this session (default: all)")
+    parser.add_argument('--quiet', action='store_true', help="no per-interval output")
+    args = parser.parse_args()
+
+    speed = None if args.speed == 'max' else float(args.speed)
+    sink = SINKS[args.tool](quiet=args.quiet)
+
+    print("=" * 70)
+    print(f"Replay: {args.capture} port {PORT_NAMES.get(args.port, args.port)} -> {args.tool} (speed: {args.speed})")
+    print(f"Started: {datetime.now().strftime('%H:%M:%S')}")
+    print("=" * 70)
+
+    with CaptureReader(args.capture) as reader:
+        try:
+            result = replay(reader, sink, speed=speed, port=args.port, session=args.session)
+        except KeyboardInterrupt:
+            print("\n\nReplay stopped by user")
+            return
+
+    print("\n" + "=" * 70)
+    print("REPLAY RESULT")
+    print("=" * 70)
+    print(f"Records:       {result['records']:,}")
+    print(f"Frames:        {result['frames']:,}")
+    print(f"Bytes:         {result['bytes']:,}")
+    print(f"Capture span:  {result['capture_s']:.1f} s")
+    print(f"Wall time:     {result['wall_s']:.3f} s ({result['speedup']:.1f}x real-time)")
+    print(f"Throughput:    {result['frames_per_s']:,.0f} frames/s, {result['bytes_per_s'] / 1024:,.0f} KB/s")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+ROME Calibration - Per-Device Correction Tables
+===============================================
+Pengganti DSC_ZERO_OFFSET: koreksi dihitung di host dan diterapkan saat
+encode sudut, jadi kalibrasi ulang tidak perlu re-flash ROME_DSC1.
+
+- Sweep satu device ke N titik (default 12 titik, tiap 30 deg)
+- Di tiap titik jarum dibaca (operator ketik angka yang ditunjuk, atau
+  fungsi sensor), koreksi diiterasi sampai error <= TOLERANCE_DEG:
+      commanded = target + koreksi
+      koreksi  += target - terbaca
+- Hasil per device: tabel piecewise-linear target -> koreksi (deg),
+  periodik 360 deg (titik terakhir menyambung ke titik pertama)
+- CalibrationSet.apply(device_ids, angles) mengoreksi array (N, K)
+  sekaligus (np.interp per kolom), dipakai encode_angles() di
+  trajectory_player.py, CoalescingRomeSender dan manual_rome_control.py
+
+Tabel disimpan sebagai JSON:
+    {"devices": {"2": {"points": [0, 30, ...], "corrections": [1.2, 0.8, ...]}}}
+
+Satu titik saja = offset konstan (setara DSC_ZERO_OFFSET lama). Firmware
+tetap memakai DSC_ZERO_OFFSET yang sudah ter-flash; tabel ini koreksi
+tambahan di atasnya.
+
+Usage:
+    python rome_calibration.py --device 2 --points 12
+    python rome_calibration.py --device 5 --points 8 --file rome_calibration.json
+    python rome_calibration.py --device 3 --from-csv bacaan_dev3.csv
+    python rome_calibration.py --show
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+import serial
+
+from frame_codec import NUM_DEVICES
+
+# ===== CONFIGURATION =====
+SERIAL_PORT = 'COM14'                    # Port USB-TTL ke ROME_DSC
+BAUD_RATE = 115200
+CALIBRATION_FILE = 'rome_calibration.json'
+DEFAULT_POINTS = 12                      # Titik per sweep (360 / 12 = 30 deg)
+TOLERANCE_DEG = 0.1                      # Error maksimum per titik
+MAX_ITERATIONS = 5                       # Iterasi koreksi per titik
+FULL_SCALE_DEG = 360.0
+DEVICE5_ID = 5
+DEVICE5_START_DEG = -180.0               # Device 5 (EHSI relative) range -180..+180
+
+
+def angle_error(target, reading):
+    """target - reading wrapped to [-180, 180) (jarum 359.5 untuk target 0 = +0.5)"""
+    return (np.asarray(target, dtype=np.float64) - reading + 180.0) % FULL_SCALE_DEG - 180.0
+
+
+def wrap_angle(device_id, angles):
+    """
+    Wrap into the device range so a correction never encodes a negative raw:
+    Device 1-4 [0, 360), Device 5 [-180, 180).
+    """
+    start = DEVICE5_START_DEG if device_id == DEVICE5_ID else 0.0
+    return start + (np.asarray(angles, dtype=np.float64) - start) % FULL_SCALE_DEG
+
+
+# ===== CORRECTION TABLE =====
+
+class CorrectionTable:
+    """Piecewise-linear, 360 deg periodic correction for one device"""
+
+    def __init__(self, points=(), corrections=()):
+        """
+        Args:
+            points: target angles in degrees
+            corrections: degrees to add to each target
+        """
+        points = np.asarray(points, dtype=np.float64)
+        corrections = np.asarray(corrections, dtype=np.float64)
+        if points.shape != corrections.shape:
+            raise ValueError("points and corrections must have the same length")
+        order = np.argsort(points % FULL_SCALE_DEG, kind='stable')
+        self.points = points[order]
+        self.corrections = corrections[order]
+
+    def __len__(self):
+        return len(self.points)
+
+    def correction(self, angles):
+        """Correction in degrees for each angle (array in, array out)"""
+        angles = np.asarray(angles, dtype=np.float64)
+        if len(self.points) == 0:
+            return np.zeros_like(angles)
+        if len(self.points) == 1:
+            return np.full_like(angles, self.corrections[0])
+        return np.interp(angles, self.points, self.corrections, period=FULL_SCALE_DEG)
+
+    def apply(self, angles):
+        """Angles to command so the needle shows `angles`"""
+        angles = np.asarray(angles, dtype=np.float64)
+        return angles + self.correction(angles)
+
+    def to_dict(self):
+        return {'points': self.points.tolist(), 'corrections': self.corrections.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['points'], data['corrections'])
+
+    @classmethod
+    def from_readings(cls, targets, readings):
+        """
+        Table from one open-loop pass: target commanded, reading observed.
+
+        Koreksi = target - terbaca (asumsi slope gauge ~1 di sekitar titik).
+        """
+        return cls(targets, angle_error(targets, np.asarray(readings, dtype=np.float64)))
+
+
+class CalibrationSet:
+    """Correction tables for every device, applied to (N, K) angle arrays"""
+
+    def __init__(self, tables=None):
+        self.tables = dict(tables or {})   # device_id -> CorrectionTable
+
+    def __contains__(self, device_id):
+        return device_id in self.tables
+
+    def __getitem__(self, device_id):
+        return self.tables[device_id]
+
+    def __setitem__(self, device_id, table):
+        self.tables[device_id] = table
+
+    def apply(self, device_ids, angles):
+        """
+        Correct a trajectory.
+
+        Args:
+            device_ids: sequence of K device IDs
+            angles: array (N, K) in degrees
+
+        Returns:
+            float64 array (N, K); devices without a table are unchanged,
+            corrected columns are wrapped with wrap_angle()
+        """
+        angles = np.array(angles, dtype=np.float64).reshape(-1, len(device_ids))
+        for k, device_id in enumerate(device_ids):
+            table = self.tables.get(device_id)
+            if table is not None and len(table):
+                angles[:, k] = wrap_angle(device_id, table.apply(angles[:, k]))
+        return angles
+
+    def save(self, path=CALIBRATION_FILE):
+        data = {'devices': {str(dev): table.to_dict() for dev, table in sorted(self.tables.items())}}
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    @classmethod
+    def load(cls, path=CALIBRATION_FILE):
+        with open(path) as f:
+            data = json.load(f)
+        return cls({int(dev): CorrectionTable.from_dict(table) for dev, table in data['devices'].items()})
+
+    @classmethod
+    def load_if_exists(cls, path=CALIBRATION_FILE):
+        """Empty set when the file does not exist yet"""
+        return cls.load(path) if os.path.exists(path) else cls()
+
+
+# ===== CALIBRATION SWEEP =====
+
+def sweep_points(device_id, count=DEFAULT_POINTS):
+    """N evenly spaced targets over the device range"""
+    start = DEVICE5_START_DEG if device_id == DEVICE5_ID else 0.0
+    return start + np.arange(count) * (FULL_SCALE_DEG / count)
+
+
+class Calibrator:
+    """Sweep one device through its targets and converge a correction per point"""
+
+    def __init__(self, sender, measure, tolerance=TOLERANCE_DEG, max_iterations=MAX_ITERATIONS):
+        """
+        Args:
+            sender: CoalescingRomeSender (without calibration, angles are sent as-is)
+            measure: measure(device_id, target, commanded) -> angle shown by the needle,
+                     or None to skip the point
+            tolerance: stop iterating when |target - reading| <= tolerance
+            max_iterations: commands per point before giving up
+        """
+        self.sender = sender
+        self.measure = measure
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+    def calibrate_point(self, device_id, target, correction=0.0):
+        """
+        Returns:
+            (correction, final error) or None if the point was skipped
+        """
+        error = None
+        for _ in range(self.max_iterations):
+            commanded = float(wrap_angle(device_id, target + correction))
+            self.sender.set_angle(device_id, commanded)
+            self.sender.flush(force=True)
+            reading = self.measure(device_id, target, commanded)
+            if reading is None:
+                return None
+            error = float(angle_error(target, reading))
+            if abs(error) <= self.tolerance:
+                break
+            correction += error
+        return correction, error
+
+    def run(self, device_id, targets, initial=None, progress=None):
+        """
+        Calibrate every target; `initial` (CorrectionTable) seeds each point.
+
+        Returns:
+            (CorrectionTable, list of (target, correction, error))
+        """
+        results = []
+        for target in targets:
+            start = float(initial.correction(target)) if initial is not None else 0.0
+            result = self.calibrate_point(device_id, float(target), start)
+            if result is None:
+                continue
+            results.append((float(target), result[0], result[1]))
+            if progress is not None:
+                progress(*results[-1])
+        table = CorrectionTable([r[0] for r in results], [r[1] for r in results])
+        return table, results
+
+
+def operator_measure(device_id, target, commanded):
+    """Operator reads the needle and types the angle ('s' = skip, Enter = on target)"""
+    while True:
+        text = input(f"  Dev {device_id} target {target:7.1f} (kirim {commanded:7.1f}) -> jarum menunjuk? ").strip()
+        if text == "":
+            return target
+        if text.lower() == 's':
+            return None
+        try:
+            return float(text)
+        except ValueError:
+            print("  Masukkan angka, Enter (sudah pas) atau 's' (skip)")
+
+
+def load_readings_csv(path):
+    """(targets, readings) from a CSV with 'target' and 'reading' columns"""
+    with open(path, newline='') as f:
+        rows = [row for row in csv.DictReader(f)]
+    return [float(r['target']) for r in rows], [float(r['reading']) for r in rows]
+
+
+def print_table(device_id, table):
+    print(f"Device {device_id}: {len(table)} titik")
+    for point, corr in zip(table.points, table.corrections):
+        print(f"  {point:7.1f} deg -> {corr:+6.2f} deg")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build per-device ROME correction tables")
+    parser.add_argument('--port', default=SERIAL_PORT)
+    parser.add_argument('--file', default=CALIBRATION_FILE, help="calibration JSON (read and updated)")
+    parser.add_argument('--device', type=int, help=f"device ID 1..{NUM_DEVICES}")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="targets per sweep")
+    parser.add_argument('--from-csv', help="build the table from a target,reading CSV (no serial)")
+    parser.add_argument('--fresh', action='store_true', help="ignore the existing table as starting point")
+    parser.add_argument('--show', action='store_true', help="print the stored tables and exit")
+    args = parser.parse_args()
+
+    calibration = CalibrationSet.load_if_exists(args.file)
+    if args.show:
+        if not calibration.tables:
+            print(f"Belum ada kalibrasi di {args.file}")
+        for device_id, table in sorted(calibration.tables.items()):
+            print_table(device_id, table)
+        return
+    if args.device is None or not 1 <= args.device <= NUM_DEVICES:
+        raise SystemExit(f"--device 1..{NUM_DEVICES} wajib diisi")
+
+    if args.from_csv:
+        table = CorrectionTable.from_readings(*load_readings_csv(args.from_csv))
+    else:
+        try:
+            ser = serial.Serial(args.port, BAUD_RATE, timeout=1)
+        except serial.SerialException as e:
+            print(f"Connection Failed: {e}")
+            return
+        print("=" * 60)
+        print(f"CALIBRATION Device {args.device}: {args.points} titik, toleransi {TOLERANCE_DEG} deg")
+        print("Ketik sudut yang ditunjuk jarum, Enter kalau sudah pas, 's' untuk skip titik")
+        print("=" * 60)
+        from rome_sender import CoalescingRomeSender  # rome_sender -> trajectory_player -> modul ini
+        initial = None if args.fresh else calibration.tables.get(args.device)
+        calibrator = Calibrator(CoalescingRomeSender(ser), operator_measure)
+        t0 = time.monotonic()
+        try:
+            table, results = calibrator.run(
+                args.device, sweep_points(args.device, args.points), initial,
+                lambda target, corr, err: print(f"  -> koreksi {corr:+.2f} deg (error {err:+.2f})"))
+        except KeyboardInterrupt:
+            print("\nCalibration dibatalkan, file tidak diubah.")
+            return
+        finally:
+            ser.close()
+        print(f"{len(results)}/{args.points} titik dalam {time.monotonic() - t0:.0f}s")
+
+    calibration[args.device] = table
+    calibration.save(args.file)
+    print_table(args.device, table)
+    print(f"✅ Disimpan ke {args.file} - dipakai langsung oleh sender, tanpa re-flash")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+ROME_DSC1 Receiver Model - Packet Loss Analysis
+===============================================
+Model waktu dari interaksi ISR <-> main loop di ROME_DSC1/Core/Src/main.c:
+
+    HAL_UART_RxCpltCallback():
+        if(!rx_ready) { state machine [0xBB, ID_DEVICE, MSB, LSB] }
+        -> byte yang datang saat rx_ready = 1 DIABAIKAN
+
+    while(1):
+        if(rx_ready) {
+            sprintf + SSD1306_Puts       (RAM saja, cepat)
+            SSD1306_UpdateScreen()       (8 page x 130 byte lewat I2C)
+            DSC_Update()                 (HAL_Delay(20) di dalamnya)
+            rx_index = 0; rx_ready = 0;
+        }
+
+Selama redraw OLED + DSC_Update, rx_ready tetap 1, jadi hampir semua
+update dari RELAYV2 dibuang. Setelah rx_ready = 0 ISR bisa juga "nyangkut"
+di byte 0xBB di tengah data paket lain (misframe).
+
+Model ini menerima stream byte ROME (bus USART2, dipakai bersama oleh
+semua device) lalu report per ID_DEVICE: update yang applied, dropped,
+misframed, dan effective update rate gauge.
+
+Catatan: HAL_Delay(1000) hanya ada di DSC_MoveSmooth(), yang tidak
+dipanggil dari main loop. Kalau mau model skenario itu, set
+EXTRA_HOLD_MS = 1000.
+
+Usage:
+    python rome_dsc_model.py                         (stream sintetis)
+    python rome_dsc_model.py --rate 200 --duration 10
+    python rome_dsc_model.py --capture sesi.rcap     (port ROME dari capture)
+"""
+
+import argparse
+from capture_file import CaptureReader, DIR_RX, PORT_ROME
+from frame_codec import ROME_FRAME_LEN, NUM_DEVICES
+
+# ===== CONFIGURATION (samakan dengan ROME_DSC1 main.c) =====
+BAUD_RATE = 115200
+I2C_CLOCK_HZ = 400000   # hi2c1.Init.ClockSpeed
+SSD1306_WIDTH = 128
+DSC_DELAY_MS = 20       # HAL_Delay(20) di DSC_Update()
+HAL_DELAY_EXTRA_TICKS = 1  # HAL_Delay menunggu minimal 1 tick lebih
+CPU_OVERHEAD_US = 200   # sprintf / Puts / float math (perkiraan)
+EXTRA_HOLD_MS = 0       # Tambahan blocking (mis. 1000 untuk DSC_MoveSmooth)
+BATCH_RECORDS = 4096    # Chunk capture per batch simulasi (memori tetap)
+APPLIED_KEEP = 1000     # Update applied yang disimpan detail-nya per device
+
+NS_PER_US = 1_000
+NS_PER_MS = 1_000_000
+NS_PER_S = 1_000_000_000
+
+
+def oled_update_ns(i2c_clock_hz=I2C_CLOCK_HZ, width=SSD1306_WIDTH):
+    """
+    Wire time of SSD1306_UpdateScreen().
+
+    Per page: 3x SSD1306_WRITECOMMAND (addr + reg + cmd) dan
+    1x WriteMulti (addr + 0x40 + width byte). 9 bit per byte I2C
+    (8 data + ACK), ditambah start/stop per transaksi.
+    """
+    bits_per_page = 3 * (3 * 9 + 2) + ((width + 2) * 9 + 2)
+    return 8 * bits_per_page * NS_PER_S // i2c_clock_hz
+
+
+def hold_time_ns():
+    """How long rx_ready stays set after a packet is accepted"""
+    dsc_ns = (DSC_DELAY_MS + HAL_DELAY_EXTRA_TICKS) * NS_PER_MS
+    return CPU_OVERHEAD_US * NS_PER_US + oled_update_ns() + dsc_ns + EXTRA_HOLD_MS * NS_PER_MS
+
+
+class RomeDscReceiverModel:
+    """ISR + main loop model for one ROME_DSC1 board"""
+
+    def __init__(self, id_device, hold_ns=None):
+        self.id_device = id_device
+        self.hold_ns = hold_time_ns() if hold_ns is None else hold_ns
+
+        # Firmware state
+        self.rx_index = 0
+        self.rx_ready = False
+        self.rx_buffer = [0] * 4
+        self._ready_until_ns = None
+        self._accepted_start = None  # byte index of the accepted 0xBB
+
+        # Results
+        self.accepted = 0     # packets that completed the ISR state machine
+        self.applied = []     # first APPLIED_KEEP (t_ns accept, t_ns apply, raw value, byte index)
+        self.dropped = 0      # real packets for this ID arriving while rx_ready = 1
+        self.misframed = 0    # accepted packets that were not real packets
+        self.partial = 0      # real packets lost because ISR was mid-frame
+        self.sent = 0         # real packets addressed to this ID
+
+    def _service_main_loop(self, t_ns):
+        """Clear rx_ready once the main loop finished the update"""
+        if self.rx_ready and t_ns >= self._ready_until_ns:
+            self.rx_index = 0
+            self.rx_ready = False
+
+    def _isr(self, byte, byte_index):
+        """HAL_UART_RxCpltCallback state machine"""
+        if self.rx_ready:
+            return None
+        if self.rx_index == 0:
+            if byte == 0xBB:
+                self.rx_buffer[0] = byte
+                self.rx_index = 1
+                self._accepted_start = byte_index
+        elif self.rx_index == 1:
+            if byte == self.id_device:
+                self.rx_buffer[1] = byte
+                self.rx_index = 2
+            else:
+                self.rx_index = 0
+        elif self.rx_index < 4:
+            self.rx_buffer[self.rx_index] = byte
+            self.rx_index += 1
+            if self.rx_index == 4:
+                self.rx_ready = True
+                return self._accepted_start
+        return None
+
+    def feed(self, t_ns, byte, byte_index):
+        """One byte finished arriving at t_ns"""
+        self._service_main_loop(t_ns)
+        start = self._isr(byte, byte_index)
+        if start is not None:
+            # Main loop langsung ambil (idle); PWM di-set di awal DSC_Update
+            self._ready_until_ns = t_ns + self.hold_ns
+            raw = (self.rx_buffer[2] << 8) | self.rx_buffer[3]
+            apply_ns = self._ready_until_ns - (DSC_DELAY_MS + HAL_DELAY_EXTRA_TICKS) * NS_PER_MS
+            self.accepted += 1
+            if len(self.applied) < APPLIED_KEEP:
+                self.applied.append((t_ns, apply_ns, raw, start))
+        return start
+
+    def result(self, duration_ns):
+        real_applied = self.accepted - self.misframed
+        duration_s = duration_ns / NS_PER_S if duration_ns else 0
+        return {
+            'id_device': self.id_device,
+            'sent': self.sent,
+            'applied': real_applied,
+            'dropped': self.dropped,
+            'partial': self.partial,
+            'misframed': self.misframed,
+            'loss_pct': 100.0 * (self.sent - real_applied) / self.sent if self.sent else 0.0,
+            'offered_rate_hz': self.sent / duration_s if duration_s else 0.0,
+            'effective_rate_hz': real_applied / duration_s if duration_s else 0.0,
+            'latency_ms': (self.applied[0][1] - self.applied[0][0]) / NS_PER_MS if self.applied else 0.0,
+            'hold_ms': self.hold_ns / NS_PER_MS,
+            'max_rate_hz': NS_PER_S / self.hold_ns,
+        }
+
+
+def _real_packets(stream, pos=0):
+    """
+    Greedy scan for real [BB ID MSB LSB] packets.
+
+    Returns:
+        ({byte index: device id}, first undecided index) - byte mulai
+        dari index kedua belum bisa diputuskan tanpa byte berikutnya
+    """
+    packets = {}
+    i = pos
+    n = len(stream)
+    while i + ROME_FRAME_LEN <= n:
+        if stream[i] == 0xBB and 1 <= stream[i + 1] <= NUM_DEVICES:
+            packets[i] = stream[i + 1]
+            i += ROME_FRAME_LEN
+        else:
+            i += 1
+    return packets, i
+
+
+def _feed_model(model, stream, times, count, base, real):
+    """
+    Feed stream[:count] (absolute byte index base + k) to one model.
+
+    Paket asli yang tidak ter-apply diklasifikasi saat byte ke-4-nya:
+    rx_ready = 1 setelah header (termasuk header yang jadi byte terakhir
+    misframe) -> dropped, selain itu ISR sedang nyangkut di frame lain
+    -> partial.
+    """
+    dev = model.id_device
+    pending = None
+    header_busy = False
+    for k in range(count):
+        start = model.feed(times[k], stream[k], base + k)
+        if real.get(k) == dev:
+            header_busy = model.rx_ready
+            pending = k
+        if start is not None and real.get(start - base) != dev:
+            # Start di batch sebelumnya tidak mungkin paket asli: paket
+            # asli selalu utuh dalam satu batch
+            model.misframed += 1
+        if pending is not None and k == pending + ROME_FRAME_LEN - 1:
+            if start != base + pending:
+                if header_busy:
+                    model.dropped += 1
+                else:
+                    model.partial += 1
+            pending = None
+
+
+def simulate(chunks, device_ids=range(1, NUM_DEVICES + 1), baud=BAUD_RATE, hold_ns=None,
+             batch_records=BATCH_RECORDS):
+    """
+    Run every device model over a shared ROME bus stream.
+
+    Stream diproses per batch batch_records chunk, jadi memori tetap
+    berapapun panjang capture; hanya <= 3 byte yang belum bisa
+    diputuskan yang dibawa ke batch berikutnya.
+
+    Args:
+        chunks: iterable of (t_ns, bytes) - waktu mulai kirim chunk
+        device_ids: ID_DEVICE values to model
+        baud: USART2 baud rate
+        hold_ns: override rx_ready hold time (default: hold_time_ns())
+        batch_records: chunks per processing batch
+
+    Returns:
+        (results, models) - list of result dicts and {id: model}
+    """
+    byte_ns = 10 * NS_PER_S // baud
+    models = {dev: RomeDscReceiverModel(dev, hold_ns) for dev in device_ids}
+
+    stream = bytearray()  # Carry + batch sekarang
+    times = []            # Waktu selesai tiap byte di stream (wire-paced)
+    base = 0              # Index absolut stream[0]
+    wire_free = 0
+    first_ns = last_ns = None
+
+    def process(final):
+        nonlocal stream, times, base
+        real, decided = _real_packets(stream)
+        if final:
+            decided = len(stream)
+        for dev in real.values():
+            if dev in models:
+                models[dev].sent += 1
+        for model in models.values():
+            _feed_model(model, stream, times, decided, base, real)
+        stream = stream[decided:]
+        times = times[decided:]
+        base += decided
+
+    records = 0
+    for t_ns, data in chunks:
+        t = max(t_ns, wire_free)
+        for _ in data:
+            t += byte_ns
+            times.append(t)
+        if data:
+            if first_ns is None:
+                first_ns = times[len(times) - len(data)]
+            last_ns = t
+        wire_free = t
+        stream += data
+        records += 1
+        if records >= batch_records:
+            process(final=False)
+            records = 0
+    process(final=True)
+
+    duration = (last_ns - first_ns) if first_ns is not None else 0
+    return [models[dev].result(duration) for dev in device_ids], models
+
+
+def synthetic_stream(frame_rate_hz, duration_s, step=10):
+    """
+    RELAYV2-like ROME output: 5 packets (ID 1..5) per uplink frame,
+    each device value ramps by `step` so every update is distinct.
+    """
+    period_ns = int(NS_PER_S / frame_rate_hz)
+    frames = int(frame_rate_hz * duration_s)
+    for n in range(frames):
+        value = (n * step) % 3600
+        data = bytearray()
+        for dev in range(1, NUM_DEVICES + 1):
+            data += bytes([0xBB, dev, (value >> 8) & 0xFF, value & 0xFF])
+        yield n * period_ns, bytes(data)
+
+
+def capture_stream(path, port=PORT_ROME):
+    """ROME bus chunks from a capture file"""
+    with CaptureReader(path) as reader:
+        for t_ns, _, _, payload in reader.records(port=port, direction=DIR_RX):
+            yield t_ns, bytes(payload)
+
+
+def print_results(results):
+    print("=" * 100)
+    print(f"{'ID':<4} {'Sent':>8} {'Applied':>8} {'Dropped':>8} {'Partial':>8} {'Misframe':>9} "
+          f"{'Loss %':>8} {'Offered Hz':>11} {'Effective Hz':>13}")
+    print("-" * 100)
+    for r in results:
+        print(f"{r['id_device']:<4} {r['sent']:>8,} {r['applied']:>8,} {r['dropped']:>8,} {r['partial']:>8,} "
+              f"{r['misframed']:>9,} {r['loss_pct']:>8.1f} {r['offered_rate_hz']:>11.1f} {r['effective_rate_hz']:>13.1f}")
+    print("=" * 100)
+    if results:
+        r = results[0]
+        print(f"rx_ready hold per update: {r['hold_ms']:.1f} ms "
+              f"(OLED {oled_update_ns() / NS_PER_MS:.1f} ms + DSC_Update {DSC_DELAY_MS + HAL_DELAY_EXTRA_TICKS} ms"
+              f"{f' + extra {EXTRA_HOLD_MS} ms' if EXTRA_HOLD_MS else ''})")
+        print(f"Packet -> PWM latency:    {r['latency_ms']:.1f} ms")
+        print(f"Upper bound effective rate: {r['max_rate_hz']:.1f} Hz per device")
+
+
+def print_applied(model, limit):
+    """First `limit` updates that actually reached DSC_Update"""
+    print(f"\nDevice {model.id_device}: applied updates (first {limit})")
+    print(f"{'Accept ms':>12} {'Apply ms':>12} {'Raw':>8} {'Byte':>10}")
+    for t_accept, t_apply, raw, start in model.applied[:limit]:
+        print(f"{t_accept / NS_PER_MS:>12.2f} {t_apply / NS_PER_MS:>12.2f} {raw:>8} {start:>10,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ROME_DSC1 receive-path loss model")
+    parser.add_argument('--rate', type=float, default=200, help="uplink frame rate (Hz) for synthetic stream")
+    parser.add_argument('--duration', type=float, default=10, help="seconds of synthetic stream")
+    parser.add_argument('--capture', help="use ROME bytes from this capture file")
+    parser.add_argument('--port', type=int, default=PORT_ROME, help="port tag of the ROME bus in the capture")
+    parser.add_argument('--device', type=int, action='append', help="ID_DEVICE to model (repeatable)")
+    parser.add_argument('--show-applied', type=int, default=0, metavar='N',
+                        help="list the first N applied updates per device")
+    args = parser.parse_args()
+
+    if args.capture:
+        chunks = capture_stream(args.capture, args.port)
+        print(f"Source: {args.capture} (port {args.port})")
+    else:
+        chunks = synthetic_stream(args.rate, args.duration)
+        print(f"Source: synthetic {args.rate:.0f} Hz x {args.duration:.0f} s (5 devices per frame)")
+
+    results, models = simulate(chunks, args.device or range(1, NUM_DEVICES + 1))
+    print_results(results)
+    if args.show_applied:
+        for model in models.values():
+            print_applied(model, args.show_applied)
+
+
+if __name__ == "__main__":
+    main()
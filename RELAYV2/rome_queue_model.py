@@ -0,0 +1,274 @@
+"""
+ROME Queue Model - Host-Side Backpressure
+=========================================
+Model ringan antrian rome_tx_queue di raspi.c untuk sender di PC:
+    - tiap frame A5 99 (15 byte) masuk lewat wire USART1, lalu
+      Parse_Data_Packet() memanggil Queue_ROME() 5x
+    - ring 16 entry, 15 terpakai; paket yang sedang dikirim tetap
+      menempati slot sampai TX complete
+    - USART2 drain 1 paket 4 byte per ROME_PACKET_LEN * 10 bit / baud
+    - kalau ring penuh, Queue_ROME() membuang paket diam-diam
+
+Sender cukup memanggil admit() tepat sebelum write(); model memakai
+clock host (time.monotonic_ns()) dan serialisasi wire uplink, jadi
+occupancy yang diprediksi sama dengan firmware selama host tidak
+menulis lebih cepat dari yang terlihat di clock-nya.
+
+Mode BackpressureGate:
+    'throttle'  tunggu sampai 5 slot kosong sebelum kirim (tanpa drop)
+    'warn'      kirim sesuai jadwal, print peringatan begitu antrian
+                di atas high water (frame berikut bisa kena drop) atau
+                firmware diprediksi membuang paket
+    'off'       hanya hitung statistik
+
+Batas aman (115200 baud): uplink 768 frame/s, drain ROME 576 frame/s.
+
+Usage (prediksi + cek silang dengan firmware_model.py):
+    python rome_queue_model.py --rate 500 --rate 600 --rate 700 --duration 5
+"""
+
+import argparse
+import math
+import time
+
+# ===== CONFIGURATION =====
+BAUD_RATE = 115200
+ROME_QUEUE_SIZE = 16          # rome_tx_queue[16] di raspi.c
+ROME_PACKET_LEN = 4           # BB ID MSB LSB
+DATA_FRAME_LEN = 15           # A5 99 + 13 byte payload
+PACKETS_PER_FRAME = 5         # Queue_ROME() 5x per frame
+WARN_INTERVAL = 1.0           # seconds - jarak minimal antar peringatan
+THROTTLE_MARGIN = 2           # Slot cadangan saat throttle (jitter USB / OS)
+
+MODE_THROTTLE = 'throttle'
+MODE_WARN = 'warn'
+MODE_OFF = 'off'
+
+NS_PER_S = 1_000_000_000
+
+
+def byte_time_ns(baud):
+    """Wire time of one 8N1 byte"""
+    return 10 * NS_PER_S // baud
+
+
+def max_safe_rate_hz(baud=BAUD_RATE, packets_per_frame=PACKETS_PER_FRAME):
+    """
+    Highest sustained A5 99 frame rate without Queue_ROME() drops.
+
+    Returns:
+        (safe_hz, uplink_hz, drain_hz)
+    """
+    byte_ns = byte_time_ns(baud)
+    uplink_hz = NS_PER_S / (DATA_FRAME_LEN * byte_ns)
+    drain_hz = NS_PER_S / (packets_per_frame * ROME_PACKET_LEN * byte_ns)
+    return min(uplink_hz, drain_hz), uplink_hz, drain_hz
+
+
+class RomeQueueModel:
+    """Backlog model of rome_tx_queue driven by host send times"""
+
+    def __init__(self, baud=BAUD_RATE, capacity=ROME_QUEUE_SIZE - 1,
+                 packets_per_frame=PACKETS_PER_FRAME):
+        self.baud = baud
+        self.byte_ns = byte_time_ns(baud)
+        self.frame_ns = DATA_FRAME_LEN * self.byte_ns
+        self.packet_ns = ROME_PACKET_LEN * self.byte_ns
+        self.capacity = capacity
+        self.packets_per_frame = packets_per_frame
+
+        self._uplink_free_ns = 0   # wire USART1 bebas lagi
+        self._drain_until_ns = 0   # antrian ROME kosong pada waktu ini
+
+        # Statistics
+        self.frames = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.frames_with_drop = 0
+        self.last_occupancy = 0    # isi antrian tepat setelah frame terakhir
+        self.max_occupancy = 0
+        self._occupancy_area = 0   # integral occupancy * ns (perkiraan)
+        self._first_ns = None
+        self._last_ns = None
+
+    def arrival_ns(self, t_ns):
+        """Time the firmware parses a frame written at t_ns"""
+        return max(t_ns, self._uplink_free_ns) + self.frame_ns
+
+    def occupancy(self, t_ns):
+        """Packets in the ring (including the one on the wire) at t_ns"""
+        backlog = self._drain_until_ns - t_ns
+        return math.ceil(backlog / self.packet_ns) if backlog > 0 else 0
+
+    def time_until_room(self, t_ns, packets=None):
+        """ns to wait before writing so that `packets` slots are free on arrival"""
+        if packets is None:
+            packets = self.packets_per_frame
+        free_at = self._drain_until_ns - (self.capacity - packets) * self.packet_ns
+        if self.arrival_ns(t_ns) >= free_at:
+            return 0
+        # Arrival = max(write, wire uplink bebas) + frame_ns, jadi write paling cepat:
+        return free_at - self.frame_ns - t_ns
+
+    def would_drop(self, t_ns):
+        return self.time_until_room(t_ns) > 0
+
+    def frame(self, t_ns):
+        """
+        Account one A5 99 frame written at t_ns.
+
+        Returns:
+            number of ROME packets the firmware would drop
+        """
+        arrival = self.arrival_ns(t_ns)
+        self._uplink_free_ns = arrival
+        occupancy = self.occupancy(arrival)
+        accepted = max(0, min(self.packets_per_frame, self.capacity - occupancy))
+        dropped = self.packets_per_frame - accepted
+
+        # Integral occupancy sebelum frame ini (antrian turun linear)
+        if self._last_ns is not None:
+            backlog_then = max(0, self._drain_until_ns - self._last_ns)
+            span = arrival - self._last_ns
+            drained = min(span, backlog_then)
+            self._occupancy_area += (backlog_then * drained - drained * drained // 2) // self.packet_ns
+        if self._first_ns is None:
+            self._first_ns = arrival
+        self._last_ns = arrival
+
+        self._drain_until_ns = max(self._drain_until_ns, arrival) + accepted * self.packet_ns
+        self.frames += 1
+        self.enqueued += accepted
+        self.dropped += dropped
+        if dropped:
+            self.frames_with_drop += 1
+        self.last_occupancy = self.occupancy(arrival)
+        self.max_occupancy = max(self.max_occupancy, self.last_occupancy)
+        return dropped
+
+    def stats(self):
+        elapsed = (self._last_ns - self._first_ns) if self.frames > 1 else 0
+        return {
+            'frames': self.frames,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'frames_with_drop': self.frames_with_drop,
+            'max_occupancy': self.max_occupancy,
+            'avg_occupancy': self._occupancy_area / elapsed if elapsed else 0.0,
+        }
+
+
+class BackpressureGate:
+    """Throttle or warn before the firmware would start dropping"""
+
+    def __init__(self, model=None, mode=MODE_WARN, warn_interval_s=WARN_INTERVAL, high_water=None,
+                 margin=THROTTLE_MARGIN):
+        """
+        Args:
+            model: RomeQueueModel (default: BAUD_RATE)
+            mode: MODE_THROTTLE, MODE_WARN or MODE_OFF
+            warn_interval_s: minimum time between printed warnings
+            high_water: occupancy that triggers an early warning
+                        (default: capacity - packets per frame)
+            margin: extra free slots required before a throttled send
+        """
+        if mode not in (MODE_THROTTLE, MODE_WARN, MODE_OFF):
+            raise ValueError(f"Unknown backpressure mode: {mode}")
+        self.model = model or RomeQueueModel()
+        self.mode = mode
+        self.margin = margin
+        self.warn_interval_ns = int(warn_interval_s * NS_PER_S)
+        self.high_water = (self.model.capacity - self.model.packets_per_frame
+                           if high_water is None else high_water)
+        self._last_warn_ns = None
+
+        # Statistics
+        self.throttled = 0       # frame yang ditahan
+        self.throttle_ns = 0     # total waktu tahan
+        self.warnings = 0        # frame di atas high water / kena drop (mode warn)
+
+    def admit(self, now_ns=None):
+        """
+        Call right before writing one A5 99 frame.
+
+        Returns:
+            ROME packets the firmware is predicted to drop for this frame
+        """
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        model = self.model
+
+        if self.mode == MODE_THROTTLE:
+            wait_ns = model.time_until_room(now_ns, model.packets_per_frame + self.margin)
+            if wait_ns > 0:
+                deadline = now_ns + wait_ns
+                time.sleep(wait_ns / NS_PER_S)
+                now_ns = time.monotonic_ns()
+                while now_ns < deadline:
+                    now_ns = time.monotonic_ns()
+                self.throttled += 1
+                self.throttle_ns += wait_ns
+
+        dropped = model.frame(now_ns)
+        if self.mode == MODE_WARN:
+            if dropped or model.last_occupancy > self.high_water:
+                self.warnings += 1
+                self._warn(now_ns, model.last_occupancy)
+        return dropped
+
+    def _warn(self, now_ns, occupancy):
+        if self._last_warn_ns is not None and now_ns - self._last_warn_ns < self.warn_interval_ns:
+            return
+        self._last_warn_ns = now_ns
+        model = self.model
+        safe = max_safe_rate_hz(model.baud, model.packets_per_frame)[0]
+        state = "PENUH" if model.dropped else "hampir penuh"
+        print(f"\n⚠️  ROME queue {state} (prediksi {occupancy}/{model.capacity}, "
+              f"{model.dropped:,} paket dibuang firmware) - turunkan rate di bawah {safe:.0f} Hz")
+
+
+def format_stats(stats):
+    """One-line text of RomeQueueModel.stats()"""
+    return (f"frames {stats['frames']:,} | ROME enq {stats['enqueued']:,} dropped {stats['dropped']:,} "
+            f"({stats['frames_with_drop']:,} frames) | queue max {stats['max_occupancy']}/{ROME_QUEUE_SIZE - 1} "
+            f"avg {stats['avg_occupancy']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict rome_tx_queue occupancy for an uplink frame rate")
+    parser.add_argument('--rate', type=float, action='append', help="frame rate in Hz (repeatable)")
+    parser.add_argument('--duration', type=float, default=5.0, help="seconds per rate")
+    parser.add_argument('--baud', type=int, default=BAUD_RATE)
+    parser.add_argument('--no-check', action='store_true', help="skip cross-check with firmware_model")
+    args = parser.parse_args()
+
+    safe, uplink, drain = max_safe_rate_hz(args.baud)
+    print("=" * 90)
+    print(f"Baud {args.baud}: uplink max {uplink:.0f} frame/s, ROME drain max {drain:.0f} frame/s "
+          f"-> max safe {safe:.0f} frame/s")
+    print("=" * 90)
+
+    for rate in args.rate or (200, 500, 576, 600, 700):
+        period_ns = round(NS_PER_S / rate)
+        count = int(args.duration * rate)
+        model = RomeQueueModel(args.baud)
+        for i in range(count):
+            model.frame(i * period_ns)
+        print(f"{rate:>6.0f} Hz  model:    {format_stats(model.stats())}")
+
+        if not args.no_check:
+            from firmware_model import RelayFirmwareModel  # Linux / macOS only (tty)
+            fw = RelayFirmwareModel(baud=args.baud)
+            frame = bytes([0xA5, 0x99] + [0] * (DATA_FRAME_LEN - 2))
+            for i in range(count):
+                fw.run_until(i * period_ns)
+                fw.receive(frame, i * period_ns)
+            fw.run_until(count * period_ns + NS_PER_S)
+            st = fw.stats()
+            print(f"{'':>9} firmware: ROME enq {st['rome_enqueued']:,} dropped {st['rome_dropped']:,} | "
+                  f"queue max {st['rome_queue_max']}/{ROME_QUEUE_SIZE - 1}")
+    print("=" * 90)
+
+
+if __name__ == "__main__":
+    main()
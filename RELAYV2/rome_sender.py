@@ -0,0 +1,191 @@
+"""
+Coalescing ROME Sender - Change Suppression + Keepalive
+=======================================================
+Pengirim ROME yang menyimpan nilai terakhir yang benar-benar terkirim
+per device:
+
+- set() / set_angle() hanya mencatat nilai terbaru (latest wins)
+- flush() sekali per tick: semua update [BB ID MSB LSB] yang pending
+  digabung jadi SATU write()
+- device yang berubah kurang dari DEADBAND (raw count, 1 = 0.1 deg)
+  dibanding nilai terakhir terkirim tidak dikirim
+- device yang tidak terkirim selama KEEPALIVE_S dikirim ulang dengan
+  nilai terbaru, jadi nilai di device tetap konvergen walaupun
+  perubahan kecil ditahan deadband
+
+Deadband dibandingkan terhadap nilai terakhir TERKIRIM, bukan request
+terakhir, jadi drift pelan tetap terkirim begitu akumulasinya lewat
+deadband. Selisih dihitung modulo 16-bit (int16), sesuai encoding
+Device 5 yang signed.
+
+Kalau diberi CalibrationSet (rome_calibration.py), set_angle() /
+set_angles() menerapkan koreksi per device sebelum encoding; set() raw
+tidak dikoreksi.
+
+FrameChangeFilter: versi untuk frame A5 99 ke RELAYV2. Firmware selalu
+meneruskan kelima device dari satu frame, jadi yang bisa ditahan hanya
+frame utuh yang tidak berubah (discrete sama, semua device dalam
+deadband), plus keepalive.
+
+Contoh:
+    sender = CoalescingRomeSender(ser, deadband=2)
+    sender.set_angle(2, 120.5)
+    sender.set_angle(5, -30.0)
+    sender.flush()          # satu write() berisi 2 paket
+"""
+
+import time
+
+from frame_codec import ROME_FRAME_LEN, NUM_DEVICES
+from trajectory_player import encode_angles, ROME_HEADER_BYTE
+
+# ===== CONFIGURATION =====
+DEADBAND = 0        # raw count; 0 = kirim setiap perubahan
+KEEPALIVE_S = 1.0   # refresh device yang diam; None = tanpa keepalive
+
+NS_PER_S = 1_000_000_000
+
+
+def raw_delta(a, b):
+    """Absolute difference of two 16-bit words taken as int16"""
+    d = (a - b) & 0xFFFF
+    return 0x10000 - d if d & 0x8000 else d
+
+
+class CoalescingRomeSender:
+    """Per-device last-sent state, one write() per flush"""
+
+    def __init__(self, ser, deadband=DEADBAND, keepalive_s=KEEPALIVE_S, calibration=None):
+        """
+        Args:
+            ser: serial.Serial (or anything with write())
+            deadband: minimum raw change that is sent
+            keepalive_s: resend a device after this many seconds of silence
+            calibration: optional CalibrationSet applied by set_angle() / set_angles()
+        """
+        self.ser = ser
+        self.calibration = calibration
+        self.deadband = deadband
+        self.keepalive_ns = None if keepalive_s is None else int(keepalive_s * NS_PER_S)
+
+        self.latest = {}     # device_id -> raw terbaru (request)
+        self.sent = {}       # device_id -> raw terakhir terkirim
+        self.sent_ns = {}    # device_id -> waktu kirim terakhir
+        self._dirty = set()
+
+        # Statistics
+        self.writes = 0
+        self.packets = 0
+        self.keepalives = 0
+        self.suppressed = 0  # update yang tidak dikirim (sama / dalam deadband)
+        self.coalesced = 0   # update yang ditimpa sebelum flush
+        self.bytes_sent = 0
+
+    def set(self, device_id, raw):
+        """Record the newest raw value for a device (sent on the next flush)"""
+        if device_id in self._dirty:
+            self.coalesced += 1
+        self.latest[device_id] = raw & 0xFFFF
+        self._dirty.add(device_id)
+
+    def set_angle(self, device_id, angle):
+        self.set(device_id, int(encode_angles([device_id], [angle], self.calibration)[0, 0]))
+
+    def set_angles(self, device_ids, angles):
+        """Set several devices at once (vectorised encoding)"""
+        for device_id, raw in zip(device_ids, encode_angles(device_ids, [angles], self.calibration)[0]):
+            self.set(device_id, int(raw))
+
+    def _due(self, device_id, now_ns, force):
+        """'update', 'keepalive' or None for one device"""
+        raw = self.latest[device_id]
+        last = self.sent.get(device_id)
+        if force or last is None:
+            return 'update'
+        if device_id in self._dirty and raw_delta(raw, last) > self.deadband:
+            return 'update'
+        if self.keepalive_ns is not None and now_ns - self.sent_ns[device_id] >= self.keepalive_ns:
+            return 'keepalive'
+        if device_id in self._dirty:
+            self.suppressed += 1
+        return None
+
+    def flush(self, now_ns=None, force=False):
+        """
+        Send every due device in one write().
+
+        Args:
+            force: send all pending devices regardless of deadband
+
+        Returns:
+            number of packets written
+        """
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        out = bytearray()
+        for device_id in sorted(self.latest):
+            due = self._due(device_id, now_ns, force and device_id in self._dirty)
+            if due is None:
+                continue
+            raw = self.latest[device_id]
+            out += bytes([ROME_HEADER_BYTE, device_id, raw >> 8, raw & 0xFF])
+            self.sent[device_id] = raw
+            self.sent_ns[device_id] = now_ns
+            if due == 'keepalive':
+                self.keepalives += 1
+        self._dirty.clear()
+
+        if not out:
+            return 0
+        self.ser.write(out)
+        count = len(out) // ROME_FRAME_LEN
+        self.writes += 1
+        self.packets += count
+        self.bytes_sent += len(out)
+        return count
+
+    def stats(self):
+        return {
+            'writes': self.writes,
+            'packets': self.packets,
+            'keepalives': self.keepalives,
+            'suppressed': self.suppressed,
+            'coalesced': self.coalesced,
+            'bytes': self.bytes_sent,
+        }
+
+
+class FrameChangeFilter:
+    """Decide whether an A5 99 frame carries anything new"""
+
+    def __init__(self, deadband=DEADBAND, keepalive_s=KEEPALIVE_S):
+        self.deadband = deadband
+        self.keepalive_ns = None if keepalive_s is None else int(keepalive_s * NS_PER_S)
+        self._last = None      # (discretes, device values) terakhir terkirim
+        self._last_ns = None
+
+        # Statistics
+        self.sent = 0
+        self.skipped = 0
+        self.keepalives = 0
+
+    def should_send(self, discretes, device_values, now_ns=None):
+        """True if the frame must go out (and remember it as sent)"""
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        discretes = tuple(discretes)
+        values = tuple(v & 0xFFFF for v in device_values[:NUM_DEVICES])
+
+        send = self._last is None or discretes != self._last[0] or any(
+            raw_delta(v, last) > self.deadband for v, last in zip(values, self._last[1]))
+        if not send and self.keepalive_ns is not None and now_ns - self._last_ns >= self.keepalive_ns:
+            send = True
+            self.keepalives += 1
+
+        if not send:
+            self.skipped += 1
+            return False
+        self._last = (discretes, values)
+        self._last_ns = now_ns
+        self.sent += 1
+        return True
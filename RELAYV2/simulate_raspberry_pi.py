@@ -18,10 +18,20 @@ import serial
 import time
 from datetime import datetime
 
+from deadline_scheduler import DeadlineScheduler, format_stats
+from rome_sender import FrameChangeFilter
+from rome_queue_model import BackpressureGate, RomeQueueModel, max_safe_rate_hz, format_stats as format_queue_stats
+
 # ===== CONFIGURATION =====
 SERIAL_PORT = 'COM11'# Port ke RELAYV2 UART1
 BAUD_RATE = 115200
-INTERVAL = 0.1  # Send every 100ms
+INTERVAL = 0.1  # Send every 100ms (0.005 = 200 Hz; maks ~576 Hz sebelum rome_tx_queue penuh @ 115200)
+SPIN_US = 300  # Busy-wait sebelum deadline untuk rate tinggi (0 = off)
+DISPLAY_INTERVAL = 0.1  # Print paling sering tiap 100 ms, tidak ikut rate kirim
+SKIP_UNCHANGED = False  # True = frame tanpa perubahan tidak dikirim (mode load test: False)
+DEADBAND = 0  # Perubahan raw device <= ini dianggap tidak berubah
+KEEPALIVE_S = 1.0  # Frame tetap dikirim minimal tiap N detik walaupun tidak berubah
+BACKPRESSURE = 'warn'  # 'throttle' = tahan frame sebelum rome_tx_queue penuh, 'warn', 'off'
 
 def create_packet(device_values):
     """
@@ -58,6 +68,12 @@ def main():
     print(f"Port: {SERIAL_PORT}")
     print(f"Baud Rate: {BAUD_RATE}")
     print(f"Interval: {INTERVAL * 1000:.0f} ms")
+    safe_hz, uplink_hz, drain_hz = max_safe_rate_hz(BAUD_RATE)
+    print(f"Max safe rate: {safe_hz:.0f} Hz (uplink {uplink_hz:.0f} Hz, ROME drain {drain_hz:.0f} Hz) | "
+          f"Backpressure: {BACKPRESSURE}")
+    if 1.0 / INTERVAL > safe_hz:
+        print(f"⚠️  {1.0 / INTERVAL:.0f} Hz di atas batas: firmware akan membuang update device"
+              + (" -> rate dibatasi (throttle)" if BACKPRESSURE == 'throttle' else ""))
     print("=" * 70)
     
     # Ask user for auto-increment mode
@@ -85,26 +101,35 @@ def main():
         print(f"{'Time':<12} {'Packet':<8} {'Dev1':<8} {'Dev2':<8} {'Dev3':<8} {'Dev4':<8} {'Dev5':<8}")
         print("-" * 70)
         
+        # Jadwal kirim absolut: print / overshoot sleep tidak menggeser rate
+        scheduler = DeadlineScheduler(1.0 / INTERVAL, spin_us=SPIN_US)
+        change_filter = FrameChangeFilter(DEADBAND, KEEPALIVE_S) if SKIP_UNCHANGED else None
+        gate = BackpressureGate(RomeQueueModel(BAUD_RATE), mode=BACKPRESSURE)
+        last_display = 0.0
+        
         while True:
+            scheduler.wait()
+            
             # Create packet
             packet = create_packet(device_values)
             
-            # Send packet
-            ser.write(bytes(packet))
-            packet_count += 1
+            # Send packet (kalau SKIP_UNCHANGED, frame yang sama ditahan sampai keepalive)
+            if change_filter is None or change_filter.should_send(packet[2:5], device_values):
+                gate.admit()
+                ser.write(bytes(packet))
+                packet_count += 1
             
             # Display with device breakdown
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            dev_str = ' '.join([f'{v:05d}' for v in device_values])
-            
-            print(f"{timestamp:<12} #{packet_count:04d}   {device_values[0]:05d}    {device_values[1]:05d}    {device_values[2]:05d}    {device_values[3]:05d}    {device_values[4]:05d}")
+            now = time.monotonic()
+            if now - last_display >= DISPLAY_INTERVAL:
+                last_display = now
+                timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+                print(f"{timestamp:<12} #{packet_count:04d}   {device_values[0]:05d}    {device_values[1]:05d}    {device_values[2]:05d}    {device_values[3]:05d}    {device_values[4]:05d}")
             
             # Auto-increment if enabled
             if auto_increment:
                 for i in range(5):
                     device_values[i] = (device_values[i] + 100) % 65536
-            
-            time.sleep(INTERVAL)
     
     except serial.SerialException as e:
         print(f"\n❌ Serial Error: {e}")
@@ -116,6 +141,14 @@ def main():
     except KeyboardInterrupt:
         print("\n\n⏹️  Stopped by user")
         print(f"\nTotal packets sent: {packet_count}")
+        if 'change_filter' in locals() and change_filter is not None:
+            print(f"Unchanged frames skipped: {change_filter.skipped} (keepalive {change_filter.keepalives})")
+        if 'scheduler' in locals():
+            print(format_stats(scheduler.stats()))
+        if 'gate' in locals():
+            print(f"ROME queue (model): {format_queue_stats(gate.model.stats())}")
+            if gate.throttled:
+                print(f"Throttled frames: {gate.throttled:,} ({gate.throttle_ns / 1e9:.2f}s ditahan)")
     
     finally:
         if 'ser' in locals() and ser.is_open:
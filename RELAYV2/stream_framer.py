@@ -0,0 +1,206 @@
+"""
+Stream Framer - Resynchronising, Zero-Copy
+==========================================
+Framer reusable untuk semua stream UART di RELAYV2:
+    A5 99 + 13 byte  (DATA, Raspy -> RELAYV2, 15 byte)
+    99 A5 + 1 byte   (STATUS, RELAYV2 -> Raspy, 3 byte)
+    BB ID MSB LSB    (ROME, RELAYV2 -> ROME device, 4 byte)
+    AA 01 04 D2      (NANO, RELAYV2 -> Nano, 4 byte)
+
+Cara kerja:
+- Data masuk ditulis ke buffer yang sudah dialokasi di awal.
+- Framer hanya menggeser read offset, tidak ada buffer = buffer[15:].
+- Header dicari dengan bytearray.find() (C speed), bukan loop per byte.
+  Posisi hasil find() per kind di-cache: kind yang jarang / tidak pernah
+  muncul tidak men-scan ulang seluruh buffer tiap frame, jadi setiap
+  byte di-scan paling banyak sekali per kind.
+- Buffer di-compact hanya kalau ruang di belakang habis.
+- Frame dikembalikan sebagai memoryview (tanpa copy).
+
+PENTING: memoryview dari frames() hanya valid sampai feed() berikutnya.
+Kalau perlu disimpan, copy dulu dengan bytes(view).
+"""
+
+from frame_codec import (
+    DATA_HEADER, STATUS_HEADER, ROME_HEADER, NANO_HEADER,
+    DATA_FRAME_LEN, STATUS_FRAME_LEN, ROME_FRAME_LEN, NANO_FRAME_LEN, NUM_DEVICES,
+)
+
+# ===== FRAME TYPES =====
+DATA = 'data'
+STATUS = 'status'
+ROME = 'rome'
+NANO = 'nano'
+
+FRAME_SPECS = {
+    DATA: (DATA_HEADER, DATA_FRAME_LEN),
+    STATUS: (STATUS_HEADER, STATUS_FRAME_LEN),
+    ROME: (ROME_HEADER, ROME_FRAME_LEN),
+    NANO: (NANO_HEADER, NANO_FRAME_LEN),
+}
+
+DEFAULT_CAPACITY = 64 * 1024  # bytes
+
+
+class StreamFramer:
+    """Linear-time framer over a preallocated buffer"""
+
+    def __init__(self, kinds=(DATA,), capacity=DEFAULT_CAPACITY):
+        """
+        Args:
+            kinds: frame types to recognise (DATA, STATUS, ROME, NANO)
+            capacity: initial buffer size in bytes (grows if needed)
+        """
+        for kind in kinds:
+            if kind not in FRAME_SPECS:
+                raise ValueError(f"Unknown frame type: {kind}")
+
+        self.kinds = tuple(kinds)
+        self._specs = [(kind,) + FRAME_SPECS[kind] for kind in self.kinds]
+        # Byte terakhir yang harus disimpan kalau header belum lengkap
+        self._keep_tail = max(len(header) for _, header, _ in self._specs) - 1
+
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0
+        self._end = 0
+        self._in_sync = True
+        self._clear_hits()
+
+        # Statistics
+        self.bytes_in = 0
+        self.frame_counts = {kind: 0 for kind in self.kinds}
+        self.resyncs = 0
+        self.discarded_bytes = 0
+        self.compactions = 0
+
+    def __len__(self):
+        """Number of buffered, not yet framed bytes"""
+        return self._end - self._start
+
+    def reset(self):
+        """Drop buffered bytes (counters are kept)"""
+        self._start = 0
+        self._end = 0
+        self._clear_hits()
+
+    def _clear_hits(self):
+        # Per kind: posisi header terakhir yang ditemukan (-1 = tidak ada),
+        # dan offset awal scan berikutnya (sebelumnya sudah pasti bukan header)
+        self._hits = [-1] * len(self._specs)
+        self._scan_from = [0] * len(self._specs)
+
+    def feed(self, data):
+        """Append received bytes to the buffer"""
+        n = len(data)
+        if n == 0:
+            return
+        self.bytes_in += n
+
+        if self._end + n > len(self._buf):
+            self._make_room(n)
+
+        self._buf[self._end:self._end + n] = data
+        self._end += n
+
+    def _make_room(self, n):
+        """Compact (and grow if still too small) so n more bytes fit"""
+        pending = self._end - self._start
+        if pending + n > len(self._buf):
+            # Buffer baru; view lama tetap valid ke buffer lama
+            size = len(self._buf)
+            while pending + n > size:
+                size *= 2
+            new_buf = bytearray(size)
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        else:
+            self._buf[:pending] = self._view[self._start:self._end]
+        # Geser cache find() ikut isi buffer
+        shift = self._start
+        self._hits = [pos - shift if pos >= shift else -1 for pos in self._hits]
+        self._scan_from = [max(0, pos - shift) for pos in self._scan_from]
+        self._start = 0
+        self._end = pending
+        self.compactions += 1
+
+    def _find_header(self):
+        """Return (pos, kind, length) of the earliest header, or (-1, None, 0)"""
+        best_pos = -1
+        best = (None, 0)
+        buf = self._buf
+        start = self._start
+        end = self._end
+        hits = self._hits
+        scan_from = self._scan_from
+        for i, (kind, header, length) in enumerate(self._specs):
+            pos = hits[i]
+            if pos < start:
+                # Cache basi (sudah dilewati) atau belum ketemu: scan bagian baru saja
+                pos = buf.find(header, max(start, scan_from[i]), end)
+                hits[i] = pos
+                if pos >= 0:
+                    scan_from[i] = pos + 1
+                else:
+                    scan_from[i] = max(start, end - len(header) + 1)
+            if pos >= 0 and (best_pos < 0 or pos < best_pos):
+                best_pos = pos
+                best = (kind, length)
+        return (best_pos,) + best
+
+    def _discard(self, count):
+        if count > 0:
+            self.discarded_bytes += count
+            if self._in_sync:
+                # Satu kejadian resync per kehilangan sinkronisasi
+                self.resyncs += 1
+                self._in_sync = False
+            self._start += count
+
+    def frames(self):
+        """
+        Yield (kind, memoryview) for every complete frame in the buffer.
+
+        Garbage before a header is discarded and counted as one resync.
+        """
+        buf = self._buf
+        view = self._view
+        while True:
+            pos, kind, length = self._find_header()
+
+            if pos < 0:
+                # Tidak ada header: simpan ekor yang mungkin awal header
+                pending = self._end - self._start
+                self._discard(pending - min(pending, self._keep_tail))
+                if self._start == self._end:
+                    self._start = self._end = 0
+                    self._clear_hits()
+                return
+
+            self._discard(pos - self._start)
+
+            if self._end - self._start < length:
+                return  # Tunggu sisa frame
+
+            if kind == ROME and not 1 <= buf[self._start + 1] <= NUM_DEVICES:
+                # 0xBB di tengah data, bukan header ROME
+                self._discard(1)
+                continue
+
+            start = self._start
+            self._start = start + length
+            self.frame_counts[kind] += 1
+            self._in_sync = True
+            yield kind, view[start:start + length]
+
+    def stats(self):
+        """Snapshot of counters as a dict"""
+        return {
+            'bytes_in': self.bytes_in,
+            'frames': dict(self.frame_counts),
+            'resyncs': self.resyncs,
+            'discarded_bytes': self.discarded_bytes,
+            'compactions': self.compactions,
+            'buffered': len(self),
+        }
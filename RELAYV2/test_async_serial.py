@@ -0,0 +1,131 @@
+"""
+Test async_serial lewat Linux pseudo-terminal (tanpa hardware).
+
+Run: python -m pytest -q test_async_serial.py
+"""
+
+import asyncio
+import os
+
+import pytest
+
+serial = pytest.importorskip('serial')
+if os.name != 'posix':
+    pytest.skip("pty hanya ada di Linux / macOS", allow_module_level=True)
+
+import async_serial
+from async_serial import AsyncSerialPort
+
+
+def _pty():
+    import tty
+    master, slave = os.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    path = os.ttyname(slave)
+    return master, slave, path
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_read_then_close_stops_iteration():
+    master, slave, path = _pty()
+
+    async def main():
+        port = await AsyncSerialPort(path).open()
+        received = []
+
+        async def consume():
+            async for _, data in port:
+                received.append(data)
+
+        task = asyncio.create_task(consume())
+        os.write(master, b'\x99\xA5\x01')
+        while not received:
+            await asyncio.sleep(0.01)
+        port.close()
+        await task  # Tanpa sentinel task ini menunggu selamanya
+        with pytest.raises(serial.SerialException):
+            await port.read_chunk()
+        return received
+
+    try:
+        assert _run(main()) == [b'\x99\xA5\x01']
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_error_delivered_when_queue_full(monkeypatch):
+    monkeypatch.setattr(async_serial, 'QUEUE_SIZE', 2)
+    master, slave, path = _pty()
+
+    async def main():
+        port = await AsyncSerialPort(path).open()
+        port._push(1, b'a')
+        port._push(2, b'b')
+        port._fail(OSError("port gone"))
+        assert await port.read_chunk() == (2, b'b')
+        with pytest.raises(OSError):
+            await port.read_chunk()
+        port.close()
+        return port.chunks_dropped
+
+    try:
+        assert _run(main()) >= 1
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_fallback_write_keeps_order_off_loop_thread():
+    master, slave, path = _pty()
+
+    async def main():
+        port = await AsyncSerialPort(path).open()
+        # Paksa jalur fallback (seperti COMxx di Windows)
+        port.loop.remove_reader(port._fd)
+        port._fd = None
+        for i in range(20):
+            port.write(bytes([i]) * 50)
+        await port.drain()
+        sent = port.bytes_tx
+        port.close()
+        return sent
+
+    try:
+        assert _run(main()) == 1000
+        received = b''
+        while len(received) < 1000:
+            received += os.read(master, 4096)
+        assert received == b''.join(bytes([i]) * 50 for i in range(20))
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_tx_error_releases_drain():
+    master, slave, path = _pty()
+
+    async def main():
+        port = await AsyncSerialPort(path).open()
+        port.write(bytes(1 << 20))  # Tidak ada yang baca: sisa menunggu writable
+        assert port._tx_pending
+        drain = asyncio.create_task(port.drain())
+        await asyncio.sleep(0.05)
+        assert not drain.done()
+        os.close(master)  # Seperti adapter USB dicabut: write berikutnya EIO
+        with pytest.raises(OSError):
+            await drain
+        with pytest.raises(OSError):
+            await port.read_chunk()
+        with pytest.raises(OSError):
+            port.write(b'\x99')
+        port.close()
+
+    try:
+        _run(main())
+    finally:
+        os.close(slave)
@@ -0,0 +1,59 @@
+"""
+Test capture_file: round-trip, index cache, session per append.
+
+Run: python -m pytest -q test_capture_file.py
+"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from capture_file import CaptureWriter, CaptureReader, PORT_RASPI, PORT_ROME, DIR_RX, DIR_TX
+
+MS = 1_000_000
+S = 1_000_000_000
+
+
+def _write(path, stamps, port=PORT_RASPI):
+    with CaptureWriter(path) as writer:
+        for t_ns in stamps:
+            writer.write(t_ns.to_bytes(8, 'little'), port, DIR_RX, t_ns)
+
+
+def test_round_trip_and_cached_index(tmp_path):
+    path = str(tmp_path / 'a.rcap')
+    with CaptureWriter(path) as writer:
+        writer.write(b'\x99\xA5\x01', PORT_RASPI, DIR_RX, 10)
+        writer.write(b'\xBB\x01\x00\x10', PORT_ROME, DIR_TX, 20)
+        writer.write(bytes(70000), PORT_RASPI, DIR_RX, 30)  # > 64 KB: 2 record
+
+    for _ in range(2):  # build, lalu dari <file>.idx.npz
+        with CaptureReader(path) as reader:
+            assert len(reader) == 4
+            t_ns, port, direction, payload = reader[1]
+            assert (t_ns, port, direction, bytes(payload)) == (20, PORT_ROME, DIR_TX, b'\xBB\x01\x00\x10')
+            assert len(reader.stream_bytes(PORT_RASPI)) == 3 + 70000
+            assert list(reader.sessions) == [0]
+
+
+def test_time_slice_single_session(tmp_path):
+    path = str(tmp_path / 'one.rcap')
+    _write(path, [S + i * 5 * MS for i in range(100)])
+    with CaptureReader(path, use_index_cache=False) as reader:
+        assert reader.time_slice(S + 50 * MS, S + 100 * MS) == (10, 20)
+        assert reader.duration_s == pytest.approx(0.495)
+
+
+def test_appended_capture_sliced_per_session(tmp_path):
+    path = str(tmp_path / 'appended.rcap')
+    _write(path, [100 * S + i * 10 * MS for i in range(50)])  # session 0: uptime 100 s
+    _write(path, [5 * S + i * 10 * MS for i in range(30)])    # reboot: uptime 5 s
+
+    with CaptureReader(path, use_index_cache=False) as reader:
+        assert list(reader.sessions) == [0, 50]
+        assert reader.session_range(1) == (50, 80)
+        with pytest.raises(ValueError):
+            reader.time_slice(5 * S, 6 * S)
+        assert reader.time_slice(5 * S, 5 * S + 100 * MS, session=1) == (50, 60)
+        assert reader.time_slice(100 * S, 100 * S + 100 * MS, session=0) == (0, 10)
+        assert reader.duration_s == pytest.approx(0.49 + 0.29)
@@ -0,0 +1,87 @@
+"""
+Test capture_query: lompatan sudut dalam derajat ROME_DSC1 (raw / 10),
+index per session untuk capture yang di-append setelah reboot.
+
+Run: python -m pytest -q test_capture_query.py
+"""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from capture_file import CaptureWriter, CaptureReader, PORT_RASPI
+from capture_query import build_index
+from frame_codec import make_frames, encode_frames, device_angles
+
+PERIOD_NS = 5_000_000
+
+
+def _write_capture(path, devices, t0_ns=0, discrete_b=0):
+    frames = make_frames(len(devices), devices=devices, discrete_b=discrete_b)
+    data = encode_frames(frames)
+    with CaptureWriter(str(path)) as writer:
+        for i in range(len(frames)):
+            writer.write(data[i * 15:(i + 1) * 15], PORT_RASPI, t_ns=t0_ns + (i + 1) * PERIOD_NS)
+
+
+def test_device_angles_match_firmware():
+    frames = make_frames(3, devices=[[0, 1800, 3599, 10, 1799],
+                                     [1, 1, 1, 1, 0],
+                                     [0, 0, 0, 0, 0xFFFF]])
+    angles = device_angles(frames)
+    assert angles[0].tolist() == pytest.approx([0.0, 180.0, 359.9, 1.0, 0.0])
+    assert angles[1, 4] == pytest.approx(-179.9)
+    assert angles[2, 4] == pytest.approx(-180.0)  # int16 cast: 0xFFFF = -1
+    # Satu frame (snapshot monitor_complete) pakai rumus yang sama
+    assert device_angles(frames[0]).tolist() == pytest.approx(angles[0].tolist())
+
+
+def test_jump_in_decidegrees(tmp_path):
+    devices = np.zeros((100, 5), dtype=np.uint16)
+    devices[:, 4] = 1799                  # Device 5 = 0.0 deg
+    devices[40:, 4] = 1899                # +10.0 deg
+    devices[60:, 0] = 110                 # Device 1: 0 -> 11.0 deg
+    devices[80:, 1] = 50                  # Device 2: 0 -> 5.0 deg (di bawah threshold)
+    path = tmp_path / 'jump.rcap'
+    _write_capture(path, devices)
+
+    with CaptureReader(str(path), use_index_cache=False) as reader:
+        index = build_index(reader, block_frames=16)
+        hits, decoded = index.jumps(reader, 5, 9.5)
+        assert [(seq, before, after) for _, seq, before, after in hits] == [
+            (40, pytest.approx(0.0), pytest.approx(10.0))]
+        assert decoded == 1
+
+        hits, _ = index.jumps(reader, 1, 10)
+        assert [seq for _, seq, _, _ in hits] == [60]
+        hits, decoded = index.jumps(reader, 2, 10)
+        assert hits == [] and decoded == 0
+
+
+def test_index_per_session(tmp_path):
+    path = tmp_path / 'reboot.rcap'
+    S = 1_000_000_000
+    first = np.zeros((100, 5), dtype=np.uint16)
+    second = np.full((60, 5), 1000, dtype=np.uint16)   # Device 1-4 loncat 100 deg setelah reboot
+    second[:, 4] = 1799
+    second[30:, 0] = 1200                              # Loncatan asli di session 1
+    _write_capture(path, first, t0_ns=100 * S, discrete_b=1)    # EHSI, uptime 100 s
+    _write_capture(path, second, t0_ns=5 * S, discrete_b=0)     # EADI, jam mulai ulang
+
+    with CaptureReader(str(path), use_index_cache=False) as reader:
+        index = build_index(reader, block_frames=16)
+        assert list(index.sessions) == [0, 1]
+        assert np.all(index.run_end >= index.run_start)
+        assert index.duration_ns == 99 * PERIOD_NS + 59 * PERIOD_NS
+        assert index.t0(1) == 5 * S + PERIOD_NS
+
+        total, _, _, sessions = index.time_in('EHSI')
+        assert total == 99 * PERIOD_NS and list(sessions) == [0]
+        total, _, _, sessions = index.time_in('!Mode=EHSI')
+        assert total == 59 * PERIOD_NS and list(sessions) == [1]
+        assert set(index.blocks[:, 6]) == {0, 1}
+
+        # Reboot bukan lompatan sudut: sudut tidak dibandingkan lintas session
+        hits, _ = index.jumps(reader, 1, 10)
+        assert [seq for _, seq, _, _ in hits] == [130]
+        assert index.frame_session(130) == 1
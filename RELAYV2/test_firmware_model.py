@@ -0,0 +1,34 @@
+"""
+Test firmware_model: timer Value_Discrete() harus sama dengan DI.c.
+
+Run: python -m pytest -q test_firmware_model.py
+"""
+
+from firmware_model import RelayFirmwareModel, NS_PER_MS, NS_PER_S
+
+
+def _status_times(main_loop_us, duration_s=1.0):
+    sent = []
+    model = RelayFirmwareModel(main_loop_us=main_loop_us, on_raspi_tx=lambda t, d: sent.append(t))
+    model.run_until(int(duration_s * NS_PER_S))
+    return model, sent
+
+
+def test_status_every_5ms_with_fast_loop():
+    model, sent = _status_times(0)
+    assert len(sent) == 200
+    assert model.nano_tx_sent == 3
+
+
+def test_slow_loop_does_not_catch_up():
+    # Pass tiap 3 ms: tick 6, 12, 18 ... (last_tx = HAL_GetTick()), bukan 5 ms rata-rata
+    model, sent = _status_times(3000)
+    assert len(sent) == 166
+    gaps = {b - a for a, b in zip(sent, sent[1:])}
+    assert gaps == {6 * NS_PER_MS}
+
+
+def test_loop_jitter_delays_following_packets():
+    # Pass tiap 4 ms: 8, 16, 24 ... -> 8 ms per status
+    _, sent = _status_times(4000)
+    assert len(sent) == 125
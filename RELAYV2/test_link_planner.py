@@ -0,0 +1,29 @@
+"""
+Test link_planner: verdict harus ikut cadence status firmware (DI.c).
+
+Run: python -m pytest -q test_link_planner.py
+"""
+
+from link_planner import main, simulate, sustainable
+
+
+def test_default_rate_sustainable():
+    ok, reasons = sustainable(simulate(200))
+    assert ok, reasons
+
+
+def test_slow_loop_status_rate_not_sustainable():
+    # Pass 3 ms -> status tiap 6 ms (~500 dari 600), di bawah STATUS_MIN_RATIO
+    stats = simulate(50, loop_us=3000)
+    assert stats['status_in_window'] == 500
+    ok, reasons = sustainable(stats)
+    assert not ok
+    assert any('Status 99 A5 cuma' in reason for reason in reasons)
+
+
+def test_cli_loop_us_verdict(monkeypatch, capsys):
+    monkeypatch.setattr('sys.argv', ['link_planner.py', '--uplink-rate', '50', '--loop-us', '3000', '--no-search'])
+    main()
+    out = capsys.readouterr().out
+    assert 'Status TX:      500/600' in out
+    assert 'NOT SUSTAINABLE' in out
@@ -0,0 +1,56 @@
+"""
+Test metrics_exporter: body harus bisa di-parse parser OpenMetrics resmi.
+
+Run: python -m pytest -q test_metrics_exporter.py
+"""
+
+import pytest
+
+parser = pytest.importorskip('prometheus_client.openmetrics.parser')
+pytest.importorskip('serial')  # uart_diagnostic import pyserial
+
+from latency_histogram import NS_PER_S
+from metrics_exporter import MetricsExporter
+from stream_framer import StreamFramer
+from uart_diagnostic import LinkDiagnostics
+
+STATUS_PACKET = bytes([0x99, 0xA5, 0x01])
+ROME_PACKET = bytes([0xBB, 0x01, 0x00, 0x10])
+
+
+def _families(exporter):
+    return {f.name: f for f in parser.text_string_to_metric_families(exporter.render())}
+
+
+def test_link_scrape_parses():
+    link = LinkDiagnostics()
+    t_ns = 10 * NS_PER_S
+    for _ in range(50):
+        link.feed(t_ns, STATUS_PACKET + ROME_PACKET)
+        t_ns += 5_000_000
+    link.check_stall(t_ns + 6 * NS_PER_S)
+
+    exporter = MetricsExporter()
+    exporter.add_link('raspi', link)
+    families = _families(exporter)
+
+    age = families['relay_link_last_frame_age_seconds']
+    assert age.unit == 'seconds'
+    assert age.samples[0].value > 0
+    assert families['relay_link_interval_seconds'].type == 'summary'
+    frames = {s.labels['kind']: s.value for s in families['relay_link_frames'].samples}
+    assert frames == {'status': 50, 'rome': 50}
+
+
+def test_idle_link_and_framer_merge_parse():
+    framer = StreamFramer()
+    framer.feed(STATUS_PACKET * 3)
+    list(framer.frames())
+
+    exporter = MetricsExporter()
+    exporter.add_link('raspi', LinkDiagnostics())  # belum ada frame -> NaN
+    exporter.add_framer('sniff', framer)
+    families = _families(exporter)
+
+    ports = {s.labels['port'] for s in families['relay_link_bytes'].samples}
+    assert ports == {'raspi', 'sniff'}
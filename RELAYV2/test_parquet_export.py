@@ -0,0 +1,87 @@
+"""
+Test parquet_export: round-trip capture -> Parquet, session per reboot.
+
+Run: python -m pytest -q test_parquet_export.py
+"""
+
+import os
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from capture_file import CaptureWriter, PORT_RASPI, PORT_ROME
+from frame_codec import make_frames, encode_frames, device_angles
+from parquet_export import export_capture
+
+MS = 1_000_000
+S = 1_000_000_000
+
+
+def _write_session(path, t0_ns, frames):
+    """Satu CaptureWriter per session (append setelah reboot)"""
+    data = encode_frames(frames)
+    with CaptureWriter(path) as writer:
+        for i in range(len(frames)):
+            t_ns = t0_ns + i * 5 * MS
+            writer.write(data[i * 15:(i + 1) * 15], PORT_RASPI, t_ns=t_ns)
+            writer.write(bytes([0xBB, 0x05, 0x07, 0x03]), PORT_ROME, t_ns=t_ns + 1)
+
+
+def test_round_trip_per_session(tmp_path):
+    path = str(tmp_path / 'soak.rcap')
+    rng = np.random.default_rng(0)
+    first = make_frames(40, discrete_b=1, devices=rng.integers(0, 3600, (40, 5)))
+    second = make_frames(30, discrete_b=2, devices=rng.integers(0, 3600, (30, 5)))
+    _write_session(path, 100 * S, first)
+    _write_session(path, 5 * S, second)   # reboot: jam mundur
+    mtime_ns = int(os.path.getmtime(path) * S)
+
+    out = str(tmp_path / 'soak.parquet')
+    writer = export_capture(path, out, row_group_rows=1000)
+    assert writer.rows == 140 and writer.row_groups == 2
+
+    table = pq.read_table(out)
+    session = table['session'].to_numpy()
+    assert session.tolist() == [0] * 80 + [1] * 60
+    assert pq.ParquetFile(out).metadata.num_row_groups == 2  # Tidak ada row group lintas session
+
+    # Wall clock: session terakhir berakhir di mtime, session 0 tepat sebelum session 1
+    stamps = table['timestamp'].cast('int64').to_numpy()
+    assert stamps[-1] == mtime_ns
+    assert np.all(np.diff(stamps) >= 0)
+    assert stamps[80] == stamps[79]
+
+    frame_type = table['frame_type'].to_pylist()
+    data = np.array([kind == 'data' for kind in frame_type])
+    assert data.sum() == 70
+    raw = np.column_stack([table[f'dev{i}_raw'].to_numpy(zero_copy_only=False)[data] for i in range(1, 6)])
+    frames = np.concatenate([first, second])
+    assert np.array_equal(raw, frames['device'])
+    angles = np.column_stack([table[f'dev{i}_angle'].to_numpy(zero_copy_only=False)[data] for i in range(1, 6)])
+    assert np.allclose(angles, device_angles(frames), atol=1e-4)
+    assert table['mode'].to_pylist()[0] == 'EHSI'
+
+    # Frame ROME: hanya kolom device-nya (Device 5, 0x0703 = 1795 -> -0.4 deg)
+    rome = ~data
+    assert np.all(table['dev5_raw'].to_numpy(zero_copy_only=False)[rome] == 0x0703)
+    assert table['dev5_angle'].to_numpy(zero_copy_only=False)[rome] == pytest.approx(-0.4, abs=1e-4)
+    assert table['dev1_raw'].filter(rome).null_count == 70
+
+
+def test_start_per_session(tmp_path):
+    path = str(tmp_path / 'soak.rcap')
+    _write_session(path, 100 * S, make_frames(10))
+    _write_session(path, 5 * S, make_frames(10))
+
+    out = str(tmp_path / 'soak.parquet')
+    starts = [datetime(2026, 10, 17, 8, 0, 0), datetime(2026, 10, 17, 9, 0, 0)]
+    export_capture(path, out, port=PORT_RASPI, starts=starts)
+    table = pq.read_table(out)
+    stamps = table['timestamp'].cast('int64').to_numpy()
+    session = table['session'].to_numpy()
+    assert stamps[session == 0][0] == int(starts[0].timestamp() * S)
+    assert stamps[session == 1][0] == int(starts[1].timestamp() * S)
+    assert stamps[session == 1][-1] - stamps[session == 1][0] == 45 * MS
@@ -3,16 +3,18 @@ import serial
 import time
 from datetime import datetime
 
+from latency_histogram import WindowedHistogram, format_summary, NS_PER_MS
+
 # ===== CONFIGURATION =====
 SERIAL_PORT = 'COM14'# Port RELAYV2
 BAUD_RATE = 115200
 TIMEOUT = 1  # seconds
+STATS_WINDOW = 10  # seconds - sliding window untuk statistik interval
 
 # ===== STATISTICS =====
 packet_count = 0
 error_count = 0
-last_time = None
-intervals = []
+intervals = WindowedHistogram(window_s=STATS_WINDOW)  # Memori tetap, aman untuk run berhari-hari
 
 def print_header():
     """Print header information"""
@@ -32,10 +34,11 @@ def format_hex(data):
 
 def calculate_stats():
     """Calculate and display statistics"""
-    if len(intervals) > 0:
-        avg_interval = sum(intervals) / len(intervals)
-        min_interval = min(intervals)
-        max_interval = max(intervals)
+    all_time = intervals.summary()
+    if all_time['count'] > 0:
+        avg_interval = all_time['mean'] / NS_PER_MS
+        min_interval = all_time['min'] / NS_PER_MS
+        max_interval = all_time['max'] / NS_PER_MS
         frequency = 1000.0 / avg_interval if avg_interval > 0 else 0
         
         print("\n" + "=" * 70)
@@ -49,10 +52,13 @@ def calculate_stats():
         print(f"  Minimum: {min_interval:.2f} ms")
         print(f"  Maximum: {max_interval:.2f} ms")
         print(f"  Target:  5.00 ms (200 Hz)")
+        print(f"\nInterval Percentiles:")
+        print(f"  Last {STATS_WINDOW}s: {format_summary(intervals.window_summary())}")
+        print(f"  All-time: {format_summary(all_time)}")
         print("=" * 70)
 
 def main():
-    global packet_count, error_count, last_time
+    global packet_count, error_count
     
     print_header()
     
@@ -71,19 +77,12 @@ def main():
             # Read 3 bytes (expected packet size)
             if ser.in_waiting >= 3:
                 data = ser.read(3)
-                current_time = time.time()
+                current_time = time.perf_counter_ns()
                 timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
                 
-                # Calculate interval
-                interval_ms = 0
-                if last_time is not None:
-                    interval_ms = (current_time - last_time) * 1000
-                    intervals.append(interval_ms)
-                    # Keep only last 100 intervals for stats
-                    if len(intervals) > 100:
-                        intervals.pop(0)
-                
-                last_time = current_time
+                # Calculate interval (O(1), histogram all-time + sliding window)
+                gap_ns = intervals.record_arrival(current_time)
+                interval_ms = gap_ns / NS_PER_MS if gap_ns is not None else 0
                 
                 # Parse packet type
                 if len(data) == 3:
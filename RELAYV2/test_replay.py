@@ -0,0 +1,84 @@
+"""
+Test replay: interval per chunk dan filter port default.
+
+Run: python -m pytest -q test_replay.py
+"""
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from capture_file import CaptureWriter, CaptureReader, PORT_RASPI, PORT_ROME
+from replay import replay, RelayUartSink, DiscreteMonitorSink
+from frame_codec import make_frames, encode_frames
+
+STATUS = bytes([0x99, 0xA5, 0x01])
+MS = 1_000_000
+
+
+def test_relay_uart_chunk_records_one_interval():
+    sink = RelayUartSink(quiet=True)
+    for i in range(10):
+        sink.feed(i * 20 * MS, STATUS * 4)  # 4 paket per read
+    assert sink.frames == 40
+    summary = sink.intervals.summary()
+    assert summary['count'] == 9
+    assert summary['min'] >= 19 * MS
+
+
+def test_default_port_ignores_other_buses(tmp_path):
+    path = str(tmp_path / 'multi.rcap')
+    data = encode_frames(make_frames(20, discrete_b=1))
+    with CaptureWriter(path) as writer:
+        for i in range(20):
+            writer.write(data[i * 15:(i + 1) * 15], PORT_RASPI, t_ns=(i + 1) * 5 * MS)
+            # Byte ROME di port lain, termasuk pola yang mirip header A5 99
+            writer.write(bytes([0xBB, 0x01, 0xA5, 0x99]), PORT_ROME, t_ns=(i + 1) * 5 * MS + 1)
+
+    with CaptureReader(path, use_index_cache=False) as reader:
+        sink = DiscreteMonitorSink(quiet=True)
+        result = replay(reader, sink, speed=None)
+    assert result['records'] == 20
+    assert sink.frames == 20
+    assert sink.framer.resyncs == 0
+
+
+def _write_sessions(path, *sessions):
+    """Satu file, satu CaptureWriter per session (append setelah reboot)"""
+    for t0_ns, count in sessions:
+        with CaptureWriter(path) as writer:
+            for i in range(count):
+                writer.write(STATUS, PORT_RASPI, t_ns=t0_ns + i * 5 * MS)
+
+
+def test_multi_session_reanchored(tmp_path):
+    path = str(tmp_path / 'sessions.rcap')
+    _write_sessions(path, (100 * 1000 * MS, 50), (5 * 1000 * MS, 30))  # reboot: jam mundur
+
+    class Recorder(RelayUartSink):
+        def __init__(self):
+            super().__init__(quiet=True)
+            self.times = []
+            self.sessions = 0
+
+        def feed(self, t_ns, data):
+            self.times.append(t_ns)
+            super().feed(t_ns, data)
+
+        def new_session(self):
+            self.sessions += 1
+            super().new_session()
+
+    with CaptureReader(path, use_index_cache=False) as reader:
+        sink = Recorder()
+        result = replay(reader, sink, speed=None)
+        assert result['records'] == 80
+        assert result['capture_s'] == pytest.approx(0.245 + 0.145)
+        assert sink.times[0] == 0 and all(b >= a for a, b in zip(sink.times, sink.times[1:]))
+        assert sink.sessions == 1
+        # Tidak ada gap lintas reboot: 49 + 29 interval 5 ms
+        summary = sink.intervals.summary()
+        assert summary['count'] == 78 and summary['min'] == 5 * MS
+
+        one = RelayUartSink(quiet=True)
+        assert replay(reader, one, speed=None, session=1)['records'] == 30
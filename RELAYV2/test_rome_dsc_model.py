@@ -0,0 +1,44 @@
+"""
+Test rome_dsc_model: hasil simulasi per batch sama dengan satu batch.
+
+Run: python -m pytest -q test_rome_dsc_model.py
+"""
+
+import random
+
+import rome_dsc_model
+from rome_dsc_model import simulate, synthetic_stream
+
+
+def _noisy_stream(count, seed=1):
+    """Paket ROME asli dicampur noise yang mirip header / ID"""
+    rng = random.Random(seed)
+    t_ns = 0
+    for _ in range(count):
+        t_ns += rng.randint(0, 3_000_000)
+        if rng.random() < 0.6:
+            data = bytes([0xBB, rng.randint(1, 5), rng.randint(0, 255), rng.choice([0xBB, 1, rng.randint(0, 255)])])
+        else:
+            data = bytes(rng.choice([0xBB, 1, 2, 3, 4, 5, 0x10]) for _ in range(rng.randint(1, 9)))
+        yield t_ns, data
+
+
+def test_batches_match_single_pass():
+    chunks = list(_noisy_stream(20000))
+    expected, _ = simulate(chunks, batch_records=len(chunks))
+    for batch_records in (1, 3, 97):
+        results, _ = simulate(chunks, batch_records=batch_records)
+        assert results == expected
+    assert sum(r['misframed'] for r in expected) > 0
+    assert sum(r['partial'] for r in expected) > 0
+
+
+def test_applied_detail_is_bounded(monkeypatch):
+    monkeypatch.setattr(rome_dsc_model, 'APPLIED_KEEP', 10)
+    results, models = simulate(synthetic_stream(200, 5))
+    for result in results:
+        model = models[result['id_device']]
+        assert len(model.applied) == 10
+        assert result['applied'] == model.accepted > 10
+        assert result['sent'] == 1000
+        assert result['applied'] + result['dropped'] + result['partial'] == result['sent']
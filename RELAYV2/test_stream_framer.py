@@ -0,0 +1,159 @@
+"""
+Test stream_framer + frame_codec: framer vs reference, codec round-trip.
+
+Run: python -m pytest -q test_stream_framer.py
+"""
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from frame_codec import (
+    decode_frames, decode_frames_at, encode_frames, make_frames,
+    DATA_FRAME_LEN, FRAME_DTYPE, NUM_DEVICES,
+)
+from stream_framer import StreamFramer, FRAME_SPECS, DATA, STATUS, ROME, NANO
+
+ALL_KINDS = (DATA, STATUS, ROME, NANO)
+# Byte yang sering muncul di header / ID, supaya junk sering mirip frame
+JUNK_BYTES = [0xA5, 0x99, 0xBB, 0xAA, 0x01, 0x02, 0x05, 0x06, 0x00, 0xFF]
+
+
+def reference_frames(data, kinds):
+    """Straightforward framer over the whole stream at once"""
+    specs = [(kind,) + FRAME_SPECS[kind] for kind in kinds]
+    frames = []
+    i = 0
+    while True:
+        hits = [(data.find(header, i), kind, length) for kind, header, length in specs]
+        hits = [hit for hit in hits if hit[0] >= 0]
+        if not hits:
+            return frames
+        pos, kind, length = min(hits)
+        if pos + length > len(data):
+            return frames
+        if kind == ROME and not 1 <= data[pos + 1] <= NUM_DEVICES:
+            i = pos + 1
+            continue
+        frames.append((kind, bytes(data[pos:pos + length])))
+        i = pos + length
+
+
+def random_stream(rng, kinds, count):
+    """Valid frames of the given kinds mixed with header-like junk"""
+    out = bytearray()
+    for _ in range(count):
+        if rng.random() < 0.3:
+            out += bytes(rng.choice(JUNK_BYTES) for _ in range(rng.randint(1, 20)))
+        kind = rng.choice(kinds)
+        header, length = FRAME_SPECS[kind]
+        body = bytes(rng.randrange(256) for _ in range(length - len(header)))
+        if kind == ROME:
+            body = bytes([rng.randint(1, NUM_DEVICES)]) + body[1:]
+        out += header + body
+    return bytes(out)
+
+
+def run_framer(framer, data, splits):
+    frames = []
+    prev = 0
+    for cut in splits + [len(data)]:
+        framer.feed(data[prev:cut])
+        # View hanya valid sampai feed() berikutnya: copy sekarang
+        frames += [(kind, bytes(view)) for kind, view in framer.frames()]
+        prev = cut
+    return frames
+
+
+@pytest.mark.parametrize('kinds', [(DATA,), (STATUS, ROME), ALL_KINDS])
+@pytest.mark.parametrize('seed', range(5))
+def test_random_splits_match_reference(kinds, seed):
+    rng = random.Random(seed)
+    data = random_stream(rng, kinds, 300)
+    splits = sorted(rng.sample(range(1, len(data)), 150))
+    # Capacity kecil: compaction dan pertumbuhan buffer ikut teruji
+    framer = StreamFramer(kinds, capacity=32)
+    frames = run_framer(framer, data, splits)
+
+    assert frames == reference_frames(data, kinds)
+    assert sum(framer.frame_counts.values()) == len(frames)
+    framed_bytes = sum(len(frame) for _, frame in frames)
+    assert framed_bytes + framer.discarded_bytes + len(framer) == framer.bytes_in == len(data)
+
+
+def test_byte_at_a_time_matches_single_feed():
+    rng = random.Random(42)
+    data = random_stream(rng, ALL_KINDS, 200)
+    single = run_framer(StreamFramer(ALL_KINDS), data, [])
+    assert run_framer(StreamFramer(ALL_KINDS), data, list(range(1, len(data)))) == single
+
+
+def test_absent_kind_does_not_break_framing():
+    # NANO tidak pernah muncul: cache posisi header tetap benar
+    frame = encode_frames(make_frames(1, discrete_a=0x12))
+    data = frame * 500
+    framer = StreamFramer(ALL_KINDS)
+    frames = run_framer(framer, data, list(range(7, len(data), 7)))
+    assert frames == [(DATA, frame)] * 500
+    assert framer.resyncs == 0 and framer.discarded_bytes == 0
+
+
+def test_resync_counted_once_per_loss():
+    status = bytes([0x99, 0xA5, 0x01])
+    framer = StreamFramer((STATUS,))
+    run_framer(framer, status + b'\x00\x11\x22' + status + status + b'\x33' + status, [4, 8])
+    assert framer.frame_counts[STATUS] == 4
+    assert framer.resyncs == 2
+    assert framer.discarded_bytes == 4
+
+
+def _random_frames(rng, count):
+    frames = make_frames(
+        count,
+        discrete_a=rng.integers(0, 256, count),
+        discrete_b=rng.integers(0, 256, count),
+        discrete_c=rng.integers(0, 256, count),
+        devices=rng.integers(0, 65536, (count, NUM_DEVICES)),
+    )
+    assert frames.dtype == FRAME_DTYPE
+    return frames
+
+
+def test_codec_round_trip():
+    rng = np.random.default_rng(0)
+    frames = _random_frames(rng, 1000)
+    data = encode_frames(frames)
+    assert len(data) == 1000 * DATA_FRAME_LEN
+    assert data[:2] == b'\xA5\x99'
+    decoded = decode_frames(data)
+    assert np.array_equal(decoded, frames)
+    assert encode_frames(decoded) == data
+    # Device word big-endian di wire
+    assert data[5:7] == int(frames['device'][0, 0]).to_bytes(2, 'big')
+
+
+def test_decode_validate_and_partial_tail():
+    frames = _random_frames(np.random.default_rng(1), 3)
+    data = bytearray(encode_frames(frames))
+    data[DATA_FRAME_LEN] = 0x00  # Header frame kedua rusak
+    data += b'\xA5\x99\x01'      # Frame terakhir belum lengkap
+    assert np.array_equal(decode_frames(bytes(data)), frames[[0, 2]])
+    assert len(decode_frames(bytes(data), validate=False)) == 3
+
+
+def test_decode_at_offsets_matches_framer():
+    rng = random.Random(7)
+    frames = _random_frames(np.random.default_rng(2), 50)
+    data = encode_frames(frames)
+    stream = bytearray()
+    offsets = []
+    for i in range(len(frames)):
+        stream += bytes(rng.choice([0x00, 0x99, 0xBB]) for _ in range(rng.randint(0, 5)))
+        offsets.append(len(stream))
+        stream += data[i * DATA_FRAME_LEN:(i + 1) * DATA_FRAME_LEN]
+    assert np.array_equal(decode_frames_at(bytes(stream), offsets), frames)
+
+    framed = run_framer(StreamFramer((DATA,)), bytes(stream), [])
+    assert np.array_equal(decode_frames(b''.join(frame for _, frame in framed)), frames)
@@ -0,0 +1,47 @@
+"""
+Test uart_diagnostic.LinkDiagnostics: statistik dari stream yang di-frame.
+
+Run: python -m pytest -q test_uart_diagnostic.py
+"""
+
+import pytest
+
+pytest.importorskip('serial')
+
+from latency_histogram import NS_PER_S
+from uart_diagnostic import LinkDiagnostics
+
+STATUS_PACKET = bytes([0x99, 0xA5, 0x01])
+ROME_PACKET = bytes([0xBB, 0x01, 0x00, 0x10])
+MS = 1_000_000
+
+
+def test_multi_frame_chunks_record_no_zero_gaps():
+    link = LinkDiagnostics()
+    for i in range(20):
+        # 3 status + 5 ROME per read, seperti OS buffering
+        link.feed(i * 20 * MS, STATUS_PACKET * 3 + ROME_PACKET * 5)
+    assert link.counts == {'status': 60, 'rome': 100}
+    for kind in ('status', 'rome'):
+        summary = link.gaps[kind].summary()
+        assert summary['count'] == 19
+        assert summary['min'] >= 19 * MS
+
+
+def test_kind_absent_from_chunk_keeps_its_gap():
+    link = LinkDiagnostics()
+    link.feed(0, STATUS_PACKET + ROME_PACKET)
+    link.feed(5 * MS, STATUS_PACKET)
+    link.feed(10 * MS, STATUS_PACKET + ROME_PACKET)
+    assert link.gaps['status'].summary()['count'] == 2
+    rome = link.gaps['rome'].summary()
+    assert rome['count'] == 1 and rome['min'] >= 9 * MS
+
+
+def test_stall_detected_once():
+    link = LinkDiagnostics(stuck_timeout=1)
+    link.feed(0, STATUS_PACKET)
+    assert link.check_stall(NS_PER_S // 2) is None
+    event = link.check_stall(2 * NS_PER_S)
+    assert event is not None and event[1] == pytest.approx(2.0)
+    assert link.check_stall(3 * NS_PER_S) is None
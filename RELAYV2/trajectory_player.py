@@ -0,0 +1,272 @@
+"""
+Trajectory Player - ROME Devices
+================================
+Putar trajectory sudut ke ROME_DSC (paket [0xBB, ID, MSB, LSB]) dengan
+rate presisi, untuk karakterisasi gauge tanpa ditunggui.
+
+- Trajectory: array (N tick x device), dari CSV atau generator
+  sweep / sine / step per device.
+- Encoding seluruh trajectory sekali jalan (NumPy); encode_angles() adalah
+  satu-satunya encoder sudut -> raw (dipakai juga rome_sender.py dan
+  manual_rome_control.py):
+      Device 1-4 : int(angle * 10)
+      Device 5   : int((angle + 179.9) * 10)   (EHSI relative, int16)
+  nilai negatif dikirim sebagai representasi unsigned 16-bit.
+- Koreksi per device dari rome_calibration.py (CalibrationSet) diterapkan
+  ke seluruh trajectory sebelum encoding, tanpa re-flash ROME_DSC1.
+- Semua paket dibangun di satu buffer bytes; tiap tick hanya write()
+  satu slice, dijadwalkan dengan DeadlineScheduler (deadline absolut).
+
+Format CSV: header berisi kolom device 'dev1'..'dev5' (atau '1'..'5'),
+opsional kolom 't' (detik). Tanpa 't' satu baris = satu tick; dengan
+'t' trajectory di-interpolasi linear ke grid --rate.
+
+Usage:
+    python trajectory_player.py --device 2 --sweep 0:360 --duration 60 --rate 50
+    python trajectory_player.py --device 1 --device 2 --sine 180:90:0.2 --duration 30
+    python trajectory_player.py --device 5 --step -90,0,90 --dwell 2 --repeat 3
+    python trajectory_player.py --csv gauge_sweep.csv --rate 100
+    python trajectory_player.py --device 2 --sweep 0:360 --calibration rome_calibration.json
+"""
+
+import argparse
+import csv
+import time
+
+import numpy as np
+import serial
+
+from deadline_scheduler import DeadlineScheduler, format_stats
+from frame_codec import NUM_DEVICES, ROME_FRAME_LEN
+from rome_calibration import CalibrationSet
+
+# ===== CONFIGURATION =====
+SERIAL_PORT = 'COM14'  # Port USB-TTL ke ROME_DSC
+BAUD_RATE = 115200
+DEFAULT_RATE_HZ = 50   # Tick per detik (semua device dikirim tiap tick)
+SPIN_US = 300          # Busy-wait sebelum deadline
+PROGRESS_INTERVAL = 1  # seconds - print progress tiap N detik
+
+ROME_HEADER_BYTE = 0xBB
+DEVICE5_ID = 5
+DEVICE5_OFFSET = 179.9
+ANGLE_SCALE = 10
+BYTES_PER_S = BAUD_RATE / 10  # 8N1: 10 bit per byte
+
+
+# ===== ENCODING =====
+
+def encode_angles(device_ids, angles, calibration=None):
+    """
+    Encode a trajectory into raw 16-bit words.
+
+    Args:
+        device_ids: sequence of K device IDs (1..5)
+        angles: array (N, K) of angles in degrees
+        calibration: optional CalibrationSet applied before encoding
+
+    Returns:
+        uint16 array (N, K)
+    """
+    angles = np.asarray(angles, dtype=np.float64).reshape(-1, len(device_ids))
+    if calibration is not None:
+        angles = calibration.apply(device_ids, angles)
+    device5 = np.asarray(device_ids) == DEVICE5_ID
+    scaled = np.where(device5, (angles + DEVICE5_OFFSET) * ANGLE_SCALE, angles * ANGLE_SCALE)
+    # int() Python = truncate ke nol, lalu ambil 16 bit bawah
+    return (np.trunc(scaled).astype(np.int64) & 0xFFFF).astype(np.uint16)
+
+
+def build_packets(device_ids, raw):
+    """
+    Prebuild every BB ID MSB LSB packet of a trajectory.
+
+    Returns:
+        bytes of N ticks x K packets x 4 bytes (tick i = slice i * K * 4)
+    """
+    raw = np.asarray(raw, dtype=np.uint16).reshape(-1, len(device_ids))
+    packets = np.empty(raw.shape + (ROME_FRAME_LEN,), dtype=np.uint8)
+    packets[..., 0] = ROME_HEADER_BYTE
+    packets[..., 1] = np.asarray(device_ids, dtype=np.uint8)
+    packets[..., 2] = raw >> 8
+    packets[..., 3] = raw & 0xFF
+    return packets.tobytes()
+
+
+# ===== TRAJECTORY GENERATORS =====
+
+def sweep(start, stop, count):
+    """Linear ramp from start to stop over count ticks"""
+    return np.linspace(start, stop, count)
+
+
+def sine(center, amplitude, freq_hz, count, rate_hz, phase_deg=0.0):
+    """center + amplitude * sin(2 pi f t)"""
+    t = np.arange(count) / rate_hz
+    return center + amplitude * np.sin(2 * np.pi * freq_hz * t + np.radians(phase_deg))
+
+
+def step(levels, dwell_s, rate_hz):
+    """Hold each level for dwell_s seconds"""
+    return np.repeat(np.asarray(levels, dtype=np.float64), max(1, round(dwell_s * rate_hz)))
+
+
+def load_csv(path, rate_hz):
+    """
+    Read a trajectory CSV.
+
+    Returns:
+        (device_ids, angles array (N, K))
+    """
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader)]
+        rows = np.array([[float(v) for v in row] for row in reader if row], dtype=np.float64)
+
+    device_cols = []
+    for i, name in enumerate(header):
+        name = name[3:] if name.startswith('dev') else name
+        if name.isdigit() and 1 <= int(name) <= NUM_DEVICES:
+            device_cols.append((int(name), i))
+    if not device_cols:
+        raise ValueError(f"{path}: no device columns (expected dev1..dev{NUM_DEVICES})")
+
+    device_ids = [dev for dev, _ in device_cols]
+    angles = rows[:, [col for _, col in device_cols]]
+    if 't' in header:
+        t = rows[:, header.index('t')]
+        grid = np.arange(t[0], t[-1] + 0.5 / rate_hz, 1.0 / rate_hz)
+        angles = np.column_stack([np.interp(grid, t, angles[:, k]) for k in range(len(device_ids))])
+    return device_ids, angles
+
+
+# ===== PLAYER =====
+
+class TrajectoryPlayer:
+    """Stream a prebuilt packet buffer, one tick per deadline"""
+
+    def __init__(self, ser, device_ids, angles, rate_hz=DEFAULT_RATE_HZ, spin_us=SPIN_US, calibration=None):
+        self.ser = ser
+        self.device_ids = list(device_ids)
+        self.angles = np.asarray(angles, dtype=np.float64).reshape(-1, len(self.device_ids))
+        self.raw = encode_angles(self.device_ids, self.angles, calibration)
+        self.buffer = build_packets(self.device_ids, self.raw)
+        self.stride = len(self.device_ids) * ROME_FRAME_LEN
+        self.ticks = len(self.angles)
+        self.scheduler = DeadlineScheduler(rate_hz, spin_us=spin_us)
+        self.sent = 0
+
+    @property
+    def duration_s(self):
+        return self.ticks / self.scheduler.rate_hz
+
+    @property
+    def link_load(self):
+        """Fraction of the UART bandwidth used by this trajectory"""
+        return self.stride * self.scheduler.rate_hz / BYTES_PER_S
+
+    def play(self, progress=None):
+        """Send every tick; progress(tick) is called about once per PROGRESS_INTERVAL"""
+        view = memoryview(self.buffer)
+        stride = self.stride
+        every = max(1, round(PROGRESS_INTERVAL * self.scheduler.rate_hz))
+
+        def tick(i):
+            self.ser.write(view[i * stride:(i + 1) * stride])
+            self.sent = i + 1
+            if progress is not None and i % every == 0:
+                progress(i)
+
+        self.scheduler.run(tick, count=self.ticks)
+
+
+def print_progress(player, i):
+    angles = ' '.join(f"D{dev} {angle:7.1f}" for dev, angle in zip(player.device_ids, player.angles[i]))
+    raws = ' '.join(f"{raw:04X}" for raw in player.raw[i])
+    print(f"  [{i + 1:>7,}/{player.ticks:,}] {angles} | raw {raws}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Play angle trajectories to ROME devices")
+    parser.add_argument('--port', default=SERIAL_PORT)
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_HZ, help="ticks per second")
+    parser.add_argument('--device', type=int, action='append', help="device ID 1..5 (repeatable)")
+    parser.add_argument('--csv', help="trajectory CSV (dev1..dev5 columns, optional t)")
+    parser.add_argument('--sweep', help="start:stop in degrees")
+    parser.add_argument('--sine', help="center:amplitude:freq_hz")
+    parser.add_argument('--step', help="comma separated levels in degrees")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds (sweep / sine)")
+    parser.add_argument('--dwell', type=float, default=1.0, help="seconds per level (step)")
+    parser.add_argument('--repeat', type=int, default=1, help="play the trajectory N times")
+    parser.add_argument('--calibration', help="correction table JSON from rome_calibration.py")
+    parser.add_argument('--dry-run', action='store_true', help="encode and report, do not send")
+    return parser.parse_args()
+
+
+def build_trajectory(args):
+    """(device_ids, angles (N, K)) from the command line"""
+    if args.csv:
+        device_ids, angles = load_csv(args.csv, args.rate)
+    else:
+        device_ids = args.device or [2]
+        count = max(1, round(args.duration * args.rate))
+        if args.sweep:
+            start, stop = (float(v) for v in args.sweep.split(':'))
+            series = sweep(start, stop, count)
+        elif args.sine:
+            center, amplitude, freq = (float(v) for v in args.sine.split(':'))
+            series = sine(center, amplitude, freq, count, args.rate)
+        elif args.step:
+            series = step([float(v) for v in args.step.split(',')], args.dwell, args.rate)
+        else:
+            raise SystemExit("Pilih salah satu: --csv, --sweep, --sine, --step")
+        angles = np.repeat(series[:, None], len(device_ids), axis=1)
+    return device_ids, np.tile(angles, (max(1, args.repeat), 1))
+
+
+def main():
+    args = parse_args()
+    device_ids, angles = build_trajectory(args)
+
+    print("=" * 70)
+    print("Trajectory Player - ROME")
+    print("=" * 70)
+
+    calibration = CalibrationSet.load(args.calibration) if args.calibration else None
+    if calibration is not None:
+        calibrated = [dev for dev in device_ids if dev in calibration]
+        print(f"Calibration: {args.calibration} (device {', '.join(map(str, calibrated)) or '-'})")
+
+    t0 = time.perf_counter()
+    player = TrajectoryPlayer(None, device_ids, angles, args.rate, calibration=calibration)
+    encode_ms = (time.perf_counter() - t0) * 1000
+    print(f"Devices: {', '.join(str(d) for d in device_ids)} | Ticks: {player.ticks:,} @ {args.rate:g} Hz "
+          f"({player.duration_s:.1f}s)")
+    print(f"Encoded {player.raw.size:,} values / {len(player.buffer):,} bytes in {encode_ms:.1f} ms")
+    print(f"Link load: {player.link_load * 100:.1f}% of {BAUD_RATE} baud")
+    if player.link_load > 1.0:
+        print("⚠️  Rate terlalu tinggi untuk baud rate ini: paket akan tertinggal dari jadwal")
+    if args.dry_run:
+        for i in (0, player.ticks - 1):
+            print_progress(player, i)
+        return
+
+    try:
+        player.ser = serial.Serial(args.port, BAUD_RATE, timeout=1)
+    except serial.SerialException as e:
+        print(f"Connection Failed: {e}")
+        return
+    print(f"Connected to {args.port}\n")
+
+    try:
+        player.play(lambda i: print_progress(player, i))
+        print("\n✅ Trajectory selesai")
+    except KeyboardInterrupt:
+        print(f"\n\n⏹️  Stopped at tick {player.sent:,}/{player.ticks:,}")
+    finally:
+        player.ser.close()
+        print(format_stats(player.scheduler.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -7,31 +7,149 @@ Monitor UART and automatically detect:
 - Error patterns
 - Possible root causes
 
+Packet dihitung dari stream yang benar-benar di-frame (StreamFramer),
+bukan per read(3), jadi satu byte hilang tidak membuat semua hitungan
+bergeser:
+    99 A5 val        -> STATUS (RELAYV2 heartbeat, 200 Hz)
+    BB ID MSB LSB    -> ROME   (forward ke device 1..5)
+Byte yang tidak bisa di-frame dihitung sebagai discarded + resync.
+
 Usage: python uart_diagnostic.py
 """
 
 import serial
 import time
 from datetime import datetime
-from collections import deque
+
+from latency_histogram import WindowedHistogram, format_summary, NS_PER_S
+from stream_framer import StreamFramer, STATUS, ROME
+from metrics_exporter import MetricsExporter
 
 # ===== CONFIGURATION =====
 SERIAL_PORT = 'COM14'
 BAUD_RATE = 115200
-TIMEOUT = 1
+TIMEOUT = 0.1  # read() blocking maksimal segini, tanpa polling sleep
+FRAME_KINDS = (STATUS, ROME)  # Jenis paket yang di-frame di port ini
+METRICS_PORT = None  # Contoh: 9464 -> http://127.0.0.1:9464/metrics (opsional)
 
 # Diagnostic thresholds
 STUCK_TIMEOUT = 5  # seconds - if no packet for this long, consider stuck
 MIN_RATE_WARNING = 50  # Hz - warn if rate drops below this
 RATE_CHECK_INTERVAL = 1  # seconds - check rate every N seconds
+RATE_WINDOW = 10  # seconds - sliding window for average rate / jitter
+
+
+class LinkDiagnostics:
+    """Framed per-type statistics and stall detection for one UART stream"""
+
+    def __init__(self, kinds=FRAME_KINDS, window_s=RATE_WINDOW, stuck_timeout=STUCK_TIMEOUT):
+        self.kinds = tuple(kinds)
+        self.framer = StreamFramer(self.kinds)
+        self.stuck_timeout_ns = int(stuck_timeout * NS_PER_S)
+
+        # Inter-arrival per jenis paket (ns), memori tetap
+        self.gaps = {kind: WindowedHistogram(window_s=window_s) for kind in self.kinds}
+        self.counts = {kind: 0 for kind in self.kinds}
+        self.total_packets = 0
+        self.first_packet_ns = None
+        self.last_packet_ns = None
+
+        # Stall: tidak ada paket ter-frame selama stuck_timeout
+        self.stalled = False
+        self.stall_events = []  # (t_ns last packet, gap_s, bytes received during gap)
+        self._bytes_at_last_packet = 0
+
+        # Rate per interval
+        self._interval_start_ns = None
+        self._interval_counts = dict(self.counts)
+        self._interval_resyncs = 0
+
+    @property
+    def resyncs(self):
+        return self.framer.resyncs
+
+    @property
+    def discarded_bytes(self):
+        return self.framer.discarded_bytes
 
-# ===== STATISTICS =====
-total_packets = 0
-error_count = 0
-last_packet_time = None
-packet_times = deque(maxlen=1000)  # Keep last 1000 packet timestamps
+    @property
+    def bytes_in(self):
+        return self.framer.bytes_in
 
-def analyze_stuck_cause(time_since_last, total_packets, avg_rate):
+    def feed(self, t_ns, data):
+        """Frame received bytes; t_ns is the read time (monotonic ns)"""
+        if not data:
+            return
+        if self._interval_start_ns is None:
+            self._interval_start_ns = t_ns
+        self.framer.feed(data)
+        counts = self.counts
+        framed = 0
+        seen = set()
+        for kind, _ in self.framer.frames():
+            counts[kind] += 1
+            seen.add(kind)
+            framed += 1
+        # Semua frame dalam satu chunk punya timestamp yang sama: satu
+        # arrival per jenis per chunk, bukan gap nol untuk frame lainnya
+        for kind in seen:
+            self.gaps[kind].record_arrival(t_ns)
+        if framed:
+            self.total_packets += framed
+            if self.first_packet_ns is None:
+                self.first_packet_ns = t_ns
+            self.last_packet_ns = t_ns
+            self._bytes_at_last_packet = self.framer.bytes_in
+            self.stalled = False
+
+    def check_stall(self, t_ns):
+        """Return a new stall event (once per stall) if no packet for stuck_timeout"""
+        if self.stalled or self.last_packet_ns is None:
+            return None
+        gap_ns = t_ns - self.last_packet_ns
+        if gap_ns < self.stuck_timeout_ns:
+            return None
+        self.stalled = True
+        event = (self.last_packet_ns, gap_ns / NS_PER_S, self.framer.bytes_in - self._bytes_at_last_packet)
+        self.stall_events.append(event)
+        return event
+
+    def interval_rates(self, t_ns):
+        """Per-type packet rate (Hz) and new resyncs since the previous call"""
+        elapsed_ns = t_ns - self._interval_start_ns if self._interval_start_ns is not None else 0
+        rates = {}
+        for kind in self.kinds:
+            n = self.counts[kind] - self._interval_counts[kind]
+            rates[kind] = n * NS_PER_S / elapsed_ns if elapsed_ns > 0 else 0.0
+        new_resyncs = self.resyncs - self._interval_resyncs
+        self._interval_start_ns = t_ns
+        self._interval_counts = dict(self.counts)
+        self._interval_resyncs = self.resyncs
+        return rates, new_resyncs
+
+    def window_rate(self, kind=None, t_ns=None):
+        """
+        Average rate (Hz) over the sliding window, one type or all.
+
+        Tanpa t_ns window diukur mundur dari sampel terakhir (rate sebelum
+        stall). Dengan t_ns (sekarang) rate = jumlah frame / lama window
+        sampai t_ns, jadi turun ke 0 selama link stall.
+        """
+        total = 0.0
+        for k in ((kind,) if kind else self.kinds):
+            gaps = self.gaps[k]
+            window = gaps.window(t_ns)
+            if t_ns is None:
+                if window.count and window.mean > 0:
+                    total += NS_PER_S / window.mean
+                continue
+            start = max(gaps.window_start(t_ns), self.first_packet_ns or t_ns)
+            if window.count and t_ns > start:
+                total += window.count * NS_PER_S / (t_ns - start)
+        return total
+
+
+def analyze_stuck_cause(time_since_last, total_packets, avg_rate, bytes_in_gap=None):
     """Analyze possible causes of stuck"""
     print("\n" + "="*80)
     print("🔴 STUCK DETECTED!")
@@ -39,35 +157,40 @@ def analyze_stuck_cause(time_since_last, total_packets, avg_rate):
     print(f"Time since last packet: {time_since_last:.1f} seconds")
     print(f"Total packets received: {total_packets:,}")
     print(f"Average rate before stuck: {avg_rate:.1f} Hz")
-    
+
     print("\n📋 POSSIBLE CAUSES:")
-    
+
+    if bytes_in_gap:
+        print(f"  0. ⚠️  {bytes_in_gap:,} bytes arrived but none could be framed")
+        print("     → Link alive, framing lost (baud mismatch / wrong header / noise)")
+        print("     → Check baud rate and that the right port is connected")
+
     if total_packets < 100:
         print("  1. ❌ UART not initialized properly")
         print("     → Check if Raspi_UART_Start() is called in main()")
         print("     → Check UART pins (PA10 = RX)")
-    
+
     elif total_packets < 1000:
         print("  1. ❌ Early crash - likely callback error")
         print("     → Check HAL_UART_RxCpltCallback() for buffer overflow")
         print("     → Check if rx_index/idx_payload exceed buffer size")
-    
+
     elif total_packets < 10000:
         print("  1. ⚠️  Callback logic error")
         print("     → Check if rx_ready flag is reset properly")
         print("     → Check if rx_index gets stuck (should reset to 0)")
-    
+
     elif total_packets < 100000:
         print("  1. ⚠️  UART error not handled")
         print("     → Check if HAL_UART_ErrorCallback() exists")
         print("     → Check if error flags are cleared")
-    
+
     else:
         print("  1. ⚠️  Long-term stability issue")
         print("     → Possible memory corruption")
         print("     → Check for stack overflow")
         print("     → Check if volatile keyword used for shared variables")
-    
+
     print("\n🔧 RECOMMENDED ACTIONS:")
     print("  1. Check STM32 debugger for crash/hardfault")
     print("  2. Add LED toggle in HAL_UART_RxCpltCallback() to confirm it's running")
@@ -82,100 +205,96 @@ def print_header():
     print("="*80)
     print(f"Port: {SERIAL_PORT}")
     print(f"Baud: {BAUD_RATE}")
+    print(f"Frames: {', '.join(FRAME_KINDS)}")
     print(f"Stuck timeout: {STUCK_TIMEOUT}s")
     print("="*80)
     print("\nMonitoring... (Press Ctrl+C to stop)\n")
 
 def main():
-    global total_packets, error_count, last_packet_time
-    
     print_header()
-    
+
+    diag = LinkDiagnostics()
+    if METRICS_PORT:
+        exporter = MetricsExporter(port=METRICS_PORT).start()
+        exporter.add_link(SERIAL_PORT, diag)
+        print(f"Metrics: {exporter.url}\n")
     try:
         ser = serial.Serial(SERIAL_PORT, BAUD_RATE, timeout=TIMEOUT)
         print(f"✅ Connected to {SERIAL_PORT}\n")
-        
+
         ser.reset_input_buffer()
-        
-        last_rate_check = time.time()
-        packets_since_last_check = 0
-        current_rate = 0
-        
-        print(f"{'Time':<12} {'Total Packets':<15} {'Rate (Hz)':<12} {'Status':<30}")
-        print("-"*80)
-        
+
+        last_rate_check = time.monotonic_ns()
+        check_ns = int(RATE_CHECK_INTERVAL * NS_PER_S)
+
+        print(f"{'Time':<12} {'Total Packets':<15} {'Status Hz':<11} {'ROME Hz':<11} "
+              f"{'Resyncs':<9} {'Discarded':<11} {'Status':<30}")
+        print("-"*100)
+
         while True:
-            current_time = time.time()
-            
+            # Blocking read (maks TIMEOUT), ambil semua byte yang sudah ada
+            data = ser.read(ser.in_waiting or 1)
+            now_ns = time.monotonic_ns()
+            diag.feed(now_ns, data)
+
             # Check for stuck
-            if last_packet_time is not None:
-                time_since_last = current_time - last_packet_time
-                if time_since_last >= STUCK_TIMEOUT:
-                    # Calculate average rate before stuck
-                    if len(packet_times) > 1:
-                        time_span = packet_times[-1] - packet_times[0]
-                        avg_rate = len(packet_times) / time_span if time_span > 0 else 0
-                    else:
-                        avg_rate = 0
-                    
-                    analyze_stuck_cause(time_since_last, total_packets, avg_rate)
-                    
-                    # Wait for user to fix and restart
-                    print("\nWaiting for packets to resume...")
-                    last_packet_time = None  # Reset to avoid repeated analysis
-            
-            # Read data
-            if ser.in_waiting >= 3:
-                data = ser.read(3)
-                if len(data) == 3:
-                    total_packets += 1
-                    packets_since_last_check += 1
-                    now = time.time()
-                    last_packet_time = now
-                    packet_times.append(now)
-            
+            stall = diag.check_stall(now_ns)
+            if stall is not None:
+                _, gap_s, bytes_in_gap = stall
+                analyze_stuck_cause(gap_s, diag.total_packets, diag.window_rate(), bytes_in_gap)
+                print("\nWaiting for packets to resume...")
+
             # Calculate rate every N seconds
-            if current_time - last_rate_check >= RATE_CHECK_INTERVAL:
-                current_rate = packets_since_last_check / RATE_CHECK_INTERVAL
-                
+            if now_ns - last_rate_check >= check_ns:
+                rates, new_resyncs = diag.interval_rates(now_ns)
+                current_rate = sum(rates.values())
+
                 # Status
                 if current_rate == 0:
                     status = "⏸️  NO PACKETS"
                 elif current_rate < MIN_RATE_WARNING:
                     status = f"⚠️  LOW RATE (< {MIN_RATE_WARNING} Hz)"
+                elif new_resyncs:
+                    status = f"⚠️  RESYNC x{new_resyncs}"
                 else:
                     status = "✅ OK"
-                
+
                 timestamp = datetime.now().strftime("%H:%M:%S")
-                print(f"{timestamp:<12} {total_packets:<15,} {current_rate:<12.1f} {status:<30}")
-                
-                packets_since_last_check = 0
-                last_rate_check = current_time
-            
-            time.sleep(0.001)
-    
+                print(f"{timestamp:<12} {diag.total_packets:<15,} {rates.get(STATUS, 0):<11.1f} "
+                      f"{rates.get(ROME, 0):<11.1f} {diag.resyncs:<9,} {diag.discarded_bytes:<11,} {status:<30}")
+
+                last_rate_check = now_ns
+
     except serial.SerialException as e:
         print(f"\n❌ Serial Error: {e}")
         print(f"\nCheck:")
         print(f"  1. Is {SERIAL_PORT} the correct port?")
         print(f"  2. Is another program using this port?")
         print(f"  3. Is USB-Serial adapter connected?")
-    
+
     except KeyboardInterrupt:
         print(f"\n\n⏹️  Monitoring stopped by user")
         print(f"\n📊 FINAL STATISTICS:")
-        print(f"  Total packets: {total_packets:,}")
-        print(f"  Errors: {error_count}")
-        
-        if len(packet_times) > 1:
-            time_span = packet_times[-1] - packet_times[0]
-            avg_rate = len(packet_times) / time_span if time_span > 0 else 0
+        print(f"  Total packets: {diag.total_packets:,}")
+        for kind in diag.kinds:
+            print(f"    {kind:<8} {diag.counts[kind]:,}")
+        print(f"  Bytes received: {diag.bytes_in:,}")
+        print(f"  Resyncs: {diag.resyncs:,}")
+        print(f"  Bytes discarded: {diag.discarded_bytes:,}")
+        print(f"  Stall events: {len(diag.stall_events)}")
+
+        if diag.total_packets > 1:
+            duration_s = (diag.last_packet_ns - diag.first_packet_ns) / NS_PER_S
+            avg_rate = diag.total_packets / duration_s if duration_s > 0 else 0
             print(f"  Average rate: {avg_rate:.1f} Hz")
-            print(f"  Duration: {time_span:.1f} seconds")
-        
-        if total_packets > 0:
+            print(f"  Duration: {duration_s:.1f} seconds")
+            for kind in diag.kinds:
+                print(f"  {kind} interval (all-time): {format_summary(diag.gaps[kind].summary())}")
+                print(f"  {kind} interval (last {RATE_WINDOW}s): {format_summary(diag.gaps[kind].window_summary())}")
+
+        if diag.total_packets > 0 and not diag.stall_events:
             print(f"\n✅ No stuck detected - system stable!")
-    
+
     finally:
         if 'ser' in locals() and ser.is_open:
             ser.close()